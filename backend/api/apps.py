@@ -7,14 +7,17 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         """
-        Start the operator checker thread when the app is ready
-        Only start in the main process, not in management commands or reloader
+        Connect model signals and start the operator expiry scheduler
+        Only start the scheduler in server processes that set RUN_SCHEDULERS
         """
-        import sys
-        import os
+        from django.conf import settings
 
-        if os.environ.get("RUN_MAIN") == "true" or "runserver" not in sys.argv:
-            # Import here to avoid circular imports
-            from .models import start_operator_checker_thread
+        from . import signals  # noqa: F401
 
-            start_operator_checker_thread()
+        if not getattr(settings, "RUN_SCHEDULERS", False):
+            return
+
+        # Import here to avoid circular imports
+        from .operator_expiry import start_operator_expiry_scheduler
+
+        start_operator_expiry_scheduler()
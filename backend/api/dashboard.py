@@ -0,0 +1,119 @@
+from .response_cache import get_model_versions
+from django.db.models import Count, Q
+from django.core.cache import cache
+from django.utils import timezone
+from django.conf import settings
+
+# TODO: Dashboard summary
+
+
+def _machine_counts():
+    from .models import Machine
+
+    today = timezone.localdate()
+    return Machine.objects.aggregate(
+        total=Count("pk"),
+        **{
+            status.lower(): Count("pk", filter=Q(status=status))
+            for status in Machine.Status.values
+        },
+        maintenance_due=Count("pk", filter=Q(next_maintenance_date__lte=today)),
+    )
+
+
+def _workshop_counts():
+    from .models import Workshop
+
+    return Workshop.objects.aggregate(
+        total=Count("pk"),
+        **{
+            status.lower(): Count("pk", filter=Q(operational_status=status))
+            for status in Workshop.OperationalStatus.values
+        },
+    )
+
+
+def _department_counts():
+    from .models import Department
+
+    return Department.objects.aggregate(
+        total=Count("pk"),
+        without_supervisor=Count("pk", filter=Q(supervisor__isnull=True)),
+    )
+
+
+def _material_counts():
+    from .models import Material
+
+    return Material.objects.aggregate(
+        total=Count("pk"),
+        in_stock=Count("pk", filter=Q(quantity__gt=0)),
+        low_stock=Count("pk", filter=Q(is_low_stock=True, quantity__gt=0)),
+        out_of_stock=Count("pk", filter=Q(quantity__lte=0)),
+    )
+
+
+def _supplier_counts():
+    from .models import Supplier
+
+    return Supplier.objects.aggregate(total=Count("pk"))
+
+
+SECTIONS = {
+    "machines": ("api.Machine", _machine_counts),
+    "workshops": ("api.Workshop", _workshop_counts),
+    "departments": ("api.Department", _department_counts),
+    "materials": ("api.Material", _material_counts),
+    "suppliers": ("api.Supplier", _supplier_counts),
+}
+
+ROLE_SECTIONS = {
+    "ADMIN": ["machines", "workshops", "departments", "materials", "suppliers"],
+    "MANAGER": ["machines", "workshops", "departments", "materials", "suppliers"],
+    "SUPERVISOR": ["machines", "workshops"],
+    "TECHNICIAN": ["machines"],
+    "PURCHASING": ["materials", "suppliers"],
+    "OPERATOR": [],
+}
+
+
+def get_section_counts(names):
+    """
+    Counts for each section, one aggregate query per section on a miss.
+    Keyed by the model's version counter so writes show up immediately,
+    the short timeout covers writes that bypass signals.
+    """
+    from django.apps import apps
+
+    models = [apps.get_model(SECTIONS[name][0]) for name in names]
+    today = timezone.localdate().isoformat()
+    keys = {
+        name: f"dashboard:{name}:{version}:{today}"
+        for name, version in zip(names, get_model_versions(models))
+    }
+
+    found = cache.get_many(keys.values())
+    missing = {
+        keys[name]: SECTIONS[name][1]() for name in names if keys[name] not in found
+    }
+    if missing:
+        cache.set_many(missing, getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 30))
+
+    found.update(missing)
+    return {name: found[keys[name]] for name in names}
+
+
+def dashboard_summary(user):
+    "Role specific KPIs for the dashboard in one response"
+    from .models import Machine
+
+    role = (user.role or "").upper()
+    summary = {"role": role, **get_section_counts(ROLE_SECTIONS.get(role, []))}
+
+    if role == "OPERATOR":
+        summary["assigned_machine"] = (
+            Machine.objects.filter(operator=user)
+            .values("id", "name", "operator_auto_remove_at")
+            .first()
+        )
+    return summary
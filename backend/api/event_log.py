@@ -0,0 +1,109 @@
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.conf import settings
+from functools import partial
+import threading
+import logging
+import atexit
+
+logger = logging.getLogger(__name__)
+_buffer = None
+_buffer_lock = threading.Lock()
+
+# TODO: Buffered state transition log
+
+
+class TransitionBuffer:
+    """
+    In-process buffer of StateTransition rows
+
+    - Saves only append to a list, nothing is written on the request path ☑️
+    - A daemon thread bulk_creates the batch every interval or once it is full ☑️
+    - A failed flush keeps the rows (up to ten batches) for the next attempt ☑️
+    """
+
+    def __init__(self, batch_size, interval):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.events = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def add(self, events):
+        with self.lock:
+            self.events.extend(events)
+            full = len(self.events) >= self.batch_size
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="TransitionBuffer", daemon=True
+                )
+                self.thread.start()
+
+        if full:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing state transitions: {e}")
+
+    def flush(self):
+        from .models import StateTransition
+
+        with self.lock:
+            events, self.events = self.events, []
+        if not events:
+            return
+
+        try:
+            StateTransition.objects.bulk_create(events, batch_size=self.batch_size)
+        except Exception:
+            with self.lock:
+                self.events[:0] = events[-self.batch_size * 10 :]
+            raise
+
+
+def get_transition_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = TransitionBuffer(
+                batch_size=getattr(settings, "EVENT_LOG_BATCH_SIZE", 500),
+                interval=getattr(settings, "EVENT_LOG_FLUSH_INTERVAL_MS", 1000) / 1000,
+            )
+            atexit.register(_buffer.flush)
+    return _buffer
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def record_transitions(model, rows, occurred_at=None):
+    """
+    Log (entity id, field, old value, new value) rows of a model once the
+    current transaction commits, rolled back changes are never logged.
+    """
+    from .models import StateTransition
+
+    occurred_at = occurred_at or timezone.now()
+    events = [
+        StateTransition(
+            entity_type=model._meta.model_name,
+            entity_id=entity_id,
+            field=field,
+            old_value=_text(old),
+            new_value=_text(new),
+            occurred_at=occurred_at,
+        )
+        for entity_id, field, old, new in rows
+        if _text(old) != _text(new)
+    ]
+    if events:
+        transaction.on_commit(partial(get_transition_buffer().add, events))
@@ -0,0 +1,238 @@
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Trunc
+from django.db import IntegrityError, transaction
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+# TODO: Labor utilization rollups
+
+DIMENSIONS = ("employee", "project", "task", "production_line")
+PERIODS = ("day", "week", "month")
+
+AllocationRow = namedtuple(
+    "AllocationRow",
+    ["employee", "project", "task", "production_line", "date", "hours"],
+)
+
+
+def period_start(day, period):
+    "First day of the bucket a date falls in, weeks start on Monday"
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def allocation_row(allocation, previous=False):
+    "What an allocation adds to the rollups, as it is now or as it was loaded"
+    values = {
+        field: (
+            allocation.previous(field)
+            if previous
+            else getattr(allocation, allocation._meta.get_field(field).attname)
+        )
+        for field in [*DIMENSIONS, "date", "hours_allocated"]
+    }
+    # !date defaults to now(), a datetime until the row is read back
+    day = allocation._meta.get_field("date").to_python(values.pop("date"))
+    hours = Decimal(values.pop("hours_allocated") or 0)
+    return AllocationRow(**values, date=day, hours=hours)
+
+
+def rollup_deltas(removed=(), added=()):
+    "Net change per (dimension, key, period, period start) bucket"
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+
+    for rows, sign in ((removed, -1), (added, 1)):
+        for row in rows:
+            for dimension in DIMENSIONS:
+                key = getattr(row, dimension)
+                if key is None:
+                    continue
+                for period in PERIODS:
+                    delta = deltas[
+                        (dimension, key, period, period_start(row.date, period))
+                    ]
+                    delta[0] += sign * row.hours
+                    delta[1] += sign
+
+    return {bucket: delta for bucket, delta in deltas.items() if any(delta)}
+
+
+def _apply(deltas):
+    from .models import LaborUtilizationRollup
+
+    rollups = LaborUtilizationRollup.objects.select_for_update().filter(
+        dimension__in={bucket[0] for bucket in deltas},
+        key__in={bucket[1] for bucket in deltas},
+        period__in={bucket[2] for bucket in deltas},
+        period_start__in={bucket[3] for bucket in deltas},
+    )
+    existing = {
+        (rollup.dimension, rollup.key, rollup.period, rollup.period_start): rollup
+        for rollup in rollups
+    }
+
+    created, changed, emptied = [], [], []
+    for bucket, (hours, allocations) in deltas.items():
+        rollup = existing.get(bucket)
+        if rollup is None:
+            # !Nothing to subtract from, the table was never backfilled
+            if allocations > 0:
+                dimension, key, period, start = bucket
+                created.append(
+                    LaborUtilizationRollup(
+                        dimension=dimension,
+                        key=key,
+                        period=period,
+                        period_start=start,
+                        hours=hours,
+                        allocations=allocations,
+                    )
+                )
+            continue
+
+        rollup.hours += hours
+        rollup.allocations += allocations
+        (changed if rollup.allocations > 0 else emptied).append(rollup)
+
+    LaborUtilizationRollup.objects.bulk_create(created)
+    LaborUtilizationRollup.objects.bulk_update(
+        changed, ["hours", "allocations"], batch_size=500
+    )
+    LaborUtilizationRollup.objects.filter(
+        pk__in=[rollup.pk for rollup in emptied]
+    ).delete()
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Add the deltas to their buckets with one read and at most three writes.
+    A bucket created concurrently by another writer is picked up on a retry.
+    """
+    if not deltas:
+        return
+
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                _apply(deltas)
+            return
+        except IntegrityError:
+            if attempt == 2:
+                raise
+
+
+def record_allocation_changes(removed=(), added=()):
+    apply_rollup_deltas(rollup_deltas(removed, added))
+
+
+def rebuild_rollups(batch_size=1000):
+    """
+    Recompute every bucket from LaborAllocation with one grouped query per
+    dimension and period. Returns the number of rollup rows written.
+    """
+    from .models import LaborAllocation, LaborUtilizationRollup
+
+    written = 0
+    with transaction.atomic():
+        LaborUtilizationRollup.objects.all().delete()
+
+        for dimension in DIMENSIONS:
+            for period in PERIODS:
+                rows = (
+                    LaborAllocation.objects.filter(**{f"{dimension}__isnull": False})
+                    .annotate(start=Trunc("date", period))
+                    .values(dimension, "start")
+                    .annotate(hours=Sum("hours_allocated"), allocations=Count("pk"))
+                    .order_by()
+                )
+
+                batch = []
+                for row in rows.iterator(chunk_size=batch_size):
+                    batch.append(
+                        LaborUtilizationRollup(
+                            dimension=dimension,
+                            key=row[dimension],
+                            period=period,
+                            period_start=row["start"],
+                            hours=row["hours"],
+                            allocations=row["allocations"],
+                        )
+                    )
+                    if len(batch) >= batch_size:
+                        LaborUtilizationRollup.objects.bulk_create(batch)
+                        written += len(batch)
+                        batch = []
+
+                LaborUtilizationRollup.objects.bulk_create(batch)
+                written += len(batch)
+
+    return written
+
+
+def labor_utilization(group_by, period, start=None, end=None, key=None):
+    """
+    Hours and allocation counts per group and period bucket, read from the
+    rollup table. Departments are summed over their employees' rows.
+    """
+    from .models import (
+        LaborUtilizationRollup,
+        ProductionLine,
+        Department,
+        Project,
+        Task,
+        User,
+    )
+
+    if group_by == "department":
+        rows = LaborUtilizationRollup.objects.filter(
+            dimension=LaborUtilizationRollup.Dimension.EMPLOYEE, period=period
+        ).annotate(
+            group=Subquery(
+                User.objects.filter(pk=OuterRef("key")).values("department")[:1]
+            )
+        )
+    else:
+        rows = LaborUtilizationRollup.objects.filter(
+            dimension=group_by, period=period
+        ).annotate(group=F("key"))
+
+    if start is not None:
+        rows = rows.filter(period_start__gte=period_start(start, period))
+    if end is not None:
+        rows = rows.filter(period_start__lte=end)
+    if key is not None:
+        rows = rows.filter(group=key)
+
+    rows = list(
+        rows.values("group", "period_start")
+        .annotate(hours=Sum("hours"), allocations=Sum("allocations"))
+        .order_by("period_start", "group")
+    )
+
+    model = {
+        "employee": User,
+        "project": Project,
+        "task": Task,
+        "production_line": ProductionLine,
+        "department": Department,
+    }[group_by]
+    names = dict(
+        model.objects.filter(pk__in={row["group"] for row in rows}).values_list(
+            "pk", "name"
+        )
+    )
+
+    return [
+        {
+            "key": row["group"],
+            "name": names.get(row["group"]),
+            "period_start": row["period_start"],
+            "hours": row["hours"],
+            "allocations": row["allocations"],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,184 @@
+from django.db.models.functions import Cast
+from django.db.models import CharField
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from .oee import epoch_seconds
+import math
+
+# TODO: Maintenance planning and risk scoring
+
+DEFAULT_INTERVAL_DAYS = 90
+HISTORY_DAYS = 365  # !Status history older than this is never replayed
+MAX_FILTERED_IDS = 500  # !Past this, scanning the log beats a huge IN list
+
+# !Hazard per unit, the score is 1 - exp(-hazard) as a percentage
+RISK_WEIGHTS = {
+    "wear": 2.0,  # !Run time since maintenance over the maintenance interval
+    "breakdowns": 0.5,  # !Each breakdown since maintenance
+    "overdue": 1.0,  # !Days past due over the maintenance interval
+}
+
+
+def _scored_from(machine, now):
+    "Start of the scoring period, the last maintenance but at most HISTORY_DAYS ago"
+    floor = now - timedelta(days=HISTORY_DAYS)
+    if machine.last_maintenance_date is None:
+        return floor
+    return max(
+        floor,
+        timezone.make_aware(datetime.combine(machine.last_maintenance_date, time.min)),
+    )
+
+
+def _interval_days(machine):
+    if machine.last_maintenance_date and machine.next_maintenance_date:
+        days = (machine.next_maintenance_date - machine.last_maintenance_date).days
+        if days > 0:
+            return days
+    return DEFAULT_INTERVAL_DAYS
+
+
+def risk_scores(machines, now=None):
+    """
+    Score machines from their status history since the last maintenance in
+    one pass over the transition log: run hours, breakdowns and how far past
+    due they are. Returns {machine pk: {...}}, a BROKEN machine scores 100.
+    """
+    from .models import Machine, StateTransition
+
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    if not machines:
+        return {}
+
+    starts = {machine.pk: _scored_from(machine, now) for machine in machines}
+    transitions = StateTransition.objects.filter(
+        entity_type="machine",
+        field="status",
+        occurred_at__gte=min(starts.values()),
+        occurred_at__lt=now,
+    )
+    starts = {pk: start.timestamp() for pk, start in starts.items()}
+    if len(starts) <= MAX_FILTERED_IDS:
+        transitions = transitions.filter(entity_id__in=starts)
+
+    running = Machine.Status.OPERATIONAL
+    run = dict.fromkeys(starts, 0.0)
+    breakdowns = dict.fromkeys(starts, 0)
+    state = {}  # !pk -> (status, since when) of the open interval
+
+    for pk, at, old, new in (
+        transitions.annotate(at=Cast("occurred_at", CharField()))
+        .order_by("occurred_at")
+        .values_list("entity_id", "at", "old_value", "new_value")
+        .iterator(chunk_size=5000)
+    ):
+        at = epoch_seconds(at)
+        if pk not in starts or at < starts[pk]:
+            continue
+        status, since = state.get(pk) or (old, starts[pk])
+        if status == running:
+            run[pk] += at - since
+        if new == Machine.Status.BROKEN:
+            breakdowns[pk] += 1
+        state[pk] = (new, at)
+
+    scores = {}
+    for machine in machines:
+        status, since = state.get(machine.pk) or (machine.status, starts[machine.pk])
+        if status == running:
+            run[machine.pk] += now.timestamp() - since
+
+        interval = _interval_days(machine)
+        overdue = (
+            max((today - machine.next_maintenance_date).days, 0)
+            if machine.next_maintenance_date
+            else 0
+        )
+        hazard = (
+            RISK_WEIGHTS["wear"] * run[machine.pk] / (interval * 86400)
+            + RISK_WEIGHTS["breakdowns"] * breakdowns[machine.pk]
+            + RISK_WEIGHTS["overdue"] * overdue / interval
+        )
+        scores[machine.pk] = {
+            "run_hours_since_maintenance": round(run[machine.pk] / 3600, 1),
+            "breakdowns_since_maintenance": breakdowns[machine.pk],
+            "risk_score": (
+                100.0
+                if machine.status == Machine.Status.BROKEN
+                else round(100 * (1 - math.exp(-hazard)), 1)
+            ),
+        }
+    return scores
+
+
+def maintenance_plan(within=7, workshop=None, min_risk=None):
+    """
+    Machines due or overdue for maintenance within the next days, grouped by
+    workshop. With min_risk the whole fleet is scored and machines at or
+    above it are included even when they are not due yet.
+    """
+    from .models import Machine
+
+    today = timezone.localdate()
+    horizon = today + timedelta(days=within)
+    # !Machines already under maintenance are being handled
+    pending = [s for s in Machine.Status.values if s != Machine.Status.MAINTENANCE]
+
+    machines = Machine.objects.select_related("workshop")
+    if workshop is not None:
+        machines = machines.filter(workshop=workshop)
+    if min_risk is None:
+        # !Range + IN on the (next_maintenance_date, status) index
+        machines = machines.filter(
+            next_maintenance_date__lte=horizon, status__in=pending
+        )
+    machines = list(machines)
+    scores = risk_scores(machines)
+
+    workshops = {}
+    for machine in machines:
+        due = (
+            machine.next_maintenance_date is not None
+            and machine.next_maintenance_date <= horizon
+            and machine.status in pending
+        )
+        if not due and scores[machine.pk]["risk_score"] < min_risk:
+            continue
+
+        group = workshops.setdefault(
+            machine.workshop_id,
+            {
+                "id": machine.workshop_id,
+                "name": machine.workshop.name,
+                "overdue": 0,
+                "due": 0,
+                "machines": [],
+            },
+        )
+        days_until_due = (
+            (machine.next_maintenance_date - today).days
+            if machine.next_maintenance_date
+            else None
+        )
+        if due:
+            group["overdue" if days_until_due < 0 else "due"] += 1
+        group["machines"].append(
+            {
+                "id": machine.pk,
+                "name": machine.name,
+                "status": machine.status,
+                "last_maintenance_date": machine.last_maintenance_date,
+                "next_maintenance_date": machine.next_maintenance_date,
+                "days_until_due": days_until_due,
+                **scores[machine.pk],
+            }
+        )
+
+    for group in workshops.values():
+        group["machines"].sort(key=lambda row: -row["risk_score"])
+    return {
+        "as_of": today,
+        "horizon": horizon,
+        "workshops": sorted(workshops.values(), key=lambda group: group["name"]),
+    }
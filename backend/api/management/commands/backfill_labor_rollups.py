@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.labor_rollup import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the labor utilization rollup table from all labor allocations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rollup rows written per bulk insert",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows"))
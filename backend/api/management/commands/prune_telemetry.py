@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from api.telemetry import prune_telemetry
+
+
+class Command(BaseCommand):
+    help = "Delete telemetry samples and rollups older than TELEMETRY_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = prune_telemetry()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted['raw']} samples, {deleted['1m']} minute and "
+                f"{deleted['1h']} hour rollups"
+            )
+        )
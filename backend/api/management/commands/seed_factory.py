@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.seeding import BASE_COUNTS, PlantSeeder
+import time
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic plant (departments, machines, users, orders, projects, labor) for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help=f"Multiplier of the base row counts, 1 is about 140k rows ({', '.join(f'{table}={count}' for table, count in BASE_COUNTS.items())})",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Source rows generated per chunk and inserted per bulk insert",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes generating rows, 0 for every core",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Faker seed, same seed same data"
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password of every generated user",
+        )
+
+    def handle(self, *args, **options):
+        if options["scale"] <= 0:
+            raise CommandError("--scale must be positive")
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive")
+        if options["workers"] < 0:
+            raise CommandError("--workers can't be negative")
+
+        seeder = PlantSeeder(
+            scale=options["scale"],
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            seed=options["seed"],
+            password=options["password"],
+        )
+        started = time.monotonic()
+        written = seeder.run(log=self.stdout.write)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {sum(written.values())} rows in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 06:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_order_order_date_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='name')),
+                ('owner', models.CharField(blank=True, max_length=255, verbose_name='owner')),
+                ('expires_at', models.DateTimeField(verbose_name='expires at')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='machine',
+            index=models.Index(fields=['operator_auto_remove_at'], name='api_machine_operato_4f381d_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 06:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_schedulerlease_machine_operator_expiry_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productionschedule',
+            name='start_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='start time'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_alter_productionschedule_start_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='is_low_stock',
+            field=models.GeneratedField(db_persist=True, expression=models.Q(('quantity__lte', models.F('reorder_level'))), output_field=models.BooleanField(), verbose_name='low stock'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_low_stock', True)), fields=['name'], name='material_low_stock_idx'),
+        ),
+    ]
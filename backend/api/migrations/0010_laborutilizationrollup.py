@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_material_is_low_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaborUtilizationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('employee', 'Employee'), ('project', 'Project'), ('task', 'Task'), ('production_line', 'Production Line')], max_length=20, verbose_name='dimension')),
+                ('key', models.PositiveBigIntegerField(verbose_name='key')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=10, verbose_name='period')),
+                ('period_start', models.DateField(verbose_name='period start')),
+                ('hours', models.DecimalField(decimal_places=2, default=0.0, max_digits=14, verbose_name='hours')),
+                ('allocations', models.PositiveIntegerField(default=0, verbose_name='allocations')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dimension', 'period', 'period_start'], name='api_laborut_dimensi_ffc55e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'period', 'key', 'period_start'), name='unique_labor_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-17 06:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_laborutilizationrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StateTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(max_length=50, verbose_name='entity type')),
+                ('entity_id', models.PositiveBigIntegerField(verbose_name='entity id')),
+                ('field', models.CharField(max_length=50, verbose_name='field')),
+                ('old_value', models.CharField(max_length=255, null=True, verbose_name='old value')),
+                ('new_value', models.CharField(max_length=255, null=True, verbose_name='new value')),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='occurred at')),
+            ],
+            options={
+                'ordering': ['occurred_at'],
+                'indexes': [models.Index(fields=['entity_type', 'entity_id', 'occurred_at'], name='api_statetr_entity__1006ab_idx'), models.Index(fields=['entity_type', 'occurred_at'], name='api_statetr_entity__1be0b4_idx')],
+            },
+        ),
+    ]
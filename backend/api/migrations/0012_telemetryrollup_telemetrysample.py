@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-17 06:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_statetransition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 minute'), ('1h', '1 hour')], max_length=2, verbose_name='resolution')),
+                ('bucket_start', models.DateTimeField(verbose_name='bucket start')),
+                ('samples', models.PositiveIntegerField(default=0, verbose_name='samples')),
+                ('load_samples', models.PositiveIntegerField(default=0, verbose_name='load samples')),
+                ('load_sum', models.FloatField(default=0, verbose_name='load sum')),
+                ('load_max', models.FloatField(null=True, verbose_name='load max')),
+                ('cycle_count_min', models.PositiveBigIntegerField(null=True, verbose_name='cycle count min')),
+                ('cycle_count_max', models.PositiveBigIntegerField(null=True, verbose_name='cycle count max')),
+                ('last_state', models.CharField(choices=[('OPERATIONAL', 'Operational'), ('IDLE', 'Idle'), ('MAINTENANCE', 'Under Maintenance'), ('BROKEN', 'Broken Down')], max_length=20, null=True, verbose_name='last state')),
+                ('last_recorded_at', models.DateTimeField(null=True, verbose_name='last recorded at')),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_rollups', to='api.machine')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'indexes': [models.Index(fields=['resolution', 'bucket_start'], name='api_telemet_resolut_533a56_idx')],
+                'constraints': [models.UniqueConstraint(fields=('machine', 'resolution', 'bucket_start'), name='unique_telemetry_rollup_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetrySample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='day')),
+                ('recorded_at', models.DateTimeField(verbose_name='recorded at')),
+                ('cycle_count', models.PositiveBigIntegerField(null=True, verbose_name='cycle count')),
+                ('spindle_load', models.FloatField(null=True, verbose_name='spindle load')),
+                ('state', models.CharField(choices=[('OPERATIONAL', 'Operational'), ('IDLE', 'Idle'), ('MAINTENANCE', 'Under Maintenance'), ('BROKEN', 'Broken Down')], max_length=20, null=True, verbose_name='state')),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_samples', to='api.machine')),
+            ],
+            options={
+                'ordering': ['recorded_at'],
+                'indexes': [models.Index(fields=['machine', 'recorded_at'], name='api_telemet_machine_b001cf_idx'), models.Index(fields=['day'], name='api_telemet_day_53343f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 06:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_telemetryrollup_telemetrysample'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='machine',
+            index=models.Index(fields=['next_maintenance_date', 'status'], name='api_machine_next_ma_f5b453_idx'),
+        ),
+    ]
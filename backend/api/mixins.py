@@ -0,0 +1,124 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+# TODO: Eager loading for generic views
+
+_eager_loading_cache = {}
+
+
+def _walk_relation(model, path, prefix="", prefetch=False, follow_str=True):
+    """
+    Walk a dotted serializer source (e.g. "workshop.department") over the model
+    and return (select_related, prefetch_related) lookups for every relation hop.
+    Forward FK / O2O hops are joined, reverse and M2M hops are prefetched.
+    """
+    select, prefetch_lookups = set(), set()
+
+    for part in path:
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            break  # !Property or method, nothing more to resolve
+        if not field.is_relation or field.related_model is None:
+            break
+
+        prefix = f"{prefix}__{part}" if prefix else part
+        prefetch = prefetch or field.many_to_many or field.one_to_many
+        (prefetch_lookups if prefetch else select).add(prefix)
+        model = field.related_model
+
+        # !Join what the related model's __str__ reads, str_related_fields spell out
+        # !whole lookups (e.g. "workshop__department") so they are not followed again
+        if not follow_str:
+            continue
+        for dependency in getattr(model, "str_related_fields", ()):
+            sub_select, sub_prefetch = _walk_relation(
+                model, dependency.split("__"), prefix, prefetch, follow_str=False
+            )
+            select |= sub_select
+            prefetch_lookups |= sub_prefetch
+
+    return select, prefetch_lookups
+
+
+def _serializer_lookups(serializer, model):
+    "Collect the lookups needed to render every readable field of a serializer"
+    select, prefetch = set(), set()
+    meta = getattr(serializer, "Meta", None)
+
+    # !Explicit hints for SerializerMethodFields that reach into relations
+    for lookup in getattr(meta, "select_related_fields", ()):
+        select.add(lookup)
+    for lookup in getattr(meta, "prefetch_related_fields", ()):
+        prefetch.add(lookup)
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        path = field.source.split(".")
+        if isinstance(field, ManyRelatedField):
+            pk_only = field.child_relation.use_pk_only_optimization()
+            sub_select, sub_prefetch = _walk_relation(
+                model, path, prefetch=True, follow_str=not pk_only
+            )
+        elif isinstance(field, serializers.ListSerializer):
+            sub_select, sub_prefetch = _walk_relation(model, path, prefetch=True)
+        elif isinstance(field, RelatedField) and field.use_pk_only_optimization():
+            # !PrimaryKeyRelatedField only needs the local "<name>_id" column
+            if len(path) == 1:
+                continue
+            sub_select, sub_prefetch = _walk_relation(model, path[:-1])
+        elif isinstance(field, (RelatedField, serializers.BaseSerializer)):
+            sub_select, sub_prefetch = _walk_relation(model, path)
+        elif len(path) > 1:
+            sub_select, sub_prefetch = _walk_relation(model, path[:-1])
+        else:
+            continue
+
+        select |= sub_select
+        prefetch |= sub_prefetch
+
+        # !Nested serializers bring their own relations
+        child = getattr(field, "child", field)
+        if isinstance(child, serializers.ModelSerializer):
+            nested_select, nested_prefetch = _serializer_lookups(
+                child, child.Meta.model
+            )
+            many = bool(sub_prefetch)
+            base = "__".join(path)
+            for lookup in nested_select:
+                (prefetch if many else select).add(f"{base}__{lookup}")
+            for lookup in nested_prefetch:
+                prefetch.add(f"{base}__{lookup}")
+
+    # !A lookup cannot be both joined and prefetched
+    select -= prefetch
+    return select, prefetch
+
+
+def get_eager_loading_lookups(serializer_class):
+    "Return the cached (select_related, prefetch_related) lookups for a serializer"
+    if serializer_class not in _eager_loading_cache:
+        model = serializer_class.Meta.model
+        select, prefetch = _serializer_lookups(serializer_class(), model)
+        _eager_loading_cache[serializer_class] = (sorted(select), sorted(prefetch))
+    return _eager_loading_cache[serializer_class]
+
+
+class EagerLoadingMixin:
+    """
+    Generic view mixin that joins / prefetches every relation the serializer
+    renders, so list endpoints run a constant number of queries.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = get_eager_loading_lookups(self.get_serializer_class())
+
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
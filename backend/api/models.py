@@ -6,21 +6,117 @@ from main.models import phone_validator
 from django.utils.timezone import now
 from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Sum
-from django.db import connection
+from django.db.models import Sum, F
 from datetime import timedelta
-import threading
 import logging
-import time
+import copy
 
 User = get_user_model()
-_operator_checker_thread = None
 logger = logging.getLogger(__name__)
 
+# TODO: Create model mixins
+
+
+class FieldTrackerMixin:
+    """
+    Snapshot field values when an instance is loaded, so save() can see what
+    changed without reading the old row back from the database.
+    """
+
+    def _snapshot(self, attnames=None):
+        if attnames is None or not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (
+                attnames is None or field.attname in attnames
+            ):
+                value = self.__dict__[field.attname]
+                if isinstance(value, (dict, list)):
+                    value = copy.deepcopy(value)  # !JSON fields mutate in place
+                self._loaded_values[field.attname] = value
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self._snapshot()
+        else:
+            self._snapshot({self._meta.get_field(name).attname for name in fields})
+
+    def _loaded(self, attname):
+        "Stored value of a field, read from the database only if never loaded"
+        if self._state.adding or self.pk is None:
+            return None
+
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        if attname not in loaded:
+            missing = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if field.attname not in loaded
+            ]
+            row = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+            loaded.update(row or dict.fromkeys(missing))
+        return loaded[attname]
+
+    def previous(self, field):
+        "Value of a field as it was last loaded from / saved to the database"
+        return self._loaded(self._meta.get_field(field).attname)
+
+    @property
+    def changed_fields(self):
+        "Names of the fields that differ from the stored row"
+        return {
+            field.name
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and self.__dict__[field.attname] != self._loaded(field.attname)
+        }
+
+    def has_changed(self, field):
+        return self._meta.get_field(field).name in self.changed_fields
+
+    def _pending_transitions(self, update_fields):
+        "(field, old value, new value) of the transition_fields this save writes"
+        adding = self._state.adding
+        transitions = []
+        for name in getattr(self, "transition_fields", ()):
+            attname = self._meta.get_field(name).attname
+            if update_fields is not None and not {name, attname} & set(update_fields):
+                continue
+            old = None if adding else self._loaded(attname)
+            transitions.append((name, old, getattr(self, attname)))
+        return transitions
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        transitions = self._pending_transitions(update_fields)
+
+        super().save(*args, **kwargs)
+        if update_fields is None:
+            self._snapshot()
+        else:
+            self._snapshot(
+                {self._meta.get_field(name).attname for name in update_fields}
+            )
+
+        if transitions:
+            from .event_log import record_transitions
+
+            record_transitions(
+                type(self), [(self.pk, *transition) for transition in transitions]
+            )
+
+
 # TODO: Create core models
 
 
-class Department(models.Model):
+class Department(FieldTrackerMixin, models.Model):
     """
     Department Model
 
@@ -48,14 +144,7 @@ class Department(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        old_supervisor_id = None
-
-        if self.pk:
-            old_supervisor_id = (
-                Department.objects.filter(pk=self.pk)
-                .values_list("supervisor_id", flat=True)
-                .first()
-            )
+        old_supervisor_id = self.previous("supervisor")
 
         super().save(*args, **kwargs)
 
@@ -63,24 +152,13 @@ class Department(models.Model):
         if self.supervisor_id == old_supervisor_id:
             return
 
-        # !Update old supervisor
-        if old_supervisor_id:
-            other_depts = Department.objects.filter(
-                supervisor_id=old_supervisor_id
-            ).exclude(pk=self.pk)
-            if not other_depts.exists():
-                User.objects.filter(pk=old_supervisor_id).update(
-                    role=User.Role.OPERATOR, department=None
-                )
+        # !Re-derive role and department of the old and new supervisor
+        from .roles import reconcile_roles
 
-        # !Update new supervisor
-        if self.supervisor:
-            self.supervisor.role = User.Role.SUPERVISOR
-            self.supervisor.department = self
-            self.supervisor.save(update_fields=["role", "department"])
+        reconcile_roles({old_supervisor_id, self.supervisor_id})
 
 
-class Workshop(models.Model):
+class Workshop(FieldTrackerMixin, models.Model):
     """
     Workshop Model
 
@@ -114,6 +192,9 @@ class Workshop(models.Model):
     )
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
+    # !Relations read by __str__, joined by EagerLoadingMixin
+    str_related_fields = ["department"]
+
     class Meta:
         ordering = ["name"]
 
@@ -121,39 +202,22 @@ class Workshop(models.Model):
         return f"{self.name} ({self.department})"
 
     def save(self, *args, **kwargs):
-        old_manager_id = None
-
-        if self.pk:
-            old_manager_id = (
-                Workshop.objects.filter(pk=self.pk)
-                .values_list("manager_id", flat=True)
-                .first()
-            )
+        old_manager_id = self.previous("manager")
+        department_changed = self.has_changed("department")
 
         super().save(*args, **kwargs)
 
-        # If manager hasn't changed, exit early
-        if self.manager_id == old_manager_id:
+        # If manager and department haven't changed, exit early
+        if self.manager_id == old_manager_id and not department_changed:
             return
 
-        # Handle old manager: set to OPERATOR if no other workshops are managed
-        if old_manager_id:
-            other_workshops = Workshop.objects.filter(
-                manager_id=old_manager_id
-            ).exclude(pk=self.pk)
-            if not other_workshops.exists():
-                User.objects.filter(pk=old_manager_id).update(
-                    role=User.Role.OPERATOR, department=None
-                )
+        # Re-derive role and department of the old and new manager
+        from .roles import reconcile_roles
 
-        # Update new manager’s role and department
-        if self.manager:
-            self.manager.role = User.Role.MANAGER
-            self.manager.department = self.department
-            self.manager.save(update_fields=["role", "department"])
+        reconcile_roles({old_manager_id, self.manager_id})
 
 
-class Machine(models.Model):
+class Machine(FieldTrackerMixin, models.Model):
     """
     Machine Model
 
@@ -181,18 +245,23 @@ class Machine(models.Model):
     operator_assigned_at = models.DateTimeField(null=True, blank=True)
     operator_auto_remove_at = models.DateTimeField(null=True, blank=True)
 
+    str_related_fields = ["workshop"]
+    transition_fields = ["status", "operator"]
+
     class Meta:
         ordering = ["workshop", "name"]
+        indexes = [
+            models.Index(fields=["operator_auto_remove_at"]),
+            models.Index(fields=["next_maintenance_date", "status"]),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.workshop.name})"
 
     def assign_operator(self, operator):
-        # TODO: Assign operator to machine for 12 hours
-        now = timezone.now()
+        # TODO: Assign operator to machine for 8 hours
         self.operator = operator
-        self.operator_assigned_at = now
-        self.operator_auto_remove_at = now + timedelta(hours=8)
+        self._stamp_operator_assignment()
         self.save(
             update_fields=[
                 "operator",
@@ -201,12 +270,10 @@ class Machine(models.Model):
             ]
         )
 
-        # !Make sure to clear the cache for this machine
-        start_operator_checker_thread()
-
-        logger.info(
-            f"Operator {operator} assigned to machine {self.id} until {self.operator_auto_remove_at}"
-        )
+    def _stamp_operator_assignment(self):
+        now = timezone.now()
+        self.operator_assigned_at = now
+        self.operator_auto_remove_at = now + timedelta(hours=8)
 
     def clear_operator(self):
         # TODO: Clear the operator assignment
@@ -225,69 +292,160 @@ class Machine(models.Model):
         logger.info(f"Cleared operator from machine {self.id}")
 
     def save(self, *args, **kwargs):
-        operator_changed = False  # !Track if operator assignment has changed
-        if self.pk:
-            try:
-                old_instance = Machine.objects.get(pk=self.pk)
-                operator_changed = (
-                    self.operator_id != old_instance.operator_id
-                    and self.operator is not None
-                )
-            except Machine.DoesNotExist:
-                pass
+        changed = self.changed_fields  # !Track if operator assignment has changed
+
+        # !A new operator starts a new assignment window in the same save
+        if (
+            "operator" in changed
+            and self.operator_id is not None
+            and "operator_assigned_at" not in changed
+        ):
+            self._stamp_operator_assignment()
+            changed |= {"operator_assigned_at", "operator_auto_remove_at"}
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = set(kwargs["update_fields"]) | {
+                    "operator_assigned_at",
+                    "operator_auto_remove_at",
+                }
 
         super().save(*args, **kwargs)
 
-        if operator_changed:
-            self.assign_operator(self.operator)
+        if "operator_auto_remove_at" in changed and self.operator_auto_remove_at:
+            # !Let the expiry scheduler know about the new deadline
+            from .operator_expiry import schedule_operator_expiry
 
+            schedule_operator_expiry(self.pk, self.operator_auto_remove_at)
+            logger.info(
+                f"Operator {self.operator_id} assigned to machine {self.id} until {self.operator_auto_remove_at}"
+            )
 
-class OperatorCheckerThread(threading.Thread):
-    "Background thread to check and clear expired operator assignments"
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.daemon = True
-        self.running = True
-        self.name = "OperatorCheckerThread"
+class SchedulerLease(models.Model):
+    """
+    Scheduler Lease Model
 
-    def run(self):
-        logger.info("Starting operator checker thread")
-        while self.running:
-            try:
-                self._check_expired_operators()
-            except Exception as e:
-                logger.error(f"Error checking expired operators: {e}")
+    - Single row per background job, the owner holding an unexpired lease is the
+      only worker allowed to run that job ☑️
+    """
 
-            # Sleep for 5 minutes before checking again
-            time.sleep(300)  # 5 minutes
+    name = models.CharField(_("name"), max_length=100, unique=True)
+    owner = models.CharField(_("owner"), max_length=255, blank=True)
+    expires_at = models.DateTimeField(_("expires at"))
 
-    def _check_expired_operators(self):
-        # TODO: Close any stale connections before accessing the database
-        connection.close()
-        now = timezone.now()
-        expired_machines = Machine.objects.filter(
-            operator__isnull=False,
-            operator_auto_remove_at__isnull=False,
-            operator_auto_remove_at__lte=now,
-        )
+    def __str__(self):
+        return f"{self.name} -> {self.owner} until {self.expires_at}"
+
+
+class StateTransition(models.Model):
+    """
+    State Transition Model - append-only history of tracked field changes
+
+    - One row per change of a model's transition_fields, e.g. Machine.status ☑️
+    - Written in batches by the transition buffer, never updated ☑️
+    - Indexed for time ranges per entity and per entity type ☑️
+    """
+
+    entity_type = models.CharField(_("entity type"), max_length=50)
+    entity_id = models.PositiveBigIntegerField(_("entity id"))
+    field = models.CharField(_("field"), max_length=50)
+    old_value = models.CharField(_("old value"), max_length=255, null=True)
+    new_value = models.CharField(_("new value"), max_length=255, null=True)
+    occurred_at = models.DateTimeField(_("occurred at"), default=now)
+
+    class Meta:
+        ordering = ["occurred_at"]
+        indexes = [
+            models.Index(fields=["entity_type", "entity_id", "occurred_at"]),
+            models.Index(fields=["entity_type", "occurred_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type} {self.entity_id} {self.field}: {self.old_value} -> {self.new_value}"
+
+
+class TelemetrySample(models.Model):
+    """
+    Telemetry Sample Model - raw machine readings bucketed by day
+
+    - Many-to-One with Machine (a machine reports many samples) ☑️
+    - day is the storage bucket, retention drops whole days ☑️
+    - Folded into 1 minute / 1 hour TelemetryRollup rows on ingest ☑️
+    """
+
+    machine = models.ForeignKey(
+        Machine, on_delete=models.CASCADE, related_name="telemetry_samples"
+    )
+    day = models.DateField(_("day"))
+    recorded_at = models.DateTimeField(_("recorded at"))
+    cycle_count = models.PositiveBigIntegerField(_("cycle count"), null=True)
+    spindle_load = models.FloatField(_("spindle load"), null=True)
+    state = models.CharField(
+        _("state"), max_length=20, choices=Machine.Status.choices, null=True
+    )
+
+    class Meta:
+        ordering = ["recorded_at"]
+        indexes = [
+            models.Index(fields=["machine", "recorded_at"]),
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.machine_id} @ {self.recorded_at}"
+
+
+class TelemetryRollup(models.Model):
+    """
+    Telemetry Rollup Model - downsampled telemetry per machine and bucket
+
+    - One row per (machine, resolution, bucket start) ☑️
+    - Keeps sums, extremes and the latest state so batches merge in any order ☑️
+    """
+
+    class Resolution(models.TextChoices):
+        MINUTE = "1m", _("1 minute")
+        HOUR = "1h", _("1 hour")
 
-        count = expired_machines.count()
-        if count > 0:
-            logger.info(f"Found {count} machines with expired operator assignments")
+    machine = models.ForeignKey(
+        Machine, on_delete=models.CASCADE, related_name="telemetry_rollups"
+    )
+    resolution = models.CharField(
+        _("resolution"), max_length=2, choices=Resolution.choices
+    )
+    bucket_start = models.DateTimeField(_("bucket start"))
+    samples = models.PositiveIntegerField(_("samples"), default=0)
+    load_samples = models.PositiveIntegerField(_("load samples"), default=0)
+    load_sum = models.FloatField(_("load sum"), default=0)
+    load_max = models.FloatField(_("load max"), null=True)
+    cycle_count_min = models.PositiveBigIntegerField(_("cycle count min"), null=True)
+    cycle_count_max = models.PositiveBigIntegerField(_("cycle count max"), null=True)
+    last_state = models.CharField(
+        _("last state"), max_length=20, choices=Machine.Status.choices, null=True
+    )
+    last_recorded_at = models.DateTimeField(_("last recorded at"), null=True)
 
-        for machine in expired_machines:
-            logger.info(f"Clearing expired operator from machine {machine.id}")
+    class Meta:
+        ordering = ["bucket_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["machine", "resolution", "bucket_start"],
+                name="unique_telemetry_rollup_bucket",
+            )
+        ]
+        indexes = [models.Index(fields=["resolution", "bucket_start"])]
 
+    def __str__(self):
+        return f"{self.machine_id} {self.resolution} @ {self.bucket_start}"
 
-def start_operator_checker_thread():
-    # TODO:  Start the operator checker thread if it's not already running"""
-    global _operator_checker_thread
+    @property
+    def load_avg(self):
+        return self.load_sum / self.load_samples if self.load_samples else None
 
-    if _operator_checker_thread is None or not _operator_checker_thread.is_alive():
-        _operator_checker_thread = OperatorCheckerThread()
-        _operator_checker_thread.start()
-        logger.info("Started operator checker thread")
+    @property
+    def cycles(self):
+        if self.cycle_count_min is None:
+            return None
+        return self.cycle_count_max - self.cycle_count_min
 
 
 # TODO: Create Inventory | Material tables
@@ -311,10 +469,24 @@ class Material(models.Model):
     reorder_level = models.DecimalField(
         _("reorder level"), max_digits=10, decimal_places=2, default=0.00
     )
+    # !Kept up to date by the database, including F() stock postings
+    is_low_stock = models.GeneratedField(
+        expression=models.Q(quantity__lte=F("reorder_level")),
+        output_field=models.BooleanField(),
+        db_persist=True,
+        verbose_name=_("low stock"),
+    )
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(
+                fields=["name"],
+                condition=models.Q(is_low_stock=True),
+                name="material_low_stock_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} -> {self.quantity} {self.unit_of_measurement}"
@@ -345,7 +517,7 @@ class Supplier(models.Model):
         return self.name
 
 
-class Order(models.Model):
+class Order(FieldTrackerMixin, models.Model):
     """
     Order Model
 
@@ -377,45 +549,102 @@ class Order(models.Model):
         _("total"), max_digits=10, decimal_places=2, default=0.00
     )
 
+    str_related_fields = ["supplier"]
+    transition_fields = ["status"]
+
     class Meta:
         ordering = ["order_date"]
         indexes = [
             models.Index(
                 fields=["supplier", "status"]
             ),  # Composite index for common queries
+            models.Index(fields=["order_date", "id"]),  # Keyset pagination
         ]
 
     def __str__(self):
         return f"Order #{self.id} from {self.supplier.name}"
 
     def save(self, *args, **kwargs):
-        is_receiving = False
-
-        if self.pk:
-            old_order = Order.objects.get(pk=self.pk)
-            if (
-                old_order.status != self.OrderStatus.RECEIVED
-                and self.status == self.OrderStatus.RECEIVED
-            ):
-                is_receiving = True
+        is_receiving = (
+            not self._state.adding
+            and self.previous("status") != self.OrderStatus.RECEIVED
+            and self.status == self.OrderStatus.RECEIVED
+        )
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-        if is_receiving:
-            self._update_material_stocks()
+            if is_receiving:
+                self._update_material_stocks()
 
-    @transaction.atomic
     def _update_material_stocks(self):
         """
         Update material quantities when order is marked as received.
         """
-        for order_material in self.order_materials.all():
-            material = order_material.material
-            material.quantity += order_material.quantity
-            material.save(update_fields=["quantity"])
+        Order.post_material_stocks([self.pk])
+
+    @staticmethod
+    def post_material_stocks(order_ids):
+        """
+        Add the received quantities of the given orders to stock, one aggregated
+        F() UPDATE per material instead of a read-modify-write per line.
+        """
+        deltas = (
+            OrderMaterial.objects.filter(order_id__in=order_ids)
+            .values("material_id")
+            .annotate(received=Sum("quantity"))
+            .order_by("material_id")  # !Stable lock order across transactions
+        )
+        updated_at = timezone.now()
+
+        for row in deltas:
+            Material.objects.filter(pk=row["material_id"]).update(
+                quantity=F("quantity") + row["received"], updated_at=updated_at
+            )
+
+        from .response_cache import bump_model_version
 
+        bump_model_version(Material)  # !update() sends no signals
 
-class OrderMaterial(models.Model):
+    @classmethod
+    @transaction.atomic
+    def receive_orders(cls, order_ids):
+        """
+        Mark orders RECEIVED and post their stock in a single transaction.
+        Returns the ids that were received, already received or cancelled
+        orders and unknown ids are left untouched.
+        """
+        previous = dict(
+            cls.objects.select_for_update()
+            .filter(pk__in=order_ids)
+            .exclude(status__in=[cls.OrderStatus.RECEIVED, cls.OrderStatus.CANCELLED])
+            .order_by("pk")
+            .values_list("pk", "status")
+        )
+        pending = list(previous)
+        if not pending:
+            return []
+
+        cls.objects.filter(pk__in=pending).update(
+            status=cls.OrderStatus.RECEIVED, updated_at=timezone.now()
+        )
+        cls.post_material_stocks(pending)
+
+        from .response_cache import bump_model_version
+        from .event_log import record_transitions
+
+        bump_model_version(cls)
+        record_transitions(
+            cls,
+            [
+                (pk, "status", status, cls.OrderStatus.RECEIVED)
+                for pk, status in previous.items()
+            ],
+        )
+        return pending
+
+
+class OrderMaterial(FieldTrackerMixin, models.Model):
     """
     Order Material Model
 
@@ -435,6 +664,8 @@ class OrderMaterial(models.Model):
         _("total price"), max_digits=10, decimal_places=2, default=0.00
     )
 
+    str_related_fields = ["material"]
+
     class Meta:
         ordering = ["order"]
         unique_together = ["order", "material"]
@@ -446,20 +677,38 @@ class OrderMaterial(models.Model):
     def __str__(self):
         return f"{self.material.name} - {self.unit_price} - {self.quantity} -> {self.total_price}"
 
+    @transaction.atomic
     def save(self, *args, **kwargs):
         self.total_price = self.unit_price * self.quantity
+        is_new = self._state.adding
+        old_order_id = self.previous("order")
+        old_total_price = self.previous("total_price")
         super().save(*args, **kwargs)  # Save before updating totals
-        self.update_order_total()
-
-    def update_order_total(self):
-        "Recalculate the order total based on all materials."
-        total = (
-            OrderMaterial.objects.filter(order=self.order).aggregate(
-                total=Sum("total_price")
-            )["total"]
-            or 0.00
-        )
-        Order.objects.filter(pk=self.order.pk).update(total=total)
+
+        if is_new:
+            self._apply_order_total_delta(self.order_id, self.total_price)
+        elif old_order_id != self.order_id:
+            self._apply_order_total_delta(old_order_id, -old_total_price)
+            self._apply_order_total_delta(self.order_id, self.total_price)
+        else:
+            self._apply_order_total_delta(
+                self.order_id, self.total_price - old_total_price
+            )
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        order_id, total_price = self.order_id, self.total_price
+        result = super().delete(*args, **kwargs)
+        self._apply_order_total_delta(order_id, -total_price)
+        return result
+
+    @staticmethod
+    def _apply_order_total_delta(order_id, delta):
+        "Shift the order total by the change of one line instead of re-summing"
+        if delta:
+            Order.objects.filter(pk=order_id).update(
+                total=F("total") + delta, updated_at=timezone.now()
+            )
 
 
 # TODO: Create production line tables
@@ -501,6 +750,8 @@ class ProductionLine(models.Model):
     )
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
+    str_related_fields = ["workshop"]
+
     class Meta:
         ordering = ["name"]
         indexes = [
@@ -543,7 +794,7 @@ class ManufacturingProcess(models.Model):
         return self.name
 
 
-class ProductionSchedule(models.Model):
+class ProductionSchedule(FieldTrackerMixin, models.Model):
     """
     Production Schedule Model
 
@@ -576,7 +827,7 @@ class ProductionSchedule(models.Model):
     quantity = models.DecimalField(
         _("quantity"), max_digits=10, decimal_places=2, default=0.00
     )
-    start_time = models.DateTimeField(_("start time"), auto_now_add=True)
+    start_time = models.DateTimeField(_("start time"), default=now)
     end_time = models.DateTimeField(_("end time"), null=True, blank=True)
     status = models.CharField(
         max_length=20,
@@ -592,6 +843,9 @@ class ProductionSchedule(models.Model):
         verbose_name=_("created by"),
     )
 
+    str_related_fields = ["product", "production_line"]
+    transition_fields = ["status"]
+
     class Meta:
         ordering = ["start_time"]
         indexes = [
@@ -690,6 +944,8 @@ class ProductProcess(models.Model):
     )
     sequence = models.PositiveIntegerField(_("sequence"), default=1)
 
+    str_related_fields = ["product", "process"]
+
     class Meta:
         ordering = ["sequence"]
         unique_together = ("product", "process", "sequence")
@@ -747,6 +1003,8 @@ class Project(models.Model):
     )
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
+    str_related_fields = ["project_manager"]
+
     class Meta:
         ordering = ["start_date"]
         indexes = [models.Index(fields=["project_manager", "project_status"])]
@@ -763,7 +1021,7 @@ class Project(models.Model):
         super().save(*args, **kwargs)
 
 
-class Task(models.Model):
+class Task(FieldTrackerMixin, models.Model):
     """
     Task Model
 
@@ -814,6 +1072,8 @@ class Task(models.Model):
     )
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
+    str_related_fields = ["project"]
+
     class Meta:
         ordering = ["start_date"]
         constraints = [
@@ -841,7 +1101,7 @@ class Task(models.Model):
 # TODO: Create labor allocation tables
 
 
-class LaborAllocation(models.Model):
+class LaborAllocation(FieldTrackerMixin, models.Model):
     """
     Labor Allocation Model
 
@@ -887,6 +1147,9 @@ class LaborAllocation(models.Model):
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
     date = models.DateField(_("date"), default=now)
 
+    str_related_fields = ["employee", "task", "production_line", "project"]
+    TARGET_FIELDS = ("project", "task", "production_line")
+
     class Meta:
         constraints = [
             models.CheckConstraint(
@@ -936,6 +1199,50 @@ class LaborAllocation(models.Model):
         super().save(*args, **kwargs)
 
 
+class LaborUtilizationRollup(models.Model):
+    """
+    Labor Utilization Rollup Model - hours pre-summed per dimension and period.
+
+    - One row per (dimension, key, period, period start), e.g. a line's week ☑️
+    - Maintained from LaborAllocation writes, rebuilt by backfill_labor_rollups ☑️
+    - Department totals are read through the employee rows ☑️
+    """
+
+    class Dimension(models.TextChoices):
+        EMPLOYEE = "employee", _("Employee")
+        PROJECT = "project", _("Project")
+        TASK = "task", _("Task")
+        PRODUCTION_LINE = "production_line", _("Production Line")
+
+    class Period(models.TextChoices):
+        DAY = "day", _("Day")
+        WEEK = "week", _("Week")
+        MONTH = "month", _("Month")
+
+    dimension = models.CharField(
+        _("dimension"), max_length=20, choices=Dimension.choices
+    )
+    key = models.PositiveBigIntegerField(_("key"))  # !Pk of the dimension's model
+    period = models.CharField(_("period"), max_length=10, choices=Period.choices)
+    period_start = models.DateField(_("period start"))
+    hours = models.DecimalField(
+        _("hours"), max_digits=14, decimal_places=2, default=0.00
+    )
+    allocations = models.PositiveIntegerField(_("allocations"), default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "period", "key", "period_start"],
+                name="unique_labor_rollup_bucket",
+            )
+        ]
+        indexes = [models.Index(fields=["dimension", "period", "period_start"])]
+
+    def __str__(self):
+        return f"{self.dimension} {self.key} - {self.period} of {self.period_start}"
+
+
 class SkillMatrix(models.Model):
     """
     Skill Matrix Model - representing employee skills and competencies.
@@ -974,6 +1281,8 @@ class SkillMatrix(models.Model):
     )
     employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name="skills")
 
+    str_related_fields = ["employee"]
+
     class Meta:
         unique_together = ("employee", "name")
         verbose_name = _("skill matrix")
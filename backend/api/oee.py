@@ -0,0 +1,240 @@
+from django.db.models import CharField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast
+from .response_cache import get_model_versions
+from django.core.cache import cache
+from django.utils import timezone
+from django.conf import settings
+from collections import defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+# TODO: Overall equipment effectiveness
+
+# !Status columns of the per machine time array, None is "did not exist yet"
+STATES = ("OPERATIONAL", "IDLE", "MAINTENANCE", "BROKEN", None)
+RUN, PLANNED_DOWN, MISSING = 0, 2, 4
+EPOCH = datetime(1970, 1, 1)
+
+DEPENDENCIES = (
+    "api.Machine",
+    "api.Workshop",
+    "api.ProductionLine",
+    "api.ProductionSchedule",
+    "api.ProductProcess",
+    "api.ManufacturingProcess",
+)
+
+
+def epoch_seconds(value):
+    "Epoch seconds of a datetime read as text, naive values are UTC"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return (moment - EPOCH).total_seconds()
+
+
+def _status_seconds(since, until):
+    """
+    Seconds each machine spent in each status between since and until, as
+    the machine rows plus one flat array of len(STATES) columns per machine.
+    Replays Machine.status transitions, the status before since comes from
+    the last earlier transition (or the current status if none was logged).
+    """
+    from .models import Machine, StateTransition
+
+    status_log = StateTransition.objects.filter(entity_type="machine", field="status")
+    machines = list(
+        Machine.objects.annotate(
+            initial=Subquery(
+                status_log.filter(entity_id=OuterRef("pk"), occurred_at__lt=since)
+                .order_by("-occurred_at")
+                .values("new_value")[:1]
+            )
+        )
+        .order_by("pk")
+        .values_list("pk", "name", "workshop_id", "status", "initial")
+    )
+    # !Read timestamps as text, the ORM's datetime conversion dominates otherwise
+    transitions = (
+        status_log.filter(occurred_at__gte=since, occurred_at__lt=until)
+        .annotate(at=Cast("occurred_at", CharField()))
+        .order_by("occurred_at")
+        .values_list("entity_id", "at", "old_value", "new_value")
+    )
+
+    width, column = len(STATES), {state: i for i, state in enumerate(STATES)}
+    row = {machine[0]: i for i, machine in enumerate(machines)}
+    seconds = [0.0] * (len(machines) * width)
+    since, until = since.timestamp(), until.timestamp()
+    state = [None] * len(machines)  # !(status, since when) of the open interval
+
+    for pk, at, old, new in transitions.iterator(chunk_size=5000):
+        i = row.get(pk)
+        if i is None:
+            continue  # !Deleted machine
+        status, start = state[i] or (old, since)
+        at = epoch_seconds(at)
+        seconds[i * width + column.get(status, MISSING)] += at - start
+        state[i] = (new, at)
+
+    for i, (_, _, _, current, initial) in enumerate(machines):
+        status, start = state[i] or (initial or current, since)
+        seconds[i * width + column.get(status, MISSING)] += until - start
+
+    return machines, seconds
+
+
+def _ideal_seconds(machines, since, until):
+    """
+    Standard time of the units completed in the range per machine, and the
+    (machine rows, units) of every production line. A line's output is split
+    evenly over its machines, a unit takes its product's summed standard_time.
+    """
+    from .models import ProductionLine, ProductionSchedule, ProductProcess
+
+    per_unit = {
+        product: standard_time.total_seconds()
+        for product, standard_time in ProductProcess.objects.values("product")
+        .annotate(standard_time=Sum("process__standard_time"))
+        .order_by()
+        .values_list("product", "standard_time")
+        if standard_time is not None
+    }
+
+    line_ideal, line_units = defaultdict(float), defaultdict(float)
+    for line, product, quantity in ProductionSchedule.objects.filter(
+        status=ProductionSchedule.ScheduleStatus.COMPLETED,
+        end_time__gte=since,
+        end_time__lt=until,
+    ).values_list("production_line", "product", "quantity"):
+        line_units[line] += float(quantity)
+        line_ideal[line] += float(quantity) * per_unit.get(product, 0.0)
+
+    line_machines = defaultdict(list)
+    for line, machine in ProductionLine.machines.through.objects.values_list(
+        "productionline_id", "machine_id"
+    ):
+        line_machines[line].append(machine)
+
+    row = {machine[0]: i for i, machine in enumerate(machines)}
+    ideal, lines = [0.0] * len(machines), {}
+    for line in line_machines.keys() | line_units.keys():
+        members = [row[pk] for pk in line_machines[line] if pk in row]
+        for i in members:
+            ideal[i] += line_ideal[line] / len(members)
+        lines[line] = (members, line_units[line])
+    return ideal, lines
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else None
+
+
+def _oee(planned, run, ideal):
+    """
+    Availability is run time over planned time (everything but maintenance),
+    performance is standard time of the output over run time. No scrap or
+    rework is recorded yet, so every completed unit is counted as good.
+    """
+    availability, performance = _ratio(run, planned), _ratio(ideal, run)
+    quality = 1.0 if planned else None
+    return {
+        "planned_seconds": planned,
+        "run_seconds": run,
+        "ideal_seconds": ideal,
+        "availability": availability,
+        "performance": performance,
+        "quality": quality,
+        "oee": (
+            availability * performance * quality
+            if None not in (availability, performance, quality)
+            else None
+        ),
+    }
+
+
+def _sum_rows(totals, indexes):
+    planned = run = ideal = 0.0
+    for i in indexes:
+        planned += totals[i][0]
+        run += totals[i][1]
+        ideal += totals[i][2]
+    return planned, run, ideal
+
+
+def compute_oee(since, until):
+    """
+    OEE per machine, production line and workshop for a time range, from
+    seven queries and a single pass over the machines' status transitions.
+    """
+    from .models import ProductionLine, Workshop
+
+    machines, seconds = _status_seconds(since, until)
+    ideal, lines = _ideal_seconds(machines, since, until)
+
+    width, totals = len(STATES), []
+    for i in range(len(machines)):
+        times = seconds[i * width : (i + 1) * width]
+        planned = sum(times) - times[PLANNED_DOWN] - times[MISSING]
+        totals.append((planned, times[RUN], ideal[i]))
+
+    workshops = defaultdict(list)
+    for i, machine in enumerate(machines):
+        workshops[machine[2]].append(i)
+
+    line_names = dict(
+        ProductionLine.objects.filter(pk__in=lines).values_list("pk", "name")
+    )
+    workshop_names = dict(
+        Workshop.objects.filter(pk__in=workshops).values_list("pk", "name")
+    )
+
+    return {
+        "since": since,
+        "until": until,
+        "machines": [
+            {"id": pk, "name": name, "workshop": workshop, **_oee(*totals[i])}
+            for i, (pk, name, workshop, _, _) in enumerate(machines)
+        ],
+        "production_lines": [
+            {
+                "id": line,
+                "name": line_names[line],
+                "units": units,
+                **_oee(*_sum_rows(totals, members)),
+            }
+            for line, (members, units) in sorted(lines.items())
+            if line in line_names
+        ],
+        "workshops": [
+            {
+                "id": workshop,
+                "name": workshop_names[workshop],
+                **_oee(*_sum_rows(totals, rows)),
+            }
+            for workshop, rows in sorted(workshops.items())
+        ],
+    }
+
+
+def get_oee(since=None, until=None):
+    """
+    compute_oee cached per range and version of the models it reads. The
+    transition log is not versioned (it is flushed in the background), so
+    the end of the range is rounded down to the minute and entries expire
+    after OEE_CACHE_TIMEOUT.
+    """
+    from django.apps import apps
+
+    now = timezone.now().replace(second=0, microsecond=0)
+    until = min(until or now, now)
+    since = min(since or until - timedelta(days=30), until)
+
+    versions = get_model_versions([apps.get_model(label) for label in DEPENDENCIES])
+    key = f"oee:{since.isoformat()}:{until.isoformat()}:{':'.join(map(str, versions))}"
+
+    result = cache.get(key)
+    if result is None:
+        result = compute_oee(since, until)
+        cache.set(key, result, getattr(settings, "OEE_CACHE_TIMEOUT", 60))
+    return result
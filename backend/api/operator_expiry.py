@@ -0,0 +1,194 @@
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.db.models import Q
+from datetime import timedelta
+from uuid import uuid4
+import threading
+import logging
+import socket
+import heapq
+import os
+
+logger = logging.getLogger(__name__)
+_operator_expiry_scheduler = None
+
+LEASE_NAME = "operator-expiry"
+LEASE_TTL = timedelta(seconds=30)
+SYNC_INTERVAL = timedelta(seconds=60)
+RETRY_DELAY = 5  # seconds
+
+# TODO: Event driven operator expiry
+
+
+class OperatorExpiryScheduler(threading.Thread):
+    """
+    Background thread that clears expired operator assignments
+
+    - Keeps a min-heap of (operator_auto_remove_at, machine id) deadlines ☑️
+    - Sleeps until the next deadline and clears every due machine in one UPDATE ☑️
+    - Runs on a single leader across workers using a SchedulerLease row ☑️
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.daemon = True
+        self.name = "OperatorExpiryScheduler"
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.is_leader = False
+        self._heap = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._next_sync = None
+
+    def schedule(self, machine_id, deadline):
+        "Push a deadline and wake the thread if it is now the earliest one"
+        if machine_id is None or deadline is None:
+            return
+
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, machine_id))
+            is_earliest = self._heap[0] == (deadline, machine_id)
+
+        if is_earliest:
+            self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self):
+        logger.info(f"Starting operator expiry scheduler ({self.owner})")
+        while not self._stopped.is_set():
+            timeout = RETRY_DELAY
+            try:
+                close_old_connections()
+                timeout = self._tick()
+            except Exception as e:
+                logger.error(f"Error expiring operators: {e}")
+
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+        self._release_lease()
+        close_old_connections()
+
+    def _tick(self):
+        "One scheduler step, returns the number of seconds to sleep"
+        now = timezone.now()
+
+        if not self._acquire_lease(now):
+            if self.is_leader:
+                logger.info("Lost operator expiry lease")
+            self.is_leader = False
+            return LEASE_TTL.total_seconds() / 2
+
+        # !Only lead once a sync went through, a failed one is retried next tick
+        if not self.is_leader or self._next_sync is None or now >= self._next_sync:
+            self._sync(now)
+            self.is_leader = True
+
+        self._expire_due(now)
+
+        # !Wake for the next deadline, the next lease renewal or the next sync
+        wake_at = min(now + LEASE_TTL / 3, self._next_sync)
+        with self._lock:
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+        return max((wake_at - timezone.now()).total_seconds(), 0)
+
+    def _acquire_lease(self, now):
+        from .models import SchedulerLease
+
+        try:
+            SchedulerLease.objects.get_or_create(
+                name=LEASE_NAME, defaults={"owner": "", "expires_at": now}
+            )
+        except IntegrityError:
+            pass  # !Another worker created the row first
+
+        acquired = (
+            SchedulerLease.objects.filter(name=LEASE_NAME)
+            .filter(Q(owner=self.owner) | Q(expires_at__lte=now))
+            .update(owner=self.owner, expires_at=now + LEASE_TTL)
+        )
+        return acquired == 1
+
+    def _release_lease(self):
+        from .models import SchedulerLease
+
+        try:
+            SchedulerLease.objects.filter(name=LEASE_NAME, owner=self.owner).update(
+                expires_at=timezone.now()
+            )
+        except Exception as e:
+            logger.error(f"Error releasing operator expiry lease: {e}")
+
+    def _sync(self, now):
+        """
+        Load deadlines due before the next sync, this picks up assignments made
+        by other workers which never reach this process' heap.
+        """
+        from .models import Machine
+
+        horizon = now + SYNC_INTERVAL * 2
+        deadlines = Machine.objects.filter(
+            operator__isnull=False, operator_auto_remove_at__lte=horizon
+        ).values_list("operator_auto_remove_at", "id")
+
+        with self._lock:
+            self._heap = list(set(self._heap) | set(deadlines))
+            heapq.heapify(self._heap)
+
+        self._next_sync = now + SYNC_INTERVAL
+
+    def _expire_due(self, now):
+        from .response_cache import bump_model_version
+        from .event_log import record_transitions
+        from .models import Machine
+
+        due = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+                due += 1
+
+        if not due:
+            return
+
+        # !Stale heap entries are harmless, the filter re-checks the deadline
+        with transaction.atomic():
+            expired = dict(
+                Machine.objects.select_for_update()
+                .filter(operator__isnull=False, operator_auto_remove_at__lte=now)
+                .values_list("pk", "operator_id")
+            )
+            cleared = Machine.objects.filter(pk__in=expired).update(
+                operator=None, operator_assigned_at=None, operator_auto_remove_at=None
+            )
+            record_transitions(
+                Machine,
+                [(pk, "operator", operator, None) for pk, operator in expired.items()],
+                occurred_at=now,
+            )
+
+        if cleared:
+            bump_model_version(Machine)
+            logger.info(f"Cleared expired operators from {cleared} machines")
+
+
+def start_operator_expiry_scheduler():
+    "Start the operator expiry scheduler if it's not already running"
+    global _operator_expiry_scheduler
+
+    if _operator_expiry_scheduler is None or not _operator_expiry_scheduler.is_alive():
+        _operator_expiry_scheduler = OperatorExpiryScheduler()
+        _operator_expiry_scheduler.start()
+        logger.info("Started operator expiry scheduler")
+    return _operator_expiry_scheduler
+
+
+def schedule_operator_expiry(machine_id, deadline):
+    "Hand a new deadline to this process' scheduler, other workers pick it up on sync"
+    if _operator_expiry_scheduler is not None:
+        _operator_expiry_scheduler.schedule(machine_id, deadline)
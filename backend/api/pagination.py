@@ -0,0 +1,179 @@
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.pagination import BasePagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from base64 import b64decode, b64encode
+import datetime
+import json
+
+# TODO: Keyset pagination for list endpoints
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    "DjangoJSONEncoder that keeps microseconds, rows sharing a millisecond must not repeat"
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the model's Meta.ordering plus the primary key.
+
+    Every page is fetched with a row-value comparison against the last seen
+    key, so page N costs the same as page 1. Pass ?count=false to skip the
+    COUNT(*) on very large tables.
+    """
+
+    page_size = api_settings.PAGE_SIZE or 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    include_count = True
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, queryset, view):
+        "Resolve Meta.ordering to local columns and append the pk as tiebreaker"
+        model = queryset.model
+        ordering = getattr(view, "keyset_ordering", None) or model._meta.ordering
+        keys = []
+
+        for name in ordering:
+            descending = name.startswith("-")
+            field = model._meta.get_field(name.lstrip("-"))
+            # !Order FKs by their column so the FK index is used
+            keys.append((field.attname, descending))
+
+        pk = model._meta.pk.attname
+        if pk not in [attname for attname, _ in keys]:
+            keys.append((pk, False))
+        return keys
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_include_count(self, request):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return self.include_count
+        return value.lower() not in ("0", "false", "no")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            data = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            position, reverse = list(data["p"]), bool(data.get("r", False))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if len(position) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+
+        # !The cursor is not signed, parse every value back with its own field
+        fields = [self.model._meta.get_field(attname) for attname, _ in self.keys]
+        try:
+            position = [
+                field.to_python(value) for field, value in zip(fields, position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse=False):
+        position = [getattr(instance, attname) for attname, _ in self.keys]
+        data = json.dumps({"p": position, "r": reverse}, cls=CursorEncoder)
+        encoded = b64encode(data.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def keyset_filter(self, position, reverse):
+        "(a, b, id) > (x, y, z) expanded into an index friendly OR of ANDs"
+        condition = Q()
+        for index, (attname, descending) in enumerate(self.keys):
+            forward = descending == reverse
+            lookup = "gt" if forward else "lt"
+            term = Q(**{f"{attname}__{lookup}": position[index]})
+            for prev_index, (prev_attname, _) in enumerate(self.keys[:index]):
+                term &= Q(**{prev_attname: position[prev_index]})
+            condition |= term
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.keys = self.get_ordering(queryset, view)
+        self.base_url = request.build_absolute_uri()
+        self.size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        self.count = None
+        if self.get_include_count(request):
+            self.count = queryset.count()
+
+        order_by = [
+            f"-{attname}" if descending != reverse else attname
+            for attname, descending in self.keys
+        ]
+        queryset = queryset.order_by(*order_by)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position, reverse))
+
+        # !Fetch one extra row to know if there is another page without counting
+        rows = list(queryset[: self.size + 1])
+        has_more = len(rows) > self.size
+        rows = rows[: self.size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        properties = {
+            "count": {"type": "integer", "example": 123},
+            "next": {"type": "string", "nullable": True, "format": "uri"},
+            "previous": {"type": "string", "nullable": True, "format": "uri"},
+            "results": schema,
+        }
+        return {"type": "object", "required": ["results"], "properties": properties}
@@ -0,0 +1,177 @@
+from django.db.models import Q, Sum
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+import bisect
+import heapq
+
+# TODO: Finite capacity production planning
+
+
+class NoCapacityError(Exception):
+    "Raised when open ended schedules hold every line a demand could go to"
+
+    def __init__(self, demand):
+        super().__init__(f"No production line can take product {demand['product'].pk}")
+        self.demand = demand
+
+
+class LineTimeline:
+    """
+    Free time of one production line from the release time onwards.
+
+    - Capacity is read as units per hour through the line ☑️
+    - A job takes the routing time for the first unit plus quantity / capacity ☑️
+    - Gaps between existing bookings are filled first, then the tail is extended ☑️
+    - Gaps are kept ordered by start (bisect) and in a heap by length, a job longer than every gap goes to the tail without a scan ☑️
+    - A booking without an end time holds the line from its start onwards ☑️
+    """
+
+    def __init__(self, line, release, bookings=()):
+        self.line = line
+        self.capacity = Decimal(line.production_capacity)
+        self.starts, self.ends = [], []  # !Free [start, end) windows, by start
+        self.lengths = []  # !Heap of (-length, start, end), stale entries popped lazily
+        self.tail = release  # !None once an open ended booking holds the line
+
+        for start, end in sorted(bookings, key=lambda booking: booking[0]):
+            if start > self.tail:
+                self._add_gap(self.tail, start)
+            if end is None:
+                self.tail = None
+                break
+            self.tail = max(self.tail, end)
+
+    def _add_gap(self, start, end):
+        index = bisect.bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        heapq.heappush(self.lengths, (start - end, start, end))
+
+    def _longest_gap(self):
+        while self.lengths:
+            _, start, end = self.lengths[0]
+            index = bisect.bisect_left(self.starts, start)
+            if self.starts[index : index + 1] == [start] and self.ends[index] == end:
+                return end - start
+            heapq.heappop(self.lengths)  # !Booked or split since it was pushed
+        return timedelta(0)
+
+    def duration(self, quantity, routing_time):
+        hours = Decimal(quantity) / self.capacity
+        return routing_time + timedelta(seconds=float(hours * 3600))
+
+    def earliest_slot(self, duration):
+        "Earliest start fitting duration, None when the line is held for good"
+        if self._longest_gap() >= duration:
+            for start, end in zip(self.starts, self.ends):
+                if end - start >= duration:
+                    return start
+        return self.tail
+
+    def book(self, start, end):
+        if self.tail is not None and start >= self.tail:
+            self.tail = end
+            return
+
+        index = bisect.bisect_right(self.starts, start) - 1
+        gap_start, gap_end = self.starts.pop(index), self.ends.pop(index)
+        if gap_start < start:
+            self._add_gap(gap_start, start)
+        if end < gap_end:
+            self._add_gap(end, gap_end)
+
+
+def load_timelines(lines, release):
+    "Build a timeline per line from its open schedules in one query"
+    from .models import ProductionSchedule
+
+    bookings = {line.pk: [] for line in lines}
+    rows = ProductionSchedule.objects.filter(
+        Q(end_time__gt=release) | Q(end_time__isnull=True),
+        production_line__in=lines,
+        status__in=[
+            ProductionSchedule.ScheduleStatus.SCHEDULED,
+            ProductionSchedule.ScheduleStatus.IN_PROGRESS,
+        ],
+    ).values_list("production_line_id", "start_time", "end_time")
+
+    for line_id, start, end in rows:
+        bookings[line_id].append((start, end))
+    return [LineTimeline(line, release, bookings[line.pk]) for line in lines]
+
+
+def routing_times(product_ids):
+    "Per unit time through each product's ProductProcess routing"
+    from .models import ProductProcess
+
+    times = dict.fromkeys(product_ids, timedelta(0))
+    rows = (
+        ProductProcess.objects.filter(product_id__in=product_ids)
+        .values("product_id")
+        .annotate(total=Sum("process__standard_time"))
+    )
+    for row in rows:
+        times[row["product_id"]] = row["total"] or timedelta(0)
+    return times
+
+
+def plan_production(demands, created_by, lines, release=None, commit=True):
+    """
+    Place demand on production lines, earliest due date first, each job going to
+    the line that finishes it soonest. The planned schedules are written with
+    one bulk_create. Raises NoCapacityError before writing anything when a
+    demand fits no line.
+
+    demands: iterable of dicts with product, quantity and due_date
+    """
+    from .models import ProductionSchedule
+
+    release = release or timezone.now()
+    timelines = [
+        timeline for timeline in load_timelines(lines, release) if timeline.capacity > 0
+    ]
+    if not timelines:
+        return []
+
+    demands = sorted(demands, key=lambda demand: demand["due_date"])
+    routing = routing_times({demand["product"].pk for demand in demands})
+    schedules = []
+
+    for demand in demands:
+        best = None
+        for timeline in timelines:
+            duration = timeline.duration(
+                demand["quantity"], routing[demand["product"].pk]
+            )
+            start = timeline.earliest_slot(duration)
+            if start is None:
+                continue
+            if best is None or start + duration < best[1] + best[2]:
+                best = (timeline, start, duration)
+
+        if best is None:
+            raise NoCapacityError(demand)
+        timeline, start, duration = best
+        timeline.book(start, start + duration)
+        schedules.append(
+            ProductionSchedule(
+                production_line=timeline.line,
+                product=demand["product"],
+                quantity=demand["quantity"],
+                start_time=start,
+                end_time=start + duration,
+                status=ProductionSchedule.ScheduleStatus.SCHEDULED,
+                created_by=created_by,
+            )
+        )
+
+    if commit:
+        from .event_log import record_transitions
+
+        ProductionSchedule.objects.bulk_create(schedules)
+        record_transitions(
+            ProductionSchedule,
+            [(schedule.pk, "status", None, schedule.status) for schedule in schedules],
+        )
+    return schedules
@@ -0,0 +1,164 @@
+from .response_cache import versions_shared
+from django.core.cache import cache
+from collections import deque
+
+CACHE_TIMEOUT = 60 * 60  # seconds
+# !Invalidations from other workers never reach a per process cache
+LOCAL_CACHE_TIMEOUT = 60  # seconds
+
+# TODO: Task dependency graph and critical path
+
+
+class DependencyCycleError(Exception):
+    "Raised when the task dependencies of a project contain a cycle"
+
+    def __init__(self, task_ids):
+        super().__init__(f"Task dependencies contain a cycle: {task_ids}")
+        self.task_ids = task_ids
+
+
+def _cache_key(project_id):
+    return f"project-graph:{project_id}"
+
+
+def invalidate_project_graph(*project_ids):
+    cache.delete_many([_cache_key(pk) for pk in project_ids if pk is not None])
+
+
+def _task_duration(start_date, end_date, actual_end_date):
+    "Planned length of a task in whole days, a task always takes at least one day"
+    finish = actual_end_date or end_date or start_date
+    return max((finish - start_date).days, 0) + 1
+
+
+def load_project_graph(project_id):
+    """
+    Load every task and dependency edge of a project in two queries.
+    Returns (tasks, successors, predecessors) keyed by task id, an edge u -> v
+    means u has to finish before v can start.
+    """
+    from .models import Task
+
+    tasks = {}
+    rows = Task.objects.filter(project_id=project_id).values_list(
+        "pk", "name", "status", "start_date", "end_date", "actual_end_date"
+    )
+    for pk, name, task_status, start, end, actual_end in rows:
+        tasks[pk] = {
+            "id": pk,
+            "name": name,
+            "status": task_status,
+            "duration": _task_duration(start, end, actual_end),
+        }
+
+    successors = {pk: [] for pk in tasks}
+    predecessors = {pk: [] for pk in tasks}
+    edges = Task.dependencies.through.objects.filter(
+        from_task__project_id=project_id, to_task__project_id=project_id
+    ).values_list("to_task_id", "from_task_id")
+
+    for before, after in edges:
+        successors[before].append(after)
+        predecessors[after].append(before)
+
+    return tasks, successors, predecessors
+
+
+def topological_order(successors, predecessors):
+    "Kahn's algorithm, raises DependencyCycleError with the tasks left over"
+    in_degree = {pk: len(before) for pk, before in predecessors.items()}
+    queue = deque(sorted(pk for pk, degree in in_degree.items() if degree == 0))
+    order = []
+
+    while queue:
+        pk = queue.popleft()
+        order.append(pk)
+        for after in successors[pk]:
+            in_degree[after] -= 1
+            if in_degree[after] == 0:
+                queue.append(after)
+
+    if len(order) != len(in_degree):
+        raise DependencyCycleError(
+            sorted(pk for pk, degree in in_degree.items() if degree > 0)
+        )
+    return order
+
+
+def analyse_project(project_id):
+    """
+    Critical path analysis of a project's tasks.
+
+    - Forward pass for earliest start / finish ☑️
+    - Backward pass for latest start / finish and slack ☑️
+    - Critical path through zero-slack tasks ☑️
+    """
+    tasks, successors, predecessors = load_project_graph(project_id)
+    order = topological_order(successors, predecessors)
+
+    earliest_start, earliest_finish = {}, {}
+    for pk in order:
+        earliest_start[pk] = max(
+            (earliest_finish[before] for before in predecessors[pk]), default=0
+        )
+        earliest_finish[pk] = earliest_start[pk] + tasks[pk]["duration"]
+
+    duration = max(earliest_finish.values(), default=0)
+    latest_start, latest_finish = {}, {}
+    for pk in reversed(order):
+        latest_finish[pk] = min(
+            (latest_start[after] for after in successors[pk]), default=duration
+        )
+        latest_start[pk] = latest_finish[pk] - tasks[pk]["duration"]
+
+    for pk, task in tasks.items():
+        task.update(
+            earliest_start=earliest_start[pk],
+            earliest_finish=earliest_finish[pk],
+            latest_start=latest_start[pk],
+            latest_finish=latest_finish[pk],
+            slack=latest_start[pk] - earliest_start[pk],
+        )
+        task["critical"] = task["slack"] == 0
+
+    # !Walk zero-slack tasks whose finish feeds straight into the next start
+    critical_path = []
+    current = next(
+        (pk for pk in order if tasks[pk]["critical"] and not predecessors[pk]), None
+    )
+    while current is not None:
+        critical_path.append(current)
+        current = next(
+            (
+                after
+                for after in successors[current]
+                if tasks[after]["critical"]
+                and earliest_start[after] == earliest_finish[current]
+            ),
+            None,
+        )
+
+    return {
+        "project": project_id,
+        "duration": duration,
+        "order": order,
+        "critical_path": critical_path,
+        "tasks": [tasks[pk] for pk in order],
+    }
+
+
+def get_project_analysis(project_id):
+    """
+    Cached analyse_project, invalidated by task and dependency changes. On a
+    per process cache it expires after LOCAL_CACHE_TIMEOUT instead.
+    """
+    key = _cache_key(project_id)
+    result = cache.get(key)
+    if result is None:
+        result = analyse_project(project_id)
+        cache.set(
+            key,
+            result,
+            CACHE_TIMEOUT if versions_shared() else LOCAL_CACHE_TIMEOUT,
+        )
+    return result
@@ -0,0 +1,228 @@
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.cache import patch_vary_headers
+from rest_framework.response import Response
+from django.db.models import Count, Max
+from django.utils.http import http_date, quote_etag
+from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction
+from .mixins import get_eager_loading_lookups
+import hashlib
+import time
+
+_dependency_cache = {}
+
+# !Backends whose entries only exist in the current process
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# TODO: Model versioned response cache
+
+
+def _version_key(model):
+    return f"model-version:{model._meta.label_lower}"
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cached response built from this model once the current
+    transaction commits, so readers never cache rows that are about to change.
+    """
+
+    def bump():
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # !Never restart at a value an evicted counter may already have used
+            cache.set(key, time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+def versions_shared():
+    "Whether a version bump in one worker is seen by the others"
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+def get_model_versions(models):
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def response_dependencies(view):
+    "Models whose rows end up in a view's response, found from its eager loading"
+    if type(view) in _dependency_cache:
+        return _dependency_cache[type(view)]
+
+    model = view.get_queryset().model
+    select, prefetch = get_eager_loading_lookups(view.get_serializer_class())
+    models = {model}
+
+    for lookup in [*select, *prefetch]:
+        current = model
+        for part in lookup.split("__"):
+            field = current._meta.get_field(part)
+            if field.many_to_many:
+                # !Through rows (e.g. ProductProcess) change the rendered relation
+                through = getattr(field.remote_field, "through", None) or getattr(
+                    field, "through", None
+                )
+                if through is not None:
+                    models.add(through)
+            current = field.related_model
+            models.add(current)
+
+    dependencies = sorted(models, key=lambda model: model._meta.label_lower)
+    _dependency_cache[type(view)] = dependencies
+    return dependencies
+
+
+class CachedResponseMixin:
+    """
+    Cache serialized list / detail responses keyed by endpoint, query params and
+    the version counter of every model the response is built from. Disabled
+    unless the default cache is shared, a per process counter never sees the
+    writes made by other workers.
+    """
+
+    cache_timeout = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def get_response_cache_key(self, request):
+        versions = get_model_versions(response_dependencies(self))
+        raw = "|".join(
+            [
+                request.get_host(),
+                request.path,
+                "&".join(sorted(request.GET.urlencode().split("&"))),
+                request.accepted_renderer.format,
+                *map(str, versions),
+            ]
+        )
+        return f"response:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+    def _cached(self, request, render, *args, **kwargs):
+        if not versions_shared():
+            return render(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = render(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, super().retrieve, *args, **kwargs)
+
+
+# TODO: Conditional GET from updated_at
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before anything is
+    serialized, using the updated_at column as the validator.
+
+    - Lists validate on MAX(updated_at) and row count of the filtered queryset ☑️
+    - Details validate on the row's updated_at and also send Last-Modified ☑️
+    - Related models rendered into the response add their version counter ☑️
+    - Views rendering related models send no validators unless the default cache is shared, a per process counter never sees the writes made by other workers ☑️
+    """
+
+    validator_field = "updated_at"
+
+    def get_related_dependencies(self):
+        model = self.get_queryset().model
+        return [
+            dependency
+            for dependency in response_dependencies(self)
+            if dependency is not model
+        ]
+
+    def has_validators(self):
+        return versions_shared() or not self.get_related_dependencies()
+
+    def get_etag(self, request, *parts):
+        model = self.get_queryset().model
+        related = self.get_related_dependencies()
+        raw = "|".join(
+            map(
+                str,
+                [
+                    model._meta.label_lower,
+                    request.accepted_renderer.format,
+                    *parts,
+                    *get_model_versions(related),
+                ],
+            )
+        )
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def get_list_validators(self, request):
+        if not self.has_validators():
+            return None, None
+        row = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(last=Max(self.validator_field), count=Count("pk"))
+        )
+        # !No Last-Modified on lists, deleting a row leaves MAX(updated_at) as is
+        return self.get_etag(request, row["last"], row["count"]), None
+
+    def get_detail_validators(self, request, **kwargs):
+        if not self.has_validators():
+            return None, None
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        updated_at = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values_list(self.validator_field, flat=True)
+            .first()
+        )
+        if updated_at is None:
+            return None, None  # !Missing row, let retrieve() raise the 404
+        return self.get_etag(request, updated_at), int(updated_at.timestamp())
+
+    def _conditional(self, request, validators, render, *args, **kwargs):
+        etag, last_modified = validators
+        if etag is None:
+            return render(request, *args, **kwargs)
+
+        # !Object permissions are not checked on a 304, only view permissions
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = render(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Accept", "Authorization"])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators(request)
+        return self._conditional(request, validators, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_detail_validators(request, **kwargs)
+        return self._conditional(request, validators, super().retrieve, *args, **kwargs)
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+User = get_user_model()
+
+# TODO: Role and department reconciliation
+
+
+def reconcile_roles(user_ids):
+    """
+    Recompute role and department for the given users from the departments they
+    supervise and the workshops they manage, in one aggregate pass.
+
+    - The most recently updated assignment wins, supervisor on a tie ☑️
+    - Users holding nothing fall back to OPERATOR without a department ☑️
+    - Admins are never touched ☑️
+    """
+    from .models import Department, Workshop
+
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return []
+
+    # !(updated_at, precedence, role, department) per held assignment
+    holdings = {}
+    for user_id, department_id, updated_at in Department.objects.filter(
+        supervisor_id__in=user_ids
+    ).values_list("supervisor_id", "pk", "updated_at"):
+        holding = (updated_at, 1, User.Role.SUPERVISOR, department_id)
+        holdings[user_id] = max(holdings.get(user_id, holding), holding)
+
+    for user_id, department_id, updated_at in Workshop.objects.filter(
+        manager_id__in=user_ids
+    ).values_list("manager_id", "department_id", "updated_at"):
+        holding = (updated_at, 0, User.Role.MANAGER, department_id)
+        holdings[user_id] = max(holdings.get(user_id, holding), holding)
+
+    changed = []
+    for user in (
+        User.objects.filter(pk__in=user_ids)
+        .exclude(role=User.Role.ADMIN)
+        .only("id", "role", "department_id")
+    ):
+        _, _, role, department_id = holdings.get(
+            user.pk, (None, None, User.Role.OPERATOR, None)
+        )
+        if user.role != role or user.department_id != department_id:
+            user.role, user.department_id = role, department_id
+            changed.append(user)
+
+    User.objects.bulk_update(changed, ["role", "department"])
+    if changed:
+        # !bulk_update sends no signals, cached users / responses go stale by hand
+        from .response_cache import bump_model_version
+
+        bump_model_version(User)
+    return changed
+
+
+@transaction.atomic
+def reassign_roles(department_supervisors=None, workshop_managers=None):
+    """
+    Apply many supervisor / manager changes at once and reconcile every affected
+    user with a constant number of queries.
+    """
+    from .models import Department, Workshop
+
+    department_supervisors = department_supervisors or {}
+    workshop_managers = workshop_managers or {}
+    updated_at = timezone.now()
+    affected = set()
+
+    departments = Department.objects.select_for_update().in_bulk(department_supervisors)
+    changed_departments = []
+    for pk, department in departments.items():
+        supervisor_id = department_supervisors[pk]
+        if department.supervisor_id != supervisor_id:
+            affected |= {department.supervisor_id, supervisor_id}
+            department.supervisor_id = supervisor_id
+            department.updated_at = updated_at
+            changed_departments.append(department)
+
+    workshops = Workshop.objects.select_for_update().in_bulk(workshop_managers)
+    changed_workshops = []
+    for pk, workshop in workshops.items():
+        manager_id = workshop_managers[pk]
+        if workshop.manager_id != manager_id:
+            affected |= {workshop.manager_id, manager_id}
+            workshop.manager_id = manager_id
+            workshop.updated_at = updated_at
+            changed_workshops.append(workshop)
+
+    Department.objects.bulk_update(changed_departments, ["supervisor", "updated_at"])
+    Workshop.objects.bulk_update(changed_workshops, ["manager", "updated_at"])
+    reconcile_roles(affected)
+
+    # !bulk_update sends no signals, invalidate cached responses by hand
+    from .response_cache import bump_model_version
+
+    for model in (Department, Workshop):
+        bump_model_version(model)
+    return changed_departments, changed_workshops
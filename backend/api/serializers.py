@@ -1,11 +1,24 @@
 from rest_framework import serializers
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+from datetime import timezone as dt_timezone
+from django.utils import timezone
+from django.db import transaction
+from decimal import Decimal
+from .labor_rollup import allocation_row, record_allocation_changes
+from .response_cache import bump_model_version
+from .event_log import record_transitions
 from .models import (
+    LaborUtilizationRollup,
     ManufacturingProcess,
     ProductionSchedule,
     LaborAllocation,
     ProductionLine,
     ProductProcess,
     OrderMaterial,
+    StateTransition,
+    TelemetrySample,
+    TelemetryRollup,
     SkillMatrix,
     Department,
     Supplier,
@@ -15,6 +28,7 @@ from .models import (
     Project,
     Product,
     Order,
+    User,
     Task,
 )
 
@@ -33,6 +47,72 @@ class WorkshopSerializer(serializers.ModelSerializer):
         extra_kwargs = {"updated_at": {"read_only": True}}
 
 
+class DepartmentAssignmentSerializer(serializers.Serializer):
+    department = serializers.IntegerField(min_value=1)
+    supervisor = serializers.IntegerField(min_value=1, allow_null=True)
+
+
+class WorkshopAssignmentSerializer(serializers.Serializer):
+    workshop = serializers.IntegerField(min_value=1)
+    manager = serializers.IntegerField(min_value=1, allow_null=True)
+
+
+class RoleReassignmentSerializer(serializers.Serializer):
+    departments = DepartmentAssignmentSerializer(
+        many=True, required=False, max_length=1000
+    )
+    workshops = WorkshopAssignmentSerializer(many=True, required=False, max_length=1000)
+
+    def validate(self, attrs):
+        departments = attrs.get("departments", [])
+        workshops = attrs.get("workshops", [])
+        if not departments and not workshops:
+            raise serializers.ValidationError(
+                "At least one department or workshop assignment is required."
+            )
+
+        # !One query per table for the whole reorganisation
+        department_ids = set(
+            Department.objects.filter(
+                pk__in={row["department"] for row in departments}
+            ).values_list("pk", flat=True)
+        )
+        workshop_ids = set(
+            Workshop.objects.filter(
+                pk__in={row["workshop"] for row in workshops}
+            ).values_list("pk", flat=True)
+        )
+        user_ids = set(
+            User.objects.filter(
+                pk__in={row["supervisor"] for row in departments}
+                | {row["manager"] for row in workshops}
+            ).values_list("pk", flat=True)
+        )
+
+        errors = {}
+        for key, target, user_key, known in (
+            ("departments", "department", "supervisor", department_ids),
+            ("workshops", "workshop", "manager", workshop_ids),
+        ):
+            row_errors, seen = [], set()
+            for row in attrs.get(key, []):
+                row_error = {}
+                if row[target] not in known:
+                    row_error[target] = [f'Invalid pk "{row[target]}".']
+                elif row[target] in seen:
+                    row_error[target] = ["Assigned more than once."]
+                if row[user_key] is not None and row[user_key] not in user_ids:
+                    row_error[user_key] = [f'Invalid pk "{row[user_key]}".']
+                seen.add(row[target])
+                row_errors.append(row_error)
+            if any(row_errors):
+                errors[key] = row_errors
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
 class MachineSerializer(serializers.ModelSerializer):
     workshop_name = serializers.StringRelatedField(source="workshop", read_only=True)
     operator_name = serializers.StringRelatedField(source="operator", read_only=True)
@@ -43,6 +123,209 @@ class MachineSerializer(serializers.ModelSerializer):
         read_only_fields = ["operator_assigned_at", "operator_auto_remove_at"]
 
 
+class MachineAssignmentSerializer(serializers.Serializer):
+    machine = serializers.IntegerField(min_value=1)
+    operator = serializers.IntegerField(min_value=1)
+
+
+class MachineBulkAssignSerializer(serializers.Serializer):
+    assignments = MachineAssignmentSerializer(
+        many=True, allow_empty=False, max_length=1000
+    )
+
+    def validate(self, attrs):
+        # !Every machine and every operator in one query each
+        assignments = attrs["assignments"]
+        machines = Machine.objects.select_related("workshop__department").in_bulk(
+            {row["machine"] for row in assignments}
+        )
+        operators = User.objects.in_bulk({row["operator"] for row in assignments})
+
+        seen, errors = set(), []
+        for row in assignments:
+            row_errors = {}
+            if row["machine"] not in machines:
+                row_errors["machine"] = [f'Invalid pk "{row["machine"]}".']
+            elif row["machine"] in seen:
+                row_errors["machine"] = ["Machine is assigned more than once."]
+            if row["operator"] not in operators:
+                row_errors["operator"] = [f'Invalid pk "{row["operator"]}".']
+            seen.add(row["machine"])
+            errors.append(row_errors)
+
+        if any(errors):
+            raise serializers.ValidationError({"assignments": errors})
+
+        attrs["machines"], attrs["operators"] = machines, operators
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        machines, operators = validated_data["machines"], validated_data["operators"]
+        assigned, transitions = [], []
+        for row in validated_data["assignments"]:
+            machine = machines[row["machine"]]
+            transitions.append(
+                (machine.pk, "operator", machine.operator_id, row["operator"])
+            )
+            machine.operator = operators[row["operator"]]
+            machine._stamp_operator_assignment()
+            assigned.append(machine)
+
+        Machine.objects.bulk_update(
+            assigned,
+            ["operator", "operator_assigned_at", "operator_auto_remove_at"],
+            batch_size=500,
+        )
+        bump_model_version(Machine)
+        record_transitions(Machine, transitions)
+
+        from .operator_expiry import schedule_operator_expiry
+
+        def schedule():
+            for machine in assigned:
+                schedule_operator_expiry(machine.pk, machine.operator_auto_remove_at)
+
+        transaction.on_commit(schedule)
+        return assigned
+
+
+class MaintenancePlanQuerySerializer(serializers.Serializer):
+    within = serializers.IntegerField(min_value=0, max_value=365, default=7)
+    workshop = serializers.IntegerField(min_value=1, required=False)
+    min_risk = serializers.FloatField(min_value=0, max_value=100, required=False)
+
+
+class StateTransitionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StateTransition
+        fields = "__all__"
+
+
+class StateTransitionQuerySerializer(serializers.Serializer):
+    entity_type = serializers.CharField(max_length=50, required=False)
+    entity_id = serializers.IntegerField(min_value=0, required=False)
+    field = serializers.CharField(max_length=50, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if "since" in attrs and "until" in attrs and attrs["since"] >= attrs["until"]:
+            raise serializers.ValidationError("since must be before until.")
+        return attrs
+
+
+class TelemetryBatchSerializer(serializers.Serializer):
+    samples = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=5000
+    )
+
+    def validate_samples(self, value):
+        """
+        Parse samples by hand, a nested serializer per row costs more than the
+        insert at thousands of samples per second.
+        """
+        states = set(Machine.Status.values)
+        machines = set(
+            Machine.objects.filter(
+                pk__in={
+                    row.get("machine")
+                    for row in value
+                    if isinstance(row.get("machine"), int)
+                }
+            ).values_list("pk", flat=True)
+        )
+
+        samples, errors = [], []
+        for row in value:
+            row_errors = {}
+            if row.get("machine") not in machines:
+                row_errors["machine"] = [f'Invalid pk "{row.get("machine")}".']
+
+            recorded_at = row.get("recorded_at")
+            try:
+                recorded_at = parse_datetime(recorded_at)
+            except (TypeError, ValueError):
+                recorded_at = None
+            if recorded_at is None:
+                row_errors["recorded_at"] = ["A valid ISO 8601 datetime is required."]
+            elif timezone.is_naive(recorded_at):
+                recorded_at = timezone.make_aware(recorded_at)
+
+            cycle_count = row.get("cycle_count")
+            if cycle_count is not None and (
+                not isinstance(cycle_count, int) or cycle_count < 0
+            ):
+                row_errors["cycle_count"] = ["Must be a non-negative integer."]
+
+            spindle_load = row.get("spindle_load")
+            if spindle_load is not None and (
+                isinstance(spindle_load, bool)
+                or not isinstance(spindle_load, (int, float))
+            ):
+                row_errors["spindle_load"] = ["Must be a number."]
+
+            state = row.get("state")
+            if state is not None and state not in states:
+                row_errors["state"] = [f'"{state}" is not a valid choice.']
+
+            errors.append(row_errors)
+            if not row_errors:
+                samples.append(
+                    TelemetrySample(
+                        machine_id=row["machine"],
+                        # !Bucket on UTC so every client lands in the same minute / hour
+                        recorded_at=recorded_at.astimezone(dt_timezone.utc),
+                        cycle_count=cycle_count,
+                        spindle_load=spindle_load,
+                        state=state,
+                    )
+                )
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return samples
+
+
+class TelemetryQuerySerializer(serializers.Serializer):
+    resolution = serializers.ChoiceField(choices=["raw", "1m", "1h"], default="raw")
+    machine = serializers.IntegerField(min_value=1, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if "since" in attrs and "until" in attrs and attrs["since"] >= attrs["until"]:
+            raise serializers.ValidationError("since must be before until.")
+        return attrs
+
+
+class TelemetrySampleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TelemetrySample
+        exclude = ["day"]
+
+
+class TelemetryRollupSerializer(serializers.ModelSerializer):
+    load_avg = serializers.FloatField(read_only=True)
+    cycles = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TelemetryRollup
+        fields = [
+            "id",
+            "machine",
+            "resolution",
+            "bucket_start",
+            "samples",
+            "load_avg",
+            "load_max",
+            "cycles",
+            "cycle_count_min",
+            "cycle_count_max",
+            "last_state",
+        ]
+
+
 class MaterialSerializer(serializers.ModelSerializer):
     class Meta:
         model = Material
@@ -50,6 +333,12 @@ class MaterialSerializer(serializers.ModelSerializer):
         extra_kwargs = {"updated_at": {"read_only": True}}
 
 
+class LowStockMaterialSerializer(MaterialSerializer):
+    shortfall = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+
+
 class SupplierSerializer(serializers.ModelSerializer):
     class Meta:
         model = Supplier
@@ -69,6 +358,8 @@ class OrderSerializer(serializers.ModelSerializer):
             "updated_at": {"read_only": True},
             "created_by": {"read_only": True},
         }
+        # !Relations read by the method fields below
+        select_related_fields = ["supplier", "created_by"]
 
     def get_supplier_name(self, obj):
         return obj.supplier.name if obj.supplier else None
@@ -77,6 +368,14 @@ class OrderSerializer(serializers.ModelSerializer):
         return obj.created_by.username if obj.created_by else None
 
 
+class OrderReceiveSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
 class OrderMaterialSerializer(serializers.ModelSerializer):
     material_name = serializers.SerializerMethodField()
 
@@ -84,11 +383,73 @@ class OrderMaterialSerializer(serializers.ModelSerializer):
         model = OrderMaterial
         fields = "__all__"
         extra_kwargs = {"total_price": {"read_only": True}}
+        select_related_fields = ["material"]
 
     def get_material_name(self, obj):
         return obj.material.name if obj.material else None
 
 
+class OrderMaterialLineSerializer(serializers.Serializer):
+    material = serializers.IntegerField(min_value=1)
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class OrderMaterialBulkSerializer(serializers.Serializer):
+    order = serializers.PrimaryKeyRelatedField(queryset=Order.objects.all())
+    items = OrderMaterialLineSerializer(many=True, allow_empty=False, max_length=1000)
+
+    def validate(self, attrs):
+        # !Check every line against the materials table and the order in two queries
+        items = attrs["items"]
+        material_ids = {item["material"] for item in items}
+        materials = Material.objects.in_bulk(material_ids)
+        existing = set(
+            OrderMaterial.objects.filter(
+                order=attrs["order"], material_id__in=material_ids
+            ).values_list("material_id", flat=True)
+        )
+
+        seen, errors = set(), []
+        for item in items:
+            material_id = item["material"]
+            if material_id not in materials:
+                errors.append({"material": [f'Invalid pk "{material_id}".']})
+            elif material_id in existing or material_id in seen:
+                errors.append({"material": ["Material is already on this order."]})
+            else:
+                errors.append({})
+            seen.add(material_id)
+
+        if any(errors):
+            raise serializers.ValidationError({"items": errors})
+
+        attrs["materials"] = materials
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        order, materials = validated_data["order"], validated_data["materials"]
+        lines = [
+            OrderMaterial(
+                order=order,
+                material=materials[item["material"]],
+                quantity=item["quantity"],
+                unit_price=item["unit_price"],
+                total_price=item["quantity"] * item["unit_price"],
+            )
+            for item in validated_data["items"]
+        ]
+        OrderMaterial.objects.bulk_create(lines)
+
+        # !One UPDATE for the whole batch instead of re-summing per line
+        added = sum(line.total_price for line in lines)
+        Order.objects.filter(pk=order.pk).update(
+            total=F("total") + added, updated_at=timezone.now()
+        )
+        return lines
+
+
 class ProductionLineSerializer(serializers.ModelSerializer):
     workshop_name = serializers.StringRelatedField(source="workshop", read_only=True)
     machine_name = serializers.StringRelatedField(source="machine", read_only=True)
@@ -125,6 +486,54 @@ class ProductionScheduleSerializer(serializers.ModelSerializer):
         }
 
 
+class ProductionDemandSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0.01")
+    )
+    due_date = serializers.DateTimeField()
+
+
+class ProductionPlanSerializer(serializers.Serializer):
+    demands = ProductionDemandSerializer(many=True, allow_empty=False, max_length=10000)
+    production_lines = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        # !Resolve every product and line in one query each
+        products = Product.objects.in_bulk(
+            {demand["product"] for demand in attrs["demands"]}
+        )
+        errors = [
+            (
+                {}
+                if demand["product"] in products
+                else {"product": [f'Invalid pk "{demand["product"]}".']}
+            )
+            for demand in attrs["demands"]
+        ]
+        if any(errors):
+            raise serializers.ValidationError({"demands": errors})
+
+        for demand in attrs["demands"]:
+            demand["product"] = products[demand["product"]]
+
+        lines = ProductionLine.objects.filter(
+            operational_status=ProductionLine.OperationalStatus.ACTIVE,
+            production_capacity__gt=0,
+        )
+        if "production_lines" in attrs:
+            lines = lines.filter(pk__in=attrs["production_lines"])
+        attrs["lines"] = list(lines.select_related("workshop"))
+        if not attrs["lines"]:
+            raise serializers.ValidationError(
+                {"production_lines": ["No active production line with capacity."]}
+            )
+        return attrs
+
+
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
@@ -162,7 +571,219 @@ class LaborAllocationSerializer(serializers.ModelSerializer):
         extra_kwargs = {"updated_at": {"read_only": True}}
 
 
+class LaborAllocationRowSerializer(serializers.Serializer):
+    employee = serializers.IntegerField(min_value=1)
+    project = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    task = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    production_line = serializers.IntegerField(
+        min_value=1, required=False, allow_null=True
+    )
+    hours_allocated = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0")
+    )
+    date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        for target in LaborAllocation.TARGET_FIELDS:
+            attrs.setdefault(target, None)
+        attrs.setdefault("date", timezone.localdate())
+
+        if not any(attrs[target] for target in LaborAllocation.TARGET_FIELDS):
+            raise serializers.ValidationError(
+                "At least one of project, task, or production line must be specified."
+            )
+        return attrs
+
+
+class LaborAllocationBulkSerializer(serializers.Serializer):
+    allocations = LaborAllocationRowSerializer(
+        many=True, allow_empty=False, max_length=5000
+    )
+    upsert = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        rows, upsert = attrs["allocations"], attrs["upsert"]
+        errors = [{} for _ in rows]
+
+        # !One query per related table for the whole batch
+        related = {
+            "employee": User,
+            "project": Project,
+            "task": Task,
+            "production_line": ProductionLine,
+        }
+        for field, model in related.items():
+            wanted = {row[field] for row in rows if row[field]}
+            found = set(
+                model.objects.filter(pk__in=wanted).values_list("pk", flat=True)
+            )
+            for row, row_errors in zip(rows, errors):
+                if row[field] and row[field] not in found:
+                    row_errors[field] = [f'Invalid pk "{row[field]}".']
+
+        # !One query per partial unique constraint, matched in memory
+        existing = {}
+        for target in LaborAllocation.TARGET_FIELDS:
+            keys = {
+                (row["employee"], row["date"], row[target])
+                for row, row_errors in zip(rows, errors)
+                if row[target] and not row_errors
+            }
+            if not keys:
+                continue
+            matches = LaborAllocation.objects.filter(
+                employee_id__in={key[0] for key in keys},
+                date__in={key[1] for key in keys},
+                **{f"{target}_id__in": {key[2] for key in keys}},
+            ).values_list("employee_id", "date", f"{target}_id", "pk")
+            existing[target] = {
+                (employee, date, value): pk
+                for employee, date, value, pk in matches
+                if (employee, date, value) in keys
+            }
+
+        seen, claimed = set(), set()
+        for row, row_errors in zip(rows, errors):
+            row["pk"] = None
+            if row_errors:
+                continue
+
+            keys = [
+                (target, row["employee"], row["date"], row[target])
+                for target in LaborAllocation.TARGET_FIELDS
+                if row[target]
+            ]
+            duplicate = next((key[0] for key in keys if key in seen), None)
+            matched = {
+                existing[key[0]][key[1:]]
+                for key in keys
+                if key[1:] in existing.get(key[0], {})
+            }
+            seen.update(keys)
+
+            if duplicate:
+                row_errors[duplicate] = [
+                    f"Duplicate {duplicate} allocation for this employee and date."
+                ]
+            elif matched and not upsert:
+                row_errors["non_field_errors"] = [
+                    "An allocation already exists for this employee and date."
+                ]
+            elif len(matched) > 1 or matched & claimed:
+                row_errors["non_field_errors"] = [
+                    "Allocation conflicts with more than one existing allocation."
+                ]
+            elif matched:
+                row["pk"] = matched.pop()
+                claimed.add(row["pk"])
+
+        if any(errors):
+            raise serializers.ValidationError({"allocations": errors})
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        fields = [*LaborAllocation.TARGET_FIELDS, "hours_allocated", "updated_at"]
+        updated_at = timezone.now()
+        allocations = [
+            LaborAllocation(
+                pk=row["pk"],
+                employee_id=row["employee"],
+                project_id=row["project"],
+                task_id=row["task"],
+                production_line_id=row["production_line"],
+                hours_allocated=row["hours_allocated"],
+                date=row["date"],
+                updated_at=updated_at,
+            )
+            for row in validated_data["allocations"]
+        ]
+        created = [allocation for allocation in allocations if allocation.pk is None]
+        updated = [allocation for allocation in allocations if allocation.pk]
+
+        replaced = LaborAllocation.objects.in_bulk(
+            [allocation.pk for allocation in updated]
+        ).values()
+
+        # !Conflicts were resolved above, partial unique indexes rule out ON CONFLICT
+        LaborAllocation.objects.bulk_create(created, batch_size=1000)
+        LaborAllocation.objects.bulk_update(updated, fields, batch_size=500)
+        record_allocation_changes(
+            [allocation_row(allocation) for allocation in replaced],
+            [allocation_row(allocation) for allocation in allocations],
+        )
+        bump_model_version(LaborAllocation)
+        return created, updated
+
+
+class LaborUtilizationQuerySerializer(serializers.Serializer):
+    group_by = serializers.ChoiceField(
+        choices=[*LaborUtilizationRollup.Dimension.values, "department"]
+    )
+    period = serializers.ChoiceField(
+        choices=LaborUtilizationRollup.Period.choices,
+        default=LaborUtilizationRollup.Period.WEEK,
+    )
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    key = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        return attrs
+
+
+class OEEQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if "since" in attrs and "until" in attrs and attrs["since"] >= attrs["until"]:
+            raise serializers.ValidationError("since must be before until.")
+        return attrs
+
+
 class SkillMatrixSerializer(serializers.ModelSerializer):
     class Meta:
         model = SkillMatrix
         fields = "__all__"
+
+
+class SkillTermField(serializers.CharField):
+    "NAME or NAME:LEVEL, the level defaults to the lowest"
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        name, _, level = value.rpartition(":")
+        if not name or level.upper() not in SkillMatrix.SkillLevel.values:
+            name, level = value, SkillMatrix.SkillLevel.BEGINNER
+        return name.strip(), level.upper()
+
+
+class SkillMatchQuerySerializer(serializers.Serializer):
+    skill = serializers.ListField(child=SkillTermField(), required=False)
+    category = serializers.ListField(child=SkillTermField(), required=False)
+    match = serializers.ChoiceField(choices=["all", "any"], default="all")
+    after = serializers.IntegerField(min_value=0, required=False)
+    page_size = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+
+    def validate_category(self, value):
+        value = [(category.upper(), level) for category, level in value]
+        invalid = [
+            category
+            for category, _ in value
+            if category not in SkillMatrix.SkillCategory.values
+        ]
+        if invalid:
+            raise serializers.ValidationError(
+                f"Invalid categories: {', '.join(invalid)}."
+            )
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get("skill") and not attrs.get("category"):
+            raise serializers.ValidationError(
+                "At least one skill or category is required."
+            )
+        return attrs
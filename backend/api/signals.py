@@ -0,0 +1,101 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from .labor_rollup import allocation_row, record_allocation_changes
+from .project_graph import invalidate_project_graph
+from .response_cache import bump_model_version
+from django.dispatch import receiver
+from django.apps import apps
+from .models import LaborAllocation, SkillMatrix, Task
+from .skill_index import get_skill_index
+from django.db import transaction
+from functools import partial
+
+CACHED_APPS = ("api", "main")
+
+# !Append-only / derived tables, no cached response reads them and leaving them
+# !without delete receivers keeps retention deletes on the fast path
+UNVERSIONED_MODELS = (
+    "api.LaborUtilizationRollup",
+    "api.StateTransition",
+    "api.TelemetrySample",
+    "api.TelemetryRollup",
+)
+
+# TODO: Response cache invalidation
+
+
+def model_changed(sender, **kwargs):
+    bump_model_version(sender)
+
+
+for app_label in CACHED_APPS:
+    for model in apps.get_app_config(app_label).get_models():
+        if model._meta.label not in UNVERSIONED_MODELS:
+            post_save.connect(model_changed, sender=model)
+            post_delete.connect(model_changed, sender=model)
+
+
+@receiver(m2m_changed)
+def relation_changed(sender, instance, model, action, **kwargs):
+    if action.startswith("post_"):
+        for changed in {sender, type(instance), model}:
+            bump_model_version(changed)
+
+
+# TODO: Project graph cache invalidation
+
+
+@receiver(pre_save, sender=Task)
+def task_moving_project(sender, instance, **kwargs):
+    if not instance._state.adding and instance.has_changed("project"):
+        invalidate_project_graph(instance.previous("project"))
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    invalidate_project_graph(instance.project_id)
+
+
+@receiver(m2m_changed, sender=Task.dependencies.through)
+def task_dependencies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    project_ids = {instance.project_id}
+    if reverse:
+        # !The instance is the dependency, the edited tasks may live elsewhere
+        dependents = (
+            instance.dependent_tasks.all()
+            if action == "pre_clear"
+            else Task.objects.filter(pk__in=pk_set)
+        )
+        project_ids |= set(dependents.values_list("project_id", flat=True))
+    invalidate_project_graph(*project_ids)
+
+
+# TODO: Labor utilization rollup maintenance
+
+
+@receiver(post_save, sender=LaborAllocation)
+def allocation_saved(sender, instance, created, **kwargs):
+    removed = [] if created else [allocation_row(instance, previous=True)]
+    record_allocation_changes(removed, [allocation_row(instance)])
+
+
+@receiver(post_delete, sender=LaborAllocation)
+def allocation_deleted(sender, instance, **kwargs):
+    record_allocation_changes([allocation_row(instance, previous=True)])
+
+
+# TODO: Skill index maintenance
+
+
+@receiver(post_save, sender=SkillMatrix)
+def skill_saved(sender, instance, **kwargs):
+    values = (instance.employee_id, instance.name, instance.category, instance.level)
+    transaction.on_commit(partial(get_skill_index().apply, instance.pk, values))
+
+
+@receiver(post_delete, sender=SkillMatrix)
+def skill_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(get_skill_index().apply, instance.pk))
@@ -0,0 +1,193 @@
+from .response_cache import get_model_versions, versions_shared
+from collections import defaultdict
+from functools import reduce
+import threading
+import time
+
+# !Seconds, other workers' writes never bump a per process version counter
+LOCAL_TIMEOUT = 10
+
+# TODO: In memory skill matching index
+
+
+class SkillIndex:
+    """
+    Inverted index over SkillMatrix, one bitset (an int, bit = employee pk) per
+    skill name / category and minimum level.
+
+    - skills[name][level] holds employees with that skill at level or above ☑️
+    - categories[category][level] holds employees with any skill of the category at level or above ☑️
+    - Rows changed in this process are applied in place, others trigger a rebuild ☑️
+    - On a per process cache the index is also rebuilt after LOCAL_TIMEOUT, the only way writes made by other workers reach it ☑️
+    """
+
+    def __init__(self):
+        from .models import SkillMatrix
+
+        self.model = SkillMatrix
+        self.levels = {level: rank for rank, level in enumerate(SkillMatrix.SkillLevel)}
+        self.lock = threading.Lock()
+        self.version = None
+        self.built_at = None
+        self.rows = {}  # !pk -> (employee, name, category, level rank)
+        self.employee_rows = defaultdict(set)
+        self.skills = {}
+        self.categories = {}
+
+    def _bitsets(self, index, key):
+        if key not in index:
+            index[key] = [0] * len(self.levels)
+        return index[key]
+
+    def _set(self, bitsets, employee, rank):
+        "Set the employee's bit up to rank, clear it above"
+        bit = 1 << employee
+        for level in range(len(bitsets)):
+            if level <= rank:
+                bitsets[level] |= bit
+            else:
+                bitsets[level] &= ~bit
+
+    def _reindex_category(self, employee, category):
+        ranks = [
+            self.rows[pk][3]
+            for pk in self.employee_rows[employee]
+            if self.rows[pk][2] == category
+        ]
+        self._set(
+            self._bitsets(self.categories, category), employee, max(ranks, default=-1)
+        )
+
+    def _remove(self, pk):
+        if pk not in self.rows:
+            return
+        employee, name, category, _ = self.rows.pop(pk)
+        self.employee_rows[employee].discard(pk)
+        self._set(self._bitsets(self.skills, name), employee, -1)
+        self._reindex_category(employee, category)
+
+    def _add(self, pk, employee, name, category, level):
+        row = (employee, name.casefold(), category, self.levels[level])
+        self.rows[pk] = row
+        self.employee_rows[employee].add(pk)
+        self._set(self._bitsets(self.skills, row[1]), employee, row[3])
+        self._reindex_category(employee, category)
+
+    def rebuild(self):
+        "Load every SkillMatrix row in one query"
+        version = get_model_versions([self.model])[0]
+        rows = self.model.objects.values_list(
+            "pk", "employee_id", "name", "category", "level"
+        )
+
+        with self.lock:
+            self.rows, self.employee_rows = {}, defaultdict(set)
+            skills, categories = defaultdict(set), {}
+
+            for pk, employee, name, category, level in rows.iterator():
+                row = (employee, name.casefold(), category, self.levels[level])
+                self.rows[pk] = row
+                self.employee_rows[employee].add(pk)
+                skills[row[1], row[3]].add(employee)
+                categories[employee, category] = max(
+                    categories.get((employee, category), -1), row[3]
+                )
+
+            by_category = defaultdict(set)
+            for (employee, category), rank in categories.items():
+                by_category[category, rank].add(employee)
+
+            # !Build each bitset in one pass instead of shifting per row
+            self.skills = self._cumulative(skills)
+            self.categories = self._cumulative(by_category)
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def _cumulative(self, members):
+        "Turn {(key, rank): employee ids} into key -> [bitset per minimum level]"
+        index = {}
+        for (key, rank), employees in members.items():
+            buffer = bytearray(max(employees) // 8 + 1)
+            for employee in employees:
+                buffer[employee >> 3] |= 1 << (employee & 7)
+            bits = int.from_bytes(buffer, "little")
+
+            bitsets = self._bitsets(index, key)
+            for level in range(rank + 1):
+                bitsets[level] |= bits
+        return index
+
+    def apply(self, pk, values=None):
+        """
+        Apply one committed SkillMatrix change, values is None for a delete.
+        Runs after the model version bump, so a gap means another process wrote
+        and shared the bump, unshared bumps are left to ensure_current().
+        """
+        version = get_model_versions([self.model])[0]
+        with self.lock:
+            if self.version is None:
+                return
+            if version != self.version + 1:
+                self.version = None  # !Missed changes, rebuild on the next query
+                return
+
+            self._remove(pk)
+            if values is not None:
+                self._add(pk, *values)
+            self.version = version
+
+    def ensure_current(self):
+        stale = self.version != get_model_versions([self.model])[0]
+        if not stale and not versions_shared():
+            stale = time.monotonic() - self.built_at >= LOCAL_TIMEOUT
+        if stale:
+            self.rebuild()
+
+    def match(self, skills=(), categories=(), match_all=True):
+        """
+        Bitset of employees matching (name, level) skill terms and
+        (category, level) category terms, all of them or any of them.
+        """
+        self.ensure_current()
+
+        with self.lock:
+            bitsets = [
+                self.skills.get(name.casefold(), [0] * len(self.levels))[
+                    self.levels[level]
+                ]
+                for name, level in skills
+            ] + [
+                self.categories.get(category, [0] * len(self.levels))[
+                    self.levels[level]
+                ]
+                for category, level in categories
+            ]
+
+        if not bitsets:
+            return 0
+        return reduce(int.__and__ if match_all else int.__or__, bitsets)
+
+
+def bitset_page(bits, after=None, size=100):
+    "Employee ids of the lowest set bits above after, and whether more remain"
+    if after is not None:
+        bits &= ~((1 << (after + 1)) - 1)
+
+    ids = []
+    while bits and len(ids) < size:
+        lowest = bits & -bits
+        ids.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return ids, bool(bits)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_skill_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SkillIndex()
+    return _index
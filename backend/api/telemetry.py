@@ -0,0 +1,143 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.conf import settings
+from datetime import timedelta
+
+# TODO: Machine telemetry ingestion and retention
+
+RESOLUTIONS = {
+    "1m": lambda moment: moment.replace(second=0, microsecond=0),
+    "1h": lambda moment: moment.replace(minute=0, second=0, microsecond=0),
+}
+
+
+def _extreme(pick, *values):
+    values = [value for value in values if value is not None]
+    return pick(values) if values else None
+
+
+def _merge(rollup, samples, load_samples, load_sum, load_max, cycles, state, at):
+    "Fold partial aggregates into a rollup, commutative so order does not matter"
+    rollup.samples += samples
+    rollup.load_samples += load_samples
+    rollup.load_sum += load_sum
+    rollup.load_max = _extreme(max, rollup.load_max, load_max)
+    rollup.cycle_count_min = _extreme(min, rollup.cycle_count_min, cycles[0])
+    rollup.cycle_count_max = _extreme(max, rollup.cycle_count_max, cycles[1])
+    if at is not None and (
+        rollup.last_recorded_at is None or at >= rollup.last_recorded_at
+    ):
+        rollup.last_state, rollup.last_recorded_at = state, at
+
+
+def fold_samples(samples):
+    "Aggregate a batch of TelemetrySample into unsaved rollups per bucket"
+    from .models import TelemetryRollup
+
+    rollups = {}
+    for sample in samples:
+        for resolution, truncate in RESOLUTIONS.items():
+            key = (sample.machine_id, resolution, truncate(sample.recorded_at))
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = TelemetryRollup(
+                    machine_id=key[0],
+                    resolution=resolution,
+                    bucket_start=key[2],
+                    samples=0,
+                    load_samples=0,
+                    load_sum=0.0,
+                )
+            has_load = sample.spindle_load is not None
+            _merge(
+                rollup,
+                1,
+                int(has_load),
+                sample.spindle_load if has_load else 0.0,
+                sample.spindle_load,
+                (sample.cycle_count, sample.cycle_count),
+                sample.state,
+                sample.recorded_at if sample.state is not None else None,
+            )
+    return rollups
+
+
+def _merge_rollups(rollups):
+    from .models import TelemetryRollup
+
+    existing = TelemetryRollup.objects.select_for_update().filter(
+        machine_id__in={key[0] for key in rollups},
+        resolution__in={key[1] for key in rollups},
+        bucket_start__in={key[2] for key in rollups},
+    )
+
+    changed = []
+    for stored in existing:
+        batch = rollups.pop(
+            (stored.machine_id, stored.resolution, stored.bucket_start), None
+        )
+        if batch is None:
+            continue
+        _merge(
+            stored,
+            batch.samples,
+            batch.load_samples,
+            batch.load_sum,
+            batch.load_max,
+            (batch.cycle_count_min, batch.cycle_count_max),
+            batch.last_state,
+            batch.last_recorded_at,
+        )
+        changed.append(stored)
+
+    # !Replacing the locked rows is far cheaper than bulk_update's CASE per field
+    TelemetryRollup.objects.filter(pk__in=[stored.pk for stored in changed]).delete()
+    for stored in changed:
+        stored.pk = None
+    TelemetryRollup.objects.bulk_create([*rollups.values(), *changed], batch_size=1000)
+
+
+def ingest_samples(samples):
+    """
+    Insert a batch of TelemetrySample and merge it into the rollups, one
+    bulk insert for the raw rows plus a read and two writes for the rollups.
+    """
+    from .models import TelemetrySample
+
+    for sample in samples:
+        sample.day = sample.recorded_at.date()
+
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                TelemetrySample.objects.bulk_create(samples, batch_size=1000)
+                _merge_rollups(fold_samples(samples))
+            return len(samples)
+        except IntegrityError:
+            # !A bucket was created concurrently, retry merges into it
+            for sample in samples:
+                sample.pk = None
+            if attempt == 2:
+                raise
+
+
+def prune_telemetry(now=None):
+    """
+    Apply the retention policy, raw samples by whole days and rollups by
+    bucket start. Returns the number of deleted rows per table.
+    """
+    from .models import TelemetryRollup, TelemetrySample
+
+    now = now or timezone.now()
+    retention = getattr(settings, "TELEMETRY_RETENTION_DAYS", {})
+    raw_cutoff = (now - timedelta(days=retention.get("raw", 7))).date()
+
+    deleted = {
+        "raw": TelemetrySample.objects.filter(day__lt=raw_cutoff).delete()[0],
+    }
+    for resolution, days in (("1m", 30), ("1h", 365)):
+        cutoff = now - timedelta(days=retention.get(resolution, days))
+        deleted[resolution] = TelemetryRollup.objects.filter(
+            resolution=resolution, bucket_start__lt=cutoff
+        ).delete()[0]
+    return deleted
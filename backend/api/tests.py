@@ -1,3 +1,1892 @@
-from django.test import TestCase
+from .models import (
+    LaborUtilizationRollup,
+    LaborAllocation,
+    ProductionLine,
+    SchedulerLease,
+    StateTransition,
+    SkillMatrix,
+    OrderMaterial,
+    ManufacturingProcess,
+    ProductionSchedule,
+    ProductProcess,
+    Product,
+    Material,
+    Supplier,
+    Order,
+    Department,
+    Workshop,
+    Machine,
+    Project,
+    Task,
+)
+from .labor_rollup import labor_utilization, rebuild_rollups
+from .production_planner import NoCapacityError, plan_production
+from .serializers import MachineSerializer, ProductionScheduleSerializer
+from .operator_expiry import OperatorExpiryScheduler
+from .mixins import get_eager_loading_lookups
+from .oee import compute_oee
+from .project_graph import DependencyCycleError, analyse_project, get_project_analysis
+from .response_cache import _version_key
+from .skill_index import bitset_page
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from django.test.utils import CaptureQueriesContext
+from django.db import DatabaseError, connection
+from django.db.models import F
+from .roles import reconcile_roles
+from django.utils import timezone
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from main.models import User
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from base64 import b64encode
+from contextlib import contextmanager
+from . import skill_index
+import tempfile
+import io
+import json
+import time
 
-# Create your tests here.
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(),
+    }
+}
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# TODO: Test helpers
+
+
+def make_user(number=1, **fields):
+    "User without a hashed password, PBKDF2 would dominate the suite"
+    return User.objects.create(
+        username=f"user{number}",
+        email=f"user{number}@example.com",
+        name=f"User {number}",
+        nic=f"{number:010d}",
+        mobile_no=f"07{number:08d}",
+        **fields,
+    )
+
+
+def make_workshop(number=1):
+    department = Department.objects.create(name=f"Department {number}")
+    return Workshop.objects.create(name=f"Workshop {number}", department=department)
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@contextmanager
+def recorded_transitions():
+    "Collect the StateTransition rows handed to the buffer, nothing is flushed"
+    events = []
+    with mock.patch("api.event_log.get_transition_buffer") as buffer:
+        buffer.return_value.add.side_effect = events.extend
+        yield events
+
+
+# TODO: Keyset pagination
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_user())
+        # !More rows than a page inside one millisecond, apart by microseconds
+        start = timezone.now().replace(microsecond=0)
+        StateTransition.objects.bulk_create(
+            StateTransition(
+                entity_type="machine",
+                entity_id=i,
+                field="status",
+                new_value="IDLE",
+                occurred_at=start + timedelta(microseconds=i),
+            )
+            for i in range(250)
+        )
+
+    def test_pages_cover_every_row_once(self):
+        seen, url = [], "/api/events/?page_size=100"
+        for _ in range(5):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row["entity_id"] for row in response.data["results"]]
+            url = response.data["next"]
+            if url is None:
+                break
+
+        self.assertIsNone(url)
+        self.assertEqual(seen, list(range(250)))
+
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get("/api/events/?page_size=100").data
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertEqual(back["results"], first["results"])
+
+    def test_tampered_cursor_is_not_found(self):
+        for position in (["abc", 1], ["2024-01-01T00:00:00", "x"], [None, 1], [1]):
+            cursor = b64encode(json.dumps({"p": position}).encode()).decode()
+            response = self.client.get(f"/api/events/?cursor={cursor}")
+            self.assertEqual(response.status_code, 404, position)
+
+        response = self.client.get("/api/events/?cursor=not-base64!")
+        self.assertEqual(response.status_code, 404)
+
+
+# TODO: Operator expiry scheduler
+
+
+class OperatorExpirySchedulerTests(TestCase):
+    def setUp(self):
+        self.machine = Machine.objects.create(name="Lathe", workshop=make_workshop())
+        # !Expired assignment, written with update() so nothing is scheduled
+        Machine.objects.filter(pk=self.machine.pk).update(
+            operator=make_user(),
+            operator_assigned_at=timezone.now() - timedelta(hours=9),
+            operator_auto_remove_at=timezone.now() - timedelta(hours=1),
+        )
+
+    def test_clears_expired_operators(self):
+        scheduler = OperatorExpiryScheduler()
+        scheduler._tick()
+
+        self.machine.refresh_from_db()
+        self.assertTrue(scheduler.is_leader)
+        self.assertIsNone(self.machine.operator_id)
+        self.assertIsNone(self.machine.operator_auto_remove_at)
+
+    def test_failed_first_sync_is_retried(self):
+        scheduler = OperatorExpiryScheduler()
+        with mock.patch.object(scheduler, "_sync", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                scheduler._tick()
+        self.assertFalse(scheduler.is_leader)
+
+        # !Still holding the lease, the next tick must sync instead of crashing
+        scheduler._tick()
+        self.machine.refresh_from_db()
+        self.assertTrue(scheduler.is_leader)
+        self.assertIsNotNone(scheduler._next_sync)
+        self.assertIsNone(self.machine.operator_id)
+
+    def test_single_leader(self):
+        leader, follower = OperatorExpiryScheduler(), OperatorExpiryScheduler()
+        leader._tick()
+        follower._tick()
+        self.assertTrue(leader.is_leader)
+        self.assertFalse(follower.is_leader)
+        self.assertEqual(SchedulerLease.objects.get().owner, leader.owner)
+
+        # !An expired lease is taken over
+        SchedulerLease.objects.update(expires_at=timezone.now())
+        follower._tick()
+        self.assertTrue(follower.is_leader)
+
+
+# TODO: Query parameter validation
+
+
+class StateTransitionQueryTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_user())
+        StateTransition.objects.create(
+            entity_type="machine", entity_id=7, field="status", new_value="IDLE"
+        )
+
+    def test_filters(self):
+        response = self.client.get("/api/events/?entity_type=machine&entity_id=7")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+
+        response = self.client.get("/api/events/?entity_id=8")
+        self.assertEqual(response.data["results"], [])
+
+    def test_malformed_params_are_bad_requests(self):
+        for query in (
+            "since=abc",
+            "until=2024-13-01",
+            "entity_id=x",
+            "entity_id=-1",
+            "since=2024-02-01T00:00:00Z&until=2024-01-01T00:00:00Z",
+        ):
+            response = self.client.get(f"/api/events/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+class TelemetryQueryTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_user())
+        self.machine = Machine.objects.create(name="Press", workshop=make_workshop())
+        response = self.client.post(
+            "/api/telemetry/",
+            {
+                "samples": [
+                    {
+                        "machine": self.machine.pk,
+                        "recorded_at": "2024-01-01T10:00:00Z",
+                        "spindle_load": 0.5,
+                    }
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_filters(self):
+        for resolution in ("raw", "1m", "1h"):
+            response = self.client.get(
+                f"/api/telemetry/?resolution={resolution}&machine={self.machine.pk}"
+                "&since=2024-01-01T00:00:00Z&until=2024-01-02T00:00:00Z"
+            )
+            self.assertEqual(response.status_code, 200, resolution)
+            self.assertEqual(len(response.data["results"]), 1, resolution)
+
+    def test_malformed_params_are_bad_requests(self):
+        for query in ("machine=x", "since=abc", "until=yesterday", "resolution=1d"):
+            response = self.client.get(f"/api/telemetry/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+# TODO: Labor utilization rollups
+
+
+class LaborRollupTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = make_user(1), make_user(2)
+        self.project = Project.objects.create(name="Retrofit")
+        self.task = Task.objects.create(name="Wiring", project=self.project)
+        self.line = ProductionLine.objects.create(
+            name="Line 1", workshop=make_workshop()
+        )
+
+    def snapshot(self):
+        return sorted(
+            LaborUtilizationRollup.objects.values_list(
+                "dimension", "key", "period", "period_start", "hours", "allocations"
+            )
+        )
+
+    def assertMatchesRebuild(self):
+        "The incrementally maintained buckets equal a rebuild from scratch"
+        incremental = self.snapshot()
+        self.assertTrue(incremental)
+        rebuild_rollups()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_saves_and_deletes(self):
+        moved = LaborAllocation.objects.create(
+            employee=self.alice,
+            project=self.project,
+            date=date(2024, 1, 31),
+            hours_allocated=Decimal("4.00"),
+        )
+        reassigned = LaborAllocation.objects.create(
+            employee=self.alice,
+            task=self.task,
+            project=self.project,
+            date=date(2024, 2, 1),
+            hours_allocated=Decimal("2.50"),
+        )
+        deleted = LaborAllocation.objects.create(
+            employee=self.bob,
+            production_line=self.line,
+            date=date(2024, 2, 5),
+            hours_allocated=Decimal("8.00"),
+        )
+
+        # !Across a month and a week boundary, to another employee, then gone
+        moved.date, moved.hours_allocated = date(2024, 2, 2), Decimal("6.00")
+        moved.save()
+        reassigned.employee = self.bob
+        reassigned.save()
+        deleted.delete()
+
+        self.assertMatchesRebuild()
+        self.assertEqual(
+            labor_utilization("project", "month"),
+            [
+                {
+                    "key": self.project.pk,
+                    "name": "Retrofit",
+                    "period_start": date(2024, 2, 1),
+                    "hours": Decimal("8.50"),
+                    "allocations": 2,
+                }
+            ],
+        )
+
+    def test_bulk_upsert(self):
+        client = api_client(self.alice)
+        rows = [
+            {
+                "employee": self.alice.pk,
+                "production_line": self.line.pk,
+                "date": "2024-03-01",
+                "hours_allocated": "8",
+            },
+            {
+                "employee": self.bob.pk,
+                "task": self.task.pk,
+                "date": "2024-03-01",
+                "hours_allocated": "3",
+            },
+        ]
+        url = "/api/labor-allocation/bulk/"
+        response = client.post(url, {"allocations": rows}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        rows[0]["hours_allocated"] = "5"
+        rows.append({**rows[1], "date": "2024-03-04"})
+        response = client.post(url, {"allocations": rows}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["updated"]), 2)
+
+        self.assertMatchesRebuild()
+
+
+# TODO: Bulk timesheet
+
+
+class LaborAllocationBulkTests(TestCase):
+    url = "/api/labor-allocation/bulk/"
+
+    def setUp(self):
+        self.alice, self.bob = make_user(1), make_user(2)
+        self.client = api_client(self.alice)
+        self.project = Project.objects.create(name="Retrofit")
+        self.task = Task.objects.create(name="Wiring", project=self.project)
+        self.line = ProductionLine.objects.create(
+            name="Line 1", workshop=make_workshop()
+        )
+
+    def post(self, rows, **data):
+        return self.client.post(self.url, {"allocations": rows, **data}, format="json")
+
+    def hours(self):
+        return sorted(
+            LaborAllocation.objects.values_list(
+                "employee_id", "project_id", "task_id", "hours_allocated"
+            )
+        )
+
+    def test_errors_are_reported_per_row(self):
+        valid = {
+            "employee": self.alice.pk,
+            "project": self.project.pk,
+            "hours_allocated": "4",
+        }
+        # !Malformed rows are rejected before any lookups
+        response = self.post(
+            [valid, {"employee": self.bob.pk, "hours_allocated": "-1"}]
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["allocations"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ["hours_allocated"])
+
+        response = self.post([valid, {"employee": self.bob.pk, "hours_allocated": "4"}])
+        self.assertEqual(list(response.data["allocations"][1]), ["non_field_errors"])
+
+        # !Unknown pks and duplicates inside the batch, aligned with the input
+        rows = [
+            valid,
+            {**valid, "employee": 999},
+            {"employee": self.bob.pk, "task": 999, "hours_allocated": "4"},
+            {**valid, "hours_allocated": "2"},
+        ]
+        response = self.post(rows)
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["allocations"]
+        self.assertEqual(len(errors), len(rows))
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ["employee"])
+        self.assertEqual(list(errors[2]), ["task"])
+        self.assertEqual(list(errors[3]), ["project"])
+        self.assertEqual(LaborAllocation.objects.count(), 0)
+
+    def test_upsert(self):
+        existing = LaborAllocation.objects.create(
+            employee=self.alice,
+            project=self.project,
+            date=date(2024, 3, 4),
+            hours_allocated=Decimal("1.00"),
+        )
+        rows = [
+            {
+                "employee": self.alice.pk,
+                "project": self.project.pk,
+                "date": "2024-03-04",
+                "hours_allocated": "6",
+            },
+            {
+                "employee": self.bob.pk,
+                "task": self.task.pk,
+                "date": "2024-03-04",
+                "hours_allocated": "3",
+            },
+        ]
+
+        response = self.post(rows, upsert=False)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data["allocations"][0]), ["non_field_errors"])
+        self.assertEqual(response.data["allocations"][1], {})
+
+        response = self.post(rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["updated"], [existing.pk])
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual(
+            self.hours(),
+            [
+                (self.alice.pk, self.project.pk, None, Decimal("6.00")),
+                (self.bob.pk, None, self.task.pk, Decimal("3.00")),
+            ],
+        )
+
+    def test_row_matching_two_allocations_is_rejected(self):
+        for target in ({"project": self.project}, {"task": self.task}):
+            LaborAllocation.objects.create(
+                employee=self.alice, date=date(2024, 3, 4), **target
+            )
+        response = self.post(
+            [
+                {
+                    "employee": self.alice.pk,
+                    "project": self.project.pk,
+                    "task": self.task.pk,
+                    "date": "2024-03-04",
+                    "hours_allocated": "6",
+                }
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(
+            "more than one", response.data["allocations"][0]["non_field_errors"][0]
+        )
+
+    def test_queries_do_not_grow_with_rows(self):
+        def rows(days):
+            return [
+                {
+                    "employee": employee.pk,
+                    "project": self.project.pk,
+                    "production_line": self.line.pk,
+                    "date": str(date(2024, 3, 1) + timedelta(days=day)),
+                    "hours_allocated": "8",
+                }
+                for employee in (self.alice, self.bob)
+                for day in range(days)
+            ]
+
+        self.assertEqual(self.post(rows(1)).status_code, 201)
+        # !Both batches create and update, only the row count differs
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.post(rows(2)).status_code, 201)
+        with self.assertNumQueries(len(few)):
+            response = self.post(rows(20))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            (len(response.data["created"]), len(response.data["updated"])), (36, 4)
+        )
+
+
+# TODO: Maintenance planning
+
+
+class MaintenancePlanTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_user())
+        self.today = timezone.localdate()
+        workshop = make_workshop()
+
+        def machine(name, status, last, next):
+            return Machine.objects.create(
+                name=name,
+                workshop=workshop,
+                status=status,
+                last_maintenance_date=self.today + timedelta(days=last),
+                next_maintenance_date=self.today + timedelta(days=next),
+            )
+
+        self.overdue = machine("Overdue", "OPERATIONAL", -95, -5)
+        self.later = machine("Later", "OPERATIONAL", -10, 80)
+        self.serviced = machine("Serviced", "MAINTENANCE", -90, 3)
+        self.broken = machine("Broken", "BROKEN", -10, 80)
+
+        # !One breakdown of a day since the last maintenance
+        now = timezone.now()
+        StateTransition.objects.bulk_create(
+            StateTransition(
+                entity_type="machine",
+                entity_id=self.overdue.pk,
+                field="status",
+                old_value=old,
+                new_value=new,
+                occurred_at=now - timedelta(days=days),
+            )
+            for old, new, days in (
+                ("OPERATIONAL", "BROKEN", 10),
+                ("BROKEN", "OPERATIONAL", 9),
+            )
+        )
+
+    def plan_ids(self, **query):
+        return [
+            row["id"]
+            for workshop in self.client.get("/api/machines/maintenance/", query).data[
+                "workshops"
+            ]
+            for row in workshop["machines"]
+        ]
+
+    def test_due_machines(self):
+        response = self.client.get("/api/machines/maintenance/", {"within": 7})
+        self.assertEqual(response.status_code, 200)
+        (workshop,) = response.data["workshops"]
+        self.assertEqual(workshop["overdue"], 1)
+        self.assertEqual(workshop["due"], 0)
+
+        (row,) = workshop["machines"]
+        self.assertEqual(row["id"], self.overdue.pk)
+        self.assertEqual(row["days_until_due"], -5)
+        self.assertEqual(row["breakdowns_since_maintenance"], 1)
+        # !Since midnight 95 days ago, less the day spent broken
+        self.assertGreaterEqual(row["run_hours_since_maintenance"], 94 * 24)
+        self.assertLessEqual(row["run_hours_since_maintenance"], 95 * 24)
+        self.assertGreater(row["risk_score"], 0)
+
+    def test_min_risk_adds_risky_machines_not_due(self):
+        ids = self.plan_ids(within=7, min_risk=99)
+        self.assertEqual(set(ids), {self.overdue.pk, self.broken.pk})
+        # !Highest risk first, a broken machine scores 100
+        self.assertEqual(ids[0], self.broken.pk)
+
+    def test_window_includes_machines_due_soon(self):
+        # !Machines under maintenance are never listed, broken ones are when due
+        self.assertEqual(
+            set(self.plan_ids(within=90)),
+            {self.overdue.pk, self.later.pk, self.broken.pk},
+        )
+
+    def test_malformed_params_are_bad_requests(self):
+        for query in ({"within": "x"}, {"within": -1}, {"min_risk": 101}):
+            response = self.client.get("/api/machines/maintenance/", query)
+            self.assertEqual(response.status_code, 400, query)
+
+
+# TODO: Skill matching index
+
+
+class SkillIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()  # !Versions bumped by other tests never committed here
+        skill_index._index = None
+        self.alice, self.bob, self.carol = make_user(1), make_user(2), make_user(3)
+        for employee, name, category, level in (
+            (self.alice, "Welding", "MECHANICAL", "EXPERT"),
+            (self.alice, "Python", "SOFTWARE", "BEGINNER"),
+            (self.bob, "Welding", "MECHANICAL", "INTERMEDIATE"),
+            (self.carol, "PLC Wiring", "ELECTRICAL", "ADVANCED"),
+        ):
+            SkillMatrix.objects.create(
+                employee=employee, name=name, category=category, level=level
+            )
+
+    def tearDown(self):
+        skill_index._index = None
+
+    def match(self, skills=(), categories=(), match_all=True):
+        bits = skill_index.get_skill_index().match(skills, categories, match_all)
+        return set(bitset_page(bits, size=1000)[0])
+
+    def test_match_all_and_any(self):
+        terms = [("welding", "BEGINNER"), ("Python", "BEGINNER")]
+        self.assertEqual(self.match(terms), {self.alice.pk})
+        self.assertEqual(
+            self.match(terms, match_all=False), {self.alice.pk, self.bob.pk}
+        )
+        self.assertEqual(
+            self.match(
+                [("Welding", "BEGINNER")], [("ELECTRICAL", "BEGINNER")], match_all=False
+            ),
+            {self.alice.pk, self.bob.pk, self.carol.pk},
+        )
+        self.assertEqual(self.match([("Forklift", "BEGINNER")]), set())
+
+    def test_minimum_level(self):
+        # !A level matches itself and every level above it
+        self.assertEqual(
+            self.match([("Welding", "INTERMEDIATE")]), {self.alice.pk, self.bob.pk}
+        )
+        self.assertEqual(self.match([("Welding", "ADVANCED")]), {self.alice.pk})
+        self.assertEqual(self.match([], [("MECHANICAL", "EXPERT")]), {self.alice.pk})
+        self.assertEqual(self.match([], [("SOFTWARE", "INTERMEDIATE")]), set())
+
+    def test_applies_saves_and_deletes_in_place(self):
+        self.match([("Welding", "BEGINNER")])  # !Builds the index
+
+        with self.captureOnCommitCallbacks(execute=True):
+            skill = SkillMatrix.objects.get(employee=self.bob, name="Welding")
+            skill.level = "EXPERT"
+            skill.save()
+            SkillMatrix.objects.create(
+                employee=self.carol, name="Welding", category="MECHANICAL"
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.match([("Welding", "EXPERT")]), {self.alice.pk, self.bob.pk}
+            )
+            self.assertEqual(
+                self.match([("Welding", "BEGINNER")]),
+                {self.alice.pk, self.bob.pk, self.carol.pk},
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SkillMatrix.objects.filter(
+                employee=self.alice, name="Welding"
+            ).get().delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.match([], [("MECHANICAL", "EXPERT")]), {self.bob.pk})
+
+    def test_missed_shared_write_rebuilds(self):
+        self.match([("Welding", "BEGINNER")])
+
+        # !Another worker wrote and bumped the shared counter, no signal ran here
+        SkillMatrix.objects.filter(employee=self.bob).delete()
+        cache.incr(_version_key(SkillMatrix))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.match([("Welding", "BEGINNER")]), {self.alice.pk})
+
+    def test_unshared_write_is_seen_after_timeout(self):
+        self.match([("Welding", "BEGINNER")])
+
+        # !Another worker wrote, its bump stayed in its own per process cache
+        SkillMatrix.objects.filter(employee=self.bob).delete()
+        self.assertEqual(
+            self.match([("Welding", "BEGINNER")]), {self.alice.pk, self.bob.pk}
+        )
+
+        later = time.monotonic() + skill_index.LOCAL_TIMEOUT
+        with mock.patch("api.skill_index.time.monotonic", return_value=later):
+            self.assertEqual(self.match([("Welding", "BEGINNER")]), {self.alice.pk})
+
+    def test_match_endpoint(self):
+        response = api_client(self.alice).get(
+            "/api/skill-matrix/match/",
+            {"skill": ["Welding:advanced", "PLC Wiring"], "match": "any"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            [user["id"] for user in response.data["results"]],
+            [self.alice.pk, self.carol.pk],
+        )
+
+
+# TODO: Conditional GET
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.supplier = Supplier.objects.create(name="Acme", email="sales@acme.test")
+        self.order = Order.objects.create(supplier=self.supplier, created_by=self.user)
+        self.material = Material.objects.create(
+            name="Steel", unit_of_measurement="kg", quantity=5, reorder_level=1
+        )
+
+    def revalidate(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_not_modified(self):
+        for url in ("/api/order/", f"/api/order/{self.order.pk}/", "/api/material/"):
+            self.assertEqual(self.revalidate(url).status_code, 304, url)
+
+    def test_modified_after_a_write(self):
+        etag = self.client.get("/api/order/")["ETag"]
+        with recorded_transitions(), self.captureOnCommitCallbacks(execute=True):
+            self.order.status = "ORDERED"
+            self.order.save()
+
+        response = self.client.get("/api/order/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["status"], "ORDERED")
+
+    def test_modified_after_a_related_write(self):
+        etag = self.client.get(f"/api/order/{self.order.pk}/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.supplier.name = "Acme Steel"
+            self.supplier.save()
+
+        response = self.client.get(
+            f"/api/order/{self.order.pk}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["supplier_name"], "Acme Steel")
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_no_validators_for_related_models_on_a_local_cache(self):
+        # !Another worker's supplier write would never change this worker's ETag
+        response = self.client.get("/api/order/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+        # !Views rendering no related model keep answering 304
+        self.assertEqual(self.revalidate("/api/material/").status_code, 304)
+
+
+# TODO: Production planning
+
+
+class ProductionPlannerTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        workshop = make_workshop()
+        self.fast = ProductionLine.objects.create(
+            name="Fast", workshop=workshop, production_capacity=10
+        )
+        self.slow = ProductionLine.objects.create(
+            name="Slow", workshop=workshop, production_capacity=5
+        )
+        self.routed = Product.objects.create(name="Gearbox", code="GB1")
+        self.plain = Product.objects.create(name="Bracket", code="BR1")
+        for sequence, minutes in enumerate((20, 40), start=1):
+            ProductProcess.objects.create(
+                product=self.routed,
+                sequence=sequence,
+                process=ManufacturingProcess.objects.create(
+                    name=f"Step {sequence}",
+                    description="",
+                    standard_time=timedelta(minutes=minutes),
+                ),
+            )
+        self.release = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def demand(self, product, quantity, due_in_days):
+        return {
+            "product": product,
+            "quantity": Decimal(quantity),
+            "due_date": self.release + timedelta(days=due_in_days),
+        }
+
+    def booked(self, line, start_hours, end_hours, **fields):
+        ProductionSchedule.objects.create(
+            production_line=line,
+            product=self.plain,
+            start_time=self.release + timedelta(hours=start_hours),
+            end_time=(
+                None if end_hours is None else self.release + timedelta(hours=end_hours)
+            ),
+            created_by=self.user,
+            **fields,
+        )
+
+    def plan(self, demands, lines=None):
+        return plan_production(
+            demands,
+            created_by=self.user,
+            lines=lines or [self.fast, self.slow],
+            release=self.release,
+            commit=False,
+        )
+
+    def hours(self, schedule):
+        return (
+            (schedule.start_time - self.release) / timedelta(hours=1),
+            (schedule.end_time - self.release) / timedelta(hours=1),
+        )
+
+    def test_routing_time_plus_quantity_over_capacity(self):
+        (schedule,) = self.plan([self.demand(self.routed, 20, 1)])
+        # !One hour of routing, then 20 units at 10 an hour
+        self.assertEqual(schedule.production_line, self.fast)
+        self.assertEqual(self.hours(schedule), (0, 3))
+
+    def test_earliest_due_date_first_on_the_line_finishing_soonest(self):
+        late, early = self.demand(self.routed, 20, 5), self.demand(self.routed, 20, 2)
+        first, second = self.plan([late, early])
+
+        self.assertEqual(
+            (first.production_line, self.hours(first)), (self.fast, (0, 3))
+        )
+        # !3h to 6h on the fast line loses to 0h to 5h on the slow one
+        self.assertEqual(
+            (second.production_line, self.hours(second)), (self.slow, (0, 5))
+        )
+
+    def test_fills_gaps_before_the_tail(self):
+        self.booked(self.fast, 4, 10)
+        self.booked(self.fast, 1, 2, status="COMPLETED")  # !Not holding the line
+
+        schedules = self.plan(
+            [
+                self.demand(self.routed, 20, 1),  # !3h, fits the 0h to 4h gap
+                self.demand(self.routed, 10, 2),  # !2h, only the tail is long enough
+                self.demand(self.plain, 5, 3),  # !30m, fits what is left of the gap
+            ],
+            lines=[self.fast],
+        )
+        self.assertEqual(
+            [self.hours(schedule) for schedule in schedules],
+            [(0, 3), (10, 12), (3, 3.5)],
+        )
+
+    def test_open_ended_schedule_holds_the_line(self):
+        self.booked(self.fast, -1, None, status="IN_PROGRESS")
+        (schedule,) = self.plan([self.demand(self.plain, 10, 1)])
+        self.assertEqual(schedule.production_line, self.slow)
+
+        with self.assertRaises(NoCapacityError):
+            self.plan([self.demand(self.plain, 10, 1)], lines=[self.fast])
+
+    def test_open_ended_schedule_leaves_the_gap_before_it(self):
+        self.booked(self.fast, 5, None)
+        schedules = self.plan(
+            [self.demand(self.routed, 20, 1), self.demand(self.routed, 20, 2)]
+        )
+        self.assertEqual(
+            [
+                (schedule.production_line, self.hours(schedule))
+                for schedule in schedules
+            ],
+            [(self.fast, (0, 3)), (self.slow, (0, 5))],
+        )
+
+    def test_dry_run(self):
+        client = api_client(self.user)
+        payload = {
+            "demands": [
+                {
+                    "product": self.routed.pk,
+                    "quantity": "20",
+                    "due_date": self.release.isoformat(),
+                }
+            ],
+            "production_lines": [self.fast.pk],
+        }
+        url = "/api/production-schedule/plan/"
+
+        response = client.post(url, {**payload, "dry_run": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse(ProductionSchedule.objects.exists())
+
+        response = client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ProductionSchedule.objects.get().production_line, self.fast)
+
+        # !The committed schedule now holds the line for the next plan
+        response = client.post(url, {**payload, "dry_run": True}, format="json")
+        self.assertEqual(
+            response.data[0]["start_time"],
+            ProductionSchedule.objects.get()
+            .end_time.isoformat()
+            .replace("+00:00", "Z"),
+        )
+
+
+# TODO: Overall equipment effectiveness
+
+
+class OEETests(TestCase):
+    def setUp(self):
+        self.since = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.until = self.since + timedelta(hours=10)
+        user = make_user()
+        first, second = make_workshop(1), make_workshop(2)
+
+        def machine(name, workshop, status):
+            return Machine.objects.create(name=name, workshop=workshop, status=status)
+
+        self.m1 = machine("M1", first, "OPERATIONAL")
+        self.m2 = machine("M2", first, "IDLE")
+        self.m3 = machine("M3", first, "OPERATIONAL")  # !Created mid-range
+        self.m4 = machine("M4", second, "IDLE")  # !No transitions at all
+
+        def at(hours):
+            return self.since + timedelta(hours=hours)
+
+        StateTransition.objects.bulk_create(
+            StateTransition(
+                entity_type="machine",
+                entity_id=machine.pk,
+                field="status",
+                old_value=old,
+                new_value=new,
+                occurred_at=at(hours),
+            )
+            for machine, hours, old, new in (
+                (self.m1, -1, "IDLE", "OPERATIONAL"),
+                (self.m1, 6, "OPERATIONAL", "BROKEN"),
+                (self.m1, 8, "BROKEN", "OPERATIONAL"),
+                (self.m2, 2, "OPERATIONAL", "MAINTENANCE"),
+                (self.m2, 4, "MAINTENANCE", "IDLE"),
+                (self.m3, 5, None, "OPERATIONAL"),
+                (self.m4, 12, "IDLE", "OPERATIONAL"),  # !After the range
+            )
+        )
+
+        # !Six minutes of standard time per unit
+        product = Product.objects.create(name="Gearbox", code="GB1")
+        ProductProcess.objects.create(
+            product=product,
+            process=ManufacturingProcess.objects.create(
+                name="Assembly", description="", standard_time=timedelta(minutes=6)
+            ),
+        )
+        self.l1 = ProductionLine.objects.create(name="L1", workshop=first)
+        self.l1.machines.set([self.m1, self.m2])
+        self.l2 = ProductionLine.objects.create(name="L2", workshop=first)
+        self.l2.machines.set([self.m3])
+
+        for line, quantity, status, end in (
+            (self.l1, 40, "COMPLETED", 9),
+            (self.l2, 20, "COMPLETED", 7),
+            (self.l1, 500, "COMPLETED", 11),  # !Finished after the range
+            (self.l1, 500, "IN_PROGRESS", 9),
+        ):
+            ProductionSchedule.objects.create(
+                production_line=line,
+                product=product,
+                quantity=quantity,
+                status=status,
+                start_time=at(0),
+                end_time=at(end),
+                created_by=user,
+            )
+
+    def assertOEE(self, row, planned, run, ideal, oee):
+        hour = 3600
+        self.assertAlmostEqual(row["planned_seconds"], planned * hour)
+        self.assertAlmostEqual(row["run_seconds"], run * hour)
+        self.assertAlmostEqual(row["ideal_seconds"], ideal * hour)
+        for field, expected in (
+            ("availability", run / planned if planned else None),
+            ("performance", ideal / run if run else None),
+            ("oee", oee),
+        ):
+            if expected is None:
+                self.assertIsNone(row[field], field)
+            else:
+                self.assertAlmostEqual(row[field], expected, msg=field)
+
+    def test_machines(self):
+        machines = {
+            row["id"]: row for row in compute_oee(self.since, self.until)["machines"]
+        }
+        # !Broken for 2h, all 10h planned
+        self.assertOEE(machines[self.m1.pk], 10, 8, 2, 0.2)
+        # !Maintenance is not planned time, the line's output is split evenly
+        self.assertOEE(machines[self.m2.pk], 8, 2, 2, 0.25)
+        # !Time before it existed is not planned either
+        self.assertOEE(machines[self.m3.pk], 5, 5, 2, 0.4)
+        # !Current status over the whole range, no run time so no OEE
+        self.assertOEE(machines[self.m4.pk], 10, 0, 0, None)
+        self.assertEqual(machines[self.m4.pk]["availability"], 0)
+
+    def test_lines_and_workshops(self):
+        result = compute_oee(self.since, self.until)
+        lines = {row["id"]: row for row in result["production_lines"]}
+        self.assertEqual(lines[self.l1.pk]["units"], 40)
+        self.assertOEE(lines[self.l1.pk], 18, 10, 4, 4 / 18)
+        self.assertEqual(lines[self.l2.pk]["units"], 20)
+        self.assertOEE(lines[self.l2.pk], 5, 5, 2, 0.4)
+
+        first, second = result["workshops"]
+        self.assertOEE(first, 23, 15, 6, 6 / 23)
+        self.assertOEE(second, 10, 0, 0, None)
+
+    def test_query_count_does_not_grow_with_machines(self):
+        with self.assertNumQueries(7):
+            compute_oee(self.since, self.until)
+
+        workshop = Workshop.objects.first()
+        Machine.objects.bulk_create(
+            Machine(name=f"Extra {number}", workshop=workshop) for number in range(50)
+        )
+        with self.assertNumQueries(7):
+            self.assertEqual(len(compute_oee(self.since, self.until)["machines"]), 54)
+
+    def test_endpoint(self):
+        client = api_client(make_user(2))
+        response = client.get(
+            "/api/analytics/oee/",
+            {"since": self.since.isoformat(), "until": self.until.isoformat()},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["machines"]), 4)
+
+        response = client.get(
+            "/api/analytics/oee/",
+            {"since": self.until.isoformat(), "until": self.since.isoformat()},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+# TODO: Eager loading
+
+
+class EagerLoadingTests(TestCase):
+    def test_str_related_fields_are_not_followed_past_the_rendered_str(self):
+        # !ProductionLine.__str__ reads workshop.name, not str(workshop)
+        select, prefetch = get_eager_loading_lookups(ProductionScheduleSerializer)
+        self.assertEqual(
+            select, ["product", "production_line", "production_line__workshop"]
+        )
+        self.assertEqual(prefetch, [])
+
+        # !Workshop.__str__ does render its department
+        select, _ = get_eager_loading_lookups(MachineSerializer)
+        self.assertIn("workshop__department", select)
+
+    def add_rows(self, first, last):
+        "One row per listed model for numbers first to last, each with its relations"
+        for number in range(first, last + 1):
+            user = make_user(number)
+            workshop = make_workshop(number)
+            machine = Machine.objects.create(
+                name=f"Machine {number}", workshop=workshop, operator=user
+            )
+            line = ProductionLine.objects.create(
+                name=f"Line {number}", workshop=workshop
+            )
+            line.machines.add(machine)
+            product = Product.objects.create(
+                name=f"Product {number}", code=f"P{number}"
+            )
+            process = ManufacturingProcess.objects.create(
+                name=f"Process {number}",
+                description="",
+                standard_time=timedelta(minutes=5),
+            )
+            ProductProcess.objects.create(product=product, process=process)
+            ProductionSchedule.objects.create(
+                production_line=line, product=product, created_by=user
+            )
+            supplier = Supplier.objects.create(
+                name=f"Supplier {number}",
+                email=f"sales{number}@example.com",
+                phone=f"01{number:08d}",
+            )
+            order = Order.objects.create(supplier=supplier, created_by=user)
+            material = Material.objects.create(
+                name=f"Material {number}", unit_of_measurement="kg"
+            )
+            OrderMaterial.objects.create(
+                order=order, material=material, quantity=1, unit_price=2
+            )
+            project = Project.objects.create(
+                name=f"Project {number}", project_manager=user
+            )
+            task = Task.objects.create(
+                name=f"Task {number}", project=project, assigned_to=user
+            )
+            task.dependencies.set(
+                Task.objects.filter(project=project).exclude(pk=task.pk)
+            )
+            LaborAllocation.objects.create(
+                employee=user, task=task, project=project, date=date(2024, 1, number)
+            )
+            SkillMatrix.objects.create(employee=user, name="Welding")
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        # !Count and page, plus one per prefetched many side
+        expected = {
+            "/api/machines/": 2,
+            "/api/machine/": 2,
+            "/api/order/": 2,
+            "/api/order/item/": 2,
+            "/api/production/": 3,
+            "/api/production-schedule/": 2,
+            "/api/product-process/": 2,
+            "/api/project/": 3,
+            "/api/task/": 3,
+            "/api/labor-allocation/": 3,
+            "/api/skill-matrix/": 2,
+        }
+        client = api_client(make_user(100))
+
+        for rows in ((1, 2), (3, 8)):
+            self.add_rows(*rows)
+            for url, queries in expected.items():
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+                self.assertEqual(len(response.data["results"]), rows[1], url)
+
+
+# TODO: Stock posting
+
+
+class StockPostingTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.supplier = Supplier.objects.create(name="Acme", email="sales@acme.test")
+        self.steel = Material.objects.create(
+            name="Steel", unit_of_measurement="kg", quantity=10
+        )
+        self.bolts = Material.objects.create(name="Bolts", unit_of_measurement="pcs")
+
+    def order(self, lines, status="ORDERED"):
+        order = Order.objects.create(
+            supplier=self.supplier, created_by=self.user, status=status
+        )
+        for material, quantity in lines:
+            OrderMaterial.objects.create(
+                order=order, material=material, quantity=quantity, unit_price=1
+            )
+        return order
+
+    def stock(self):
+        return [
+            material.quantity
+            for material in Material.objects.filter(
+                pk__in=[self.steel.pk, self.bolts.pk]
+            ).order_by("name")
+        ]
+
+    def test_receiving_an_order_posts_its_stock_once(self):
+        order = self.order([(self.steel, 5), (self.bolts, 100)])
+
+        order.status = "RECEIVED"
+        # !Savepoint, order UPDATE, line aggregate, one UPDATE per material, release
+        with self.assertNumQueries(6):
+            order.save()
+        self.assertEqual(self.stock(), [Decimal("100"), Decimal("15")])
+
+        order.save()  # !Already received, nothing posted again
+        self.assertEqual(self.stock(), [Decimal("100"), Decimal("15")])
+
+    def test_bulk_receive(self):
+        first = self.order([(self.steel, 5), (self.bolts, 100)])
+        second = self.order([(self.steel, Decimal("2.5"))])
+        cancelled = self.order([(self.steel, 1)], status="CANCELLED")
+        received = self.order([(self.steel, 1)], status="RECEIVED")
+
+        # !Updates per material, not per order line
+        with self.assertNumQueries(7):
+            response = api_client(self.user).post(
+                "/api/order/receive/",
+                {"order_ids": [first.pk, second.pk, cancelled.pk, received.pk, 999]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data["received"]), [first.pk, second.pk])
+        self.assertEqual(
+            response.data["skipped"], sorted([cancelled.pk, received.pk, 999])
+        )
+        self.assertEqual(self.stock(), [Decimal("100"), Decimal("17.5")])
+        self.assertEqual(
+            set(Order.objects.values_list("status", flat=True)),
+            {"RECEIVED", "CANCELLED"},
+        )
+
+
+# TODO: Low stock flag
+
+
+class LowStockTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.supplier = Supplier.objects.create(name="Acme", email="sales@acme.test")
+        self.steel = Material.objects.create(
+            name="Steel", quantity=10, reorder_level=10
+        )
+        self.bolts = Material.objects.create(name="Bolts", quantity=5, reorder_level=2)
+        self.paint = Material.objects.create(name="Paint", quantity=0, reorder_level=4)
+
+    def flags(self):
+        return dict(Material.objects.values_list("name", "is_low_stock"))
+
+    def test_flag_is_generated_by_the_database(self):
+        self.assertEqual(self.flags(), {"Bolts": False, "Paint": True, "Steel": True})
+
+        # !Stock postings are F() updates, the flag follows without a save()
+        order = Order.objects.create(supplier=self.supplier, created_by=self.user)
+        OrderMaterial.objects.create(
+            order=order, material=self.steel, quantity=1, unit_price=1
+        )
+        order.status = "RECEIVED"
+        order.save()
+        Material.objects.filter(pk=self.bolts.pk).update(reorder_level=F("quantity"))
+        self.assertEqual(self.flags(), {"Bolts": True, "Paint": True, "Steel": False})
+
+    def test_feed(self):
+        client = api_client(self.user)
+        # !ETag validator, page count, page, all on the partial index
+        with self.assertNumQueries(3):
+            response = client.get("/api/material/low-stock/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (row["name"], row["is_low_stock"], row["shortfall"])
+                for row in response.data["results"]
+            ],
+            [("Paint", True, "4.00"), ("Steel", True, "0.00")],
+        )
+
+        self.steel.quantity = 25
+        self.steel.save()
+        response = client.get("/api/material/low-stock/")
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Paint"])
+
+    def test_flag_is_read_only(self):
+        response = api_client(self.user).patch(
+            f"/api/material/{self.bolts.pk}/", {"is_low_stock": True}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["is_low_stock"])
+        self.assertEqual(self.flags()["Bolts"], False)
+
+
+# TODO: Order totals
+
+
+class OrderTotalTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        supplier = Supplier.objects.create(name="Acme", email="sales@acme.test")
+        self.order, self.other = (
+            Order.objects.create(supplier=supplier, created_by=self.user)
+            for _ in range(2)
+        )
+        self.steel, self.bolts, self.resin = (
+            Material.objects.create(name=name, unit_of_measurement="kg")
+            for name in ("Steel", "Bolts", "Resin")
+        )
+
+    def totals(self):
+        return [
+            Order.objects.get(pk=order.pk).total for order in (self.order, self.other)
+        ]
+
+    def test_line_saves_and_deletes_shift_the_total(self):
+        steel = OrderMaterial.objects.create(
+            order=self.order, material=self.steel, quantity=2, unit_price=Decimal("10")
+        )
+        bolts = OrderMaterial.objects.create(
+            order=self.order,
+            material=self.bolts,
+            quantity=100,
+            unit_price=Decimal("0.5"),
+        )
+        self.assertEqual(steel.total_price, Decimal("20"))
+        self.assertEqual(self.totals(), [Decimal("70"), Decimal("0")])
+
+        # !The line and a single F() update of the total, no re-sum of the lines
+        steel.quantity = 3
+        with self.assertNumQueries(4):
+            steel.save()
+        self.assertEqual(self.totals(), [Decimal("80"), Decimal("0")])
+
+        bolts.order = self.other
+        bolts.save()
+        self.assertEqual(self.totals(), [Decimal("30"), Decimal("50")])
+
+        steel.delete()
+        self.assertEqual(self.totals(), [Decimal("0"), Decimal("50")])
+
+    def test_bulk_lines(self):
+        OrderMaterial.objects.create(
+            order=self.order, material=self.steel, quantity=1, unit_price=5
+        )
+        client = api_client(self.user)
+        url = "/api/order/item/bulk/"
+
+        response = client.post(
+            url,
+            {
+                "order": self.order.pk,
+                "items": [
+                    {"material": self.bolts.pk, "quantity": "10", "unit_price": "2"},
+                    {"material": self.steel.pk, "quantity": "1", "unit_price": "1"},
+                    {"material": 999, "quantity": "1", "unit_price": "1"},
+                    {"material": self.bolts.pk, "quantity": "1", "unit_price": "1"},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [set(errors) for errors in response.data["items"]],
+            [set(), {"material"}, {"material"}, {"material"}],
+        )
+        self.assertEqual(self.totals(), [Decimal("5"), Decimal("0")])
+
+        payload = {
+            "order": self.order.pk,
+            "items": [
+                {"material": self.bolts.pk, "quantity": "10", "unit_price": "2"},
+                {"material": self.resin.pk, "quantity": "3", "unit_price": "1.5"},
+            ],
+        }
+        # !Order, materials and existing lines, then one insert and one total UPDATE
+        with self.assertNumQueries(7):
+            response = client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [line["total_price"] for line in response.data], ["20.00", "4.50"]
+        )
+        self.assertEqual(self.totals(), [Decimal("29.5"), Decimal("0")])
+
+
+# TODO: Field tracking
+
+
+class FieldTrackingTests(TestCase):
+    def setUp(self):
+        self.operator = make_user()
+        self.workshop = make_workshop()
+        Machine.objects.create(name="Lathe", workshop=self.workshop)
+        self.machine = Machine.objects.get()
+
+    def test_no_select_before_save(self):
+        self.machine.status = "OPERATIONAL"
+        self.assertEqual(self.machine.changed_fields, {"status"})
+        with self.assertNumQueries(1):
+            self.machine.save()
+
+        self.assertFalse(self.machine.changed_fields)
+        self.assertEqual(self.machine.previous("status"), "OPERATIONAL")
+
+        department = Department.objects.get()
+        department.description = "Machining"
+        with self.assertNumQueries(1):  # !No manager change, no role reconciling
+            department.save()
+
+    def test_unloaded_instance_reads_the_row_once(self):
+        machine = Machine(pk=self.machine.pk, name="Lathe", workshop=self.workshop)
+        machine._state.adding = False
+        with self.assertNumQueries(1):
+            self.assertEqual(machine.previous("status"), "IDLE")
+            self.assertEqual(machine.previous("name"), "Lathe")
+
+    def test_new_operator_is_stamped_in_the_same_update(self):
+        before = timezone.now()
+        self.machine.operator = self.operator
+        with self.assertNumQueries(1):
+            self.machine.save(update_fields=["operator"])
+
+        machine = Machine.objects.get()
+        self.assertEqual(machine.operator, self.operator)
+        self.assertGreaterEqual(machine.operator_assigned_at, before)
+        self.assertEqual(
+            machine.operator_auto_remove_at - machine.operator_assigned_at,
+            timedelta(hours=8),
+        )
+
+        # !Saving the same operator again keeps the window
+        machine.name = "Lathe 2"
+        machine.save()
+        self.assertEqual(
+            Machine.objects.get().operator_auto_remove_at,
+            machine.operator_auto_remove_at,
+        )
+
+    def test_assign_operator_action(self):
+        response = api_client(self.operator).post(
+            f"/api/machines/{self.machine.pk}/assign_operator/",
+            {"operator_id": self.operator.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        machine = Machine.objects.get()
+        self.assertEqual(machine.operator_id, self.operator.pk)
+        self.assertEqual(
+            machine.operator_auto_remove_at - machine.operator_assigned_at,
+            timedelta(hours=8),
+        )
+
+
+# TODO: Role reconciliation
+
+
+class RoleReconciliationTests(TestCase):
+    def setUp(self):
+        self.alice = make_user(1)
+        self.assembly = make_workshop(1)  # !Workshop 1 of Department 1
+        self.paint = make_workshop(2)
+
+    def role(self, user):
+        user = User.objects.get(pk=user.pk)
+        return user.role, user.department_id
+
+    def test_latest_assignment_wins(self):
+        department = self.assembly.department
+        department.supervisor = self.alice
+        department.save()
+        self.assertEqual(self.role(self.alice), ("SUPERVISOR", department.pk))
+
+        self.paint.manager = self.alice
+        self.paint.save()
+        self.assertEqual(self.role(self.alice), ("MANAGER", self.paint.department_id))
+
+        # !Only the order of the assignments counts, not the order of the calls
+        now = timezone.now()
+        Department.objects.filter(pk=department.pk).update(updated_at=now)
+        Workshop.objects.filter(pk=self.paint.pk).update(
+            updated_at=now - timedelta(days=1)
+        )
+        reconcile_roles({self.alice.pk})
+        self.assertEqual(self.role(self.alice), ("SUPERVISOR", department.pk))
+
+        # !Giving up a role falls back to what is still held, then to OPERATOR
+        department.supervisor = None
+        department.save()
+        self.assertEqual(self.role(self.alice), ("MANAGER", self.paint.department_id))
+        self.paint.manager = None
+        self.paint.save()
+        self.assertEqual(self.role(self.alice), ("OPERATOR", None))
+
+    def test_admins_are_left_alone(self):
+        User.objects.filter(pk=self.alice.pk).update(role="ADMIN")
+        self.paint.manager = self.alice
+        self.paint.save()
+        self.assertEqual(self.role(self.alice), ("ADMIN", None))
+
+    def test_bulk_reassignment(self):
+        client = api_client(make_user(99))
+        users = [make_user(number) for number in range(2, 8)]
+        workshops = [make_workshop(number) for number in range(3, 8)]
+
+        def payload(supervisor, count):
+            return {
+                "departments": [
+                    {
+                        "department": self.assembly.department_id,
+                        "supervisor": supervisor,
+                    }
+                ],
+                "workshops": [{"workshop": self.assembly.pk, "manager": self.alice.pk}]
+                + [
+                    {"workshop": workshop.pk, "manager": user.pk}
+                    for workshop, user in zip(workshops[:count], users[:count])
+                ],
+            }
+
+        with CaptureQueriesContext(connection) as few:
+            response = client.post(
+                "/api/role-reassignment/", payload(self.alice.pk, 1), format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        # !Both written with the same timestamp, supervisor wins the tie
+        self.assertEqual(
+            self.role(self.alice), ("SUPERVISOR", self.assembly.department_id)
+        )
+        self.assertEqual(self.role(users[0]), ("MANAGER", workshops[0].department_id))
+
+        # !Moving five managers costs the same queries as moving one
+        users.reverse()
+        with self.assertNumQueries(len(few)):
+            response = client.post(
+                "/api/role-reassignment/", payload(None, 5), format="json"
+            )
+        self.assertEqual(
+            self.role(self.alice), ("MANAGER", self.assembly.department_id)
+        )
+        self.assertEqual(
+            [self.role(user) for user in users[:5]],
+            [("MANAGER", workshop.department_id) for workshop in workshops[:5]],
+        )
+        self.assertEqual(self.role(users[5]), ("OPERATOR", None))
+
+
+# TODO: Task dependency graph
+
+
+class ProjectGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(name="Line upgrade")
+        # !a -> b -> d and a -> c -> d, start_date is always today
+        self.a, self.b, self.c, self.d = (
+            self.task(name, days)
+            for name, days in (("a", 2), ("b", 3), ("c", 1), ("d", 1))
+        )
+        self.b.dependencies.add(self.a)
+        self.c.dependencies.add(self.a)
+        self.d.dependencies.add(self.b, self.c)
+
+    def task(self, name, days):
+        # !clean() compares against start_date, only filled in by the insert
+        task = Task.objects.create(name=name, project=self.project)
+        task.end_date = task.start_date + timedelta(days=days - 1)
+        task.save()
+        return task
+
+    def test_order_and_critical_path(self):
+        analysis = analyse_project(self.project.pk)
+        a, b, c, d = self.a.pk, self.b.pk, self.c.pk, self.d.pk
+        self.assertEqual(analysis["order"], [a, b, c, d])
+        self.assertEqual(analysis["duration"], 6)
+        self.assertEqual(analysis["critical_path"], [a, b, d])
+
+        tasks = {task["id"]: task for task in analysis["tasks"]}
+        self.assertEqual(
+            (tasks[c]["earliest_start"], tasks[c]["latest_start"], tasks[c]["slack"]),
+            (2, 4, 2),
+        )
+        self.assertFalse(tasks[c]["critical"])
+        self.assertEqual(tasks[d]["earliest_finish"], 6)
+
+    def test_actual_end_date_overrides_plan(self):
+        Task.objects.filter(pk=self.c.pk).update(
+            actual_end_date=date.today() + timedelta(days=4)
+        )
+        analysis = analyse_project(self.project.pk)
+        self.assertEqual(analysis["duration"], 8)
+        self.assertEqual(analysis["critical_path"], [self.a.pk, self.c.pk, self.d.pk])
+
+    def test_cycle_is_rejected(self):
+        self.a.dependencies.add(self.d)
+        with self.assertRaises(DependencyCycleError) as raised:
+            analyse_project(self.project.pk)
+        self.assertEqual(
+            raised.exception.task_ids, [self.a.pk, self.b.pk, self.c.pk, self.d.pk]
+        )
+
+        response = api_client(make_user()).get(
+            f"/api/project/{self.project.pk}/critical-path/"
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["cycle"], raised.exception.task_ids)
+
+    def test_endpoint(self):
+        response = api_client(make_user()).get(
+            f"/api/project/{self.project.pk}/critical-path/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["start_date"], self.project.start_date)
+        self.assertEqual(
+            response.data["critical_path"], [self.a.pk, self.b.pk, self.d.pk]
+        )
+
+    def test_cache_invalidation(self):
+        first = get_project_analysis(self.project.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_project_analysis(self.project.pk), first)
+
+        # !New edge, c now waits for b
+        self.c.dependencies.add(self.b)
+        self.assertEqual(get_project_analysis(self.project.pk)["duration"], 7)
+
+        # !Reverse side of the relation
+        self.b.dependent_tasks.remove(self.c)
+        self.assertEqual(get_project_analysis(self.project.pk)["duration"], 6)
+
+        # !Task edits
+        self.b.end_date = date.today()
+        self.b.save()
+        self.assertEqual(
+            get_project_analysis(self.project.pk)["critical_path"],
+            [self.a.pk, self.b.pk, self.d.pk],
+        )
+        self.assertEqual(get_project_analysis(self.project.pk)["duration"], 4)
+
+        # !Moving a task away invalidates the project it left
+        other = Project.objects.create(name="Other")
+        get_project_analysis(other.pk)
+        self.d.project = other
+        self.d.save()
+        self.assertNotIn(self.d.pk, get_project_analysis(self.project.pk)["order"])
+        self.assertEqual(get_project_analysis(other.pk)["order"], [self.d.pk])
+
+        self.c.delete()
+        self.assertEqual(
+            get_project_analysis(self.project.pk)["order"], [self.a.pk, self.b.pk]
+        )
+
+
+# TODO: Bulk operator assignment
+
+
+class MachineBulkAssignTests(TestCase):
+    url = "/api/machines/bulk_assign/"
+
+    def setUp(self):
+        self.alice, self.bob = make_user(1), make_user(2)
+        self.client = api_client(self.alice)
+        workshop = make_workshop()
+        self.machines = [
+            Machine.objects.create(name=f"Lathe {number}", workshop=workshop)
+            for number in range(6)
+        ]
+        Machine.objects.filter(pk=self.machines[0].pk).update(operator=self.alice)
+
+    def post(self, assignments):
+        return self.client.post(self.url, {"assignments": assignments}, format="json")
+
+    def operators(self):
+        return list(
+            Machine.objects.order_by("pk").values_list("operator_id", flat=True)
+        )
+
+    def test_assigns_and_records_transitions(self):
+        assignments = [
+            {"machine": self.machines[0].pk, "operator": self.alice.pk},
+            {"machine": self.machines[1].pk, "operator": self.bob.pk},
+        ]
+        before = timezone.now()
+        with recorded_transitions() as events, self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            response = self.post(assignments)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["operator"] for row in response.data], [self.alice.pk, self.bob.pk]
+        )
+        self.assertEqual(
+            self.operators(), [self.alice.pk, self.bob.pk, None, None, None, None]
+        )
+
+        # !Every assignment restarts its shift window
+        for machine in Machine.objects.filter(operator__isnull=False):
+            self.assertGreaterEqual(machine.operator_assigned_at, before)
+            self.assertEqual(
+                machine.operator_auto_remove_at - machine.operator_assigned_at,
+                timedelta(hours=8),
+            )
+
+        # !Keeping the same operator is not a transition
+        self.assertEqual(
+            [
+                (event.entity_type, event.entity_id, event.field, event.old_value)
+                for event in events
+            ],
+            [("machine", self.machines[1].pk, "operator", None)],
+        )
+        self.assertEqual(events[0].new_value, str(self.bob.pk))
+
+    def test_errors_are_reported_per_row(self):
+        response = self.post(
+            [
+                {"machine": self.machines[1].pk, "operator": self.bob.pk},
+                {"machine": 999, "operator": self.bob.pk},
+                {"machine": self.machines[2].pk, "operator": 999},
+                {"machine": self.machines[1].pk, "operator": self.alice.pk},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["assignments"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ["machine"])
+        self.assertEqual(list(errors[2]), ["operator"])
+        self.assertIn("more than once", errors[3]["machine"][0])
+        self.assertEqual(self.operators(), [self.alice.pk] + [None] * 5)
+
+        response = self.post([])
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_do_not_grow_with_machines(self):
+        def assignments(machines, operator):
+            return [
+                {"machine": machine.pk, "operator": operator.pk} for machine in machines
+            ]
+
+        with CaptureQueriesContext(connection) as few:
+            self.post(assignments(self.machines[:1], self.bob))
+        with self.assertNumQueries(len(few)):
+            response = self.post(assignments(self.machines, self.alice))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.operators(), [self.alice.pk] * 6)
+
+
+# TODO: Dashboard summary
+
+
+class DashboardSummaryTests(TestCase):
+    url = "/api/dashboard/summary/"
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        workshop = make_workshop(1)
+        make_workshop(2)
+        Workshop.objects.filter(pk=workshop.pk).update(operational_status="MAINTENANCE")
+        self.operator = make_user(1)
+        self.lathe = Machine.objects.create(
+            name="Lathe",
+            workshop=workshop,
+            status="OPERATIONAL",
+            next_maintenance_date=self.today,
+        )
+        Machine.objects.create(name="Press", workshop=workshop, status="BROKEN")
+        Machine.objects.create(
+            name="Drill",
+            workshop=workshop,
+            next_maintenance_date=self.today + timedelta(days=1),
+        )
+        Material.objects.create(name="Steel", quantity=10, reorder_level=2)
+        Material.objects.create(name="Bolts", quantity=1, reorder_level=5)
+        Material.objects.create(name="Paint", quantity=0, reorder_level=5)
+        Supplier.objects.create(name="Acme", email="sales@acme.test")
+
+    def summary(self, role):
+        user = make_user(User.Role.values.index(role) + 10, role=role)
+        response = api_client(user).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts_per_role(self):
+        machines = {
+            "total": 3,
+            "operational": 1,
+            "idle": 1,
+            "maintenance": 0,
+            "broken": 1,
+            "maintenance_due": 1,
+        }
+        workshops = {"total": 2, "active": 1, "maintenance": 1, "inactive": 0}
+        departments = {"total": 2, "without_supervisor": 2}
+        materials = {"total": 3, "in_stock": 2, "low_stock": 1, "out_of_stock": 1}
+        suppliers = {"total": 1}
+
+        everything = {
+            "machines": machines,
+            "workshops": workshops,
+            "departments": departments,
+            "materials": materials,
+            "suppliers": suppliers,
+        }
+        for role in ("ADMIN", "MANAGER"):
+            self.assertEqual(self.summary(role), {"role": role, **everything})
+        self.assertEqual(
+            self.summary("SUPERVISOR"),
+            {"role": "SUPERVISOR", "machines": machines, "workshops": workshops},
+        )
+        self.assertEqual(
+            self.summary("TECHNICIAN"), {"role": "TECHNICIAN", "machines": machines}
+        )
+        self.assertEqual(
+            self.summary("PURCHASING"),
+            {"role": "PURCHASING", "materials": materials, "suppliers": suppliers},
+        )
+
+    def test_operator_sees_their_machine(self):
+        client = api_client(self.operator)
+        self.assertEqual(
+            client.get(self.url).data, {"role": "OPERATOR", "assigned_machine": None}
+        )
+
+        Machine.objects.filter(pk=self.lathe.pk).update(operator=self.operator)
+        self.assertEqual(
+            client.get(self.url).data["assigned_machine"],
+            {"id": self.lathe.pk, "name": "Lathe", "operator_auto_remove_at": None},
+        )
+
+    def test_sections_are_cached_until_a_write(self):
+        client = api_client(make_user(2, role="ADMIN"))
+        client.get(self.url)
+        with self.assertNumQueries(0):
+            response = client.get(self.url)
+        self.assertEqual(response.data["suppliers"], {"total": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Supplier.objects.create(
+                name="Bolt Co", email="sales@bolt.test", phone="0112345678"
+            )
+        # !Only the section whose model changed is counted again
+        with self.assertNumQueries(1):
+            response = client.get(self.url)
+        self.assertEqual(response.data["suppliers"], {"total": 2})
+        self.assertEqual(response.data["machines"]["total"], 3)
+
+
+# TODO: Synthetic plant seeding
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SeedFactoryTests(TestCase):
+    # !Rounded up to at least one row per table, 10 orders, tasks and 100 allocations
+    options = {"scale": 0.002, "seed": 7, "batch_size": 4}
+
+    def seed(self, **options):
+        stdout = io.StringIO()
+        call_command("seed_factory", **{**self.options, **options}, stdout=stdout)
+        return stdout.getvalue()
+
+    def snapshot(self):
+        "The seeded plant by natural keys, pks move between runs"
+        return {
+            "users": list(
+                User.objects.order_by("username").values_list(
+                    "username", "name", "email", "role", "dob", "department__name"
+                )
+            ),
+            "machines": list(
+                Machine.objects.order_by("name").values_list(
+                    "name", "workshop__name", "status", "next_maintenance_date"
+                )
+            ),
+            "lines": list(
+                ProductionLine.objects.order_by("name", "machines__name").values_list(
+                    "name", "machines__name"
+                )
+            ),
+            "orders": list(
+                Order.objects.order_by("pk").values_list(
+                    "supplier__name", "created_by__username", "status", "total"
+                )
+            ),
+            "tasks": list(
+                Task.objects.order_by("name", "dependencies__name").values_list(
+                    "name", "project__name", "end_date", "dependencies__name"
+                )
+            ),
+            "allocations": list(
+                LaborAllocation.objects.order_by(
+                    "employee__username", "date"
+                ).values_list(
+                    "employee__username",
+                    "date",
+                    "hours_allocated",
+                    "project__name",
+                    "task__name",
+                    "production_line__name",
+                )
+            ),
+        }
+
+    def test_same_seed_same_plant(self):
+        output = self.seed()
+        self.assertIn("labor_allocations: 100 rows", output)
+        first = self.snapshot()
+        self.assertEqual(len(first["users"]), 4)
+        self.assertEqual(len(first["orders"]), 10)
+        self.assertTrue(all(total > 0 for *_, total in first["orders"]))
+
+        for model in (LaborAllocation, Task, Project, Order, Material, Supplier):
+            model.objects.all().delete()
+        for model in (User, ProductionLine, Machine, Workshop, Department):
+            model.objects.all().delete()
+
+        # !Numbering restarts past the max pk, so the names come out the same too
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_seeding_again_adds_a_second_plant(self):
+        self.seed()
+        first = self.snapshot()
+        self.seed()
+        second = self.snapshot()
+        self.assertEqual(len(second["users"]), 2 * len(first["users"]))
+        self.assertEqual(len(second["allocations"]), 2 * len(first["allocations"]))
+        self.assertTrue(LaborUtilizationRollup.objects.exists())
+
+    def test_invalid_options(self):
+        for options in ({"scale": 0}, {"batch_size": 0}, {"workers": -1}):
+            with self.assertRaises(CommandError):
+                self.seed(**options)
@@ -21,6 +21,11 @@ urlpatterns = [
         views.WorkshopDetailView.as_view(),
         name="workshop-rud",
     ),
+    path(
+        "role-reassignment/",
+        views.RoleReassignmentView.as_view(),
+        name="role-reassignment",
+    ),
     # TODO: Add machine urls
     path("machine/", views.MachineCreateView.as_view(), name="machine-lc"),
     path(
@@ -37,6 +42,11 @@ urlpatterns = [
     ),
     # TODO: Add material urls
     path("material/", views.MaterialCreateView.as_view(), name="material-lc"),
+    path(
+        "material/low-stock/",
+        views.MaterialLowStockView.as_view(),
+        name="material-low-stock",
+    ),
     path(
         "material/<int:pk>/",
         views.MaterialDetailView.as_view(),
@@ -44,6 +54,7 @@ urlpatterns = [
     ),
     # TODO: Add order urls
     path("order/", views.OrderCreateView.as_view(), name="order-lc"),
+    path("order/receive/", views.OrderReceiveView.as_view(), name="order-receive"),
     path(
         "order/<int:pk>/",
         views.OrderDetailView.as_view(),
@@ -51,6 +62,11 @@ urlpatterns = [
     ),
     # TODO: Add order material urls
     path("order/item/", views.OrderMaterialCreateView.as_view(), name="order-lc"),
+    path(
+        "order/item/bulk/",
+        views.OrderMaterialBulkCreateView.as_view(),
+        name="order-item-bulk",
+    ),
     path(
         "order/item/<int:pk>/",
         views.OrderMaterialDetailView.as_view(),
@@ -80,6 +96,11 @@ urlpatterns = [
         views.ProductionScheduleCreateView.as_view(),
         name="production-schedule-lc",
     ),
+    path(
+        "production-schedule/plan/",
+        views.ProductionPlanView.as_view(),
+        name="production-schedule-plan",
+    ),
     path(
         "production-schedule/<int:pk>/",
         views.ProductionScheduleDetailView.as_view(),
@@ -110,6 +131,11 @@ urlpatterns = [
         views.ProjectDetailView.as_view(),
         name="project-rud",
     ),
+    path(
+        "project/<int:pk>/critical-path/",
+        views.ProjectCriticalPathView.as_view(),
+        name="project-critical-path",
+    ),
     # TODO: Add task urls
     path("task/", views.TaskCreateView.as_view(), name="task-lc"),
     path(
@@ -123,20 +149,46 @@ urlpatterns = [
         views.LaborAllocationCreateView.as_view(),
         name="labor-allocation-lc",
     ),
+    path(
+        "labor-allocation/bulk/",
+        views.LaborAllocationBulkCreateView.as_view(),
+        name="labor-allocation-bulk",
+    ),
     path(
         "labor-allocation/<int:pk>/",
         views.LaborAllocationDetailView.as_view(),
         name="labor-allocation-rud",
     ),
+    path(
+        "analytics/labor-utilization/",
+        views.LaborUtilizationView.as_view(),
+        name="labor-utilization",
+    ),
+    path("analytics/oee/", views.OEEView.as_view(), name="oee"),
     # TODO: Add skill matrix urls
     path(
         "skill-matrix/",
         views.SkillMatrixCreateView.as_view(),
         name="skill-matrix-lc",
     ),
+    path(
+        "skill-matrix/match/",
+        views.SkillMatchView.as_view(),
+        name="skill-matrix-match",
+    ),
     path(
         "skill-matrix/<int:pk>/",
         views.SkillMatrixDetailView.as_view(),
         name="skill-matrix-rud",
     ),
+    # TODO: Add telemetry urls
+    path("telemetry/", views.TelemetryView.as_view(), name="telemetry"),
+    # TODO: Add state transition urls
+    path("events/", views.StateTransitionListView.as_view(), name="event-list"),
+    # TODO: Add dashboard urls
+    path(
+        "dashboard/summary/",
+        views.DashboardSummaryView.as_view(),
+        name="dashboard-summary",
+    ),
 ]
@@ -1,20 +1,52 @@
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import viewsets, status
 from rest_framework import generics
+from django.db.models import F
+from django.db import IntegrityError
+from main.serializers import UserSerializer
+from .mixins import EagerLoadingMixin
+from .response_cache import CachedResponseMixin, ConditionalGetMixin
+from .roles import reassign_roles
+from .labor_rollup import labor_utilization
+from .dashboard import dashboard_summary
+from .oee import get_oee
+from .maintenance import maintenance_plan
+from .telemetry import ingest_samples
+from .skill_index import bitset_page, get_skill_index
+from .production_planner import NoCapacityError, plan_production
+from .project_graph import DependencyCycleError, get_project_analysis
 from .serializers import (
     ManufacturingProcessSerializer,
     ProductionScheduleSerializer,
+    ProductionPlanSerializer,
+    LaborAllocationBulkSerializer,
     LaborAllocationSerializer,
+    LaborUtilizationQuerySerializer,
+    OEEQuerySerializer,
+    LowStockMaterialSerializer,
     ProductionLineSerializer,
     ProductProcessSerializer,
+    OrderMaterialBulkSerializer,
     OrderMaterialSerializer,
+    OrderReceiveSerializer,
+    RoleReassignmentSerializer,
+    SkillMatchQuerySerializer,
     SkillMatrixSerializer,
+    StateTransitionQuerySerializer,
+    StateTransitionSerializer,
+    TelemetryBatchSerializer,
+    TelemetryQuerySerializer,
+    TelemetryRollupSerializer,
+    TelemetrySampleSerializer,
     DepartmentSerializer,
     WorkshopSerializer,
     SupplierSerializer,
     MaterialSerializer,
+    MachineBulkAssignSerializer,
+    MaintenancePlanQuerySerializer,
     MachineSerializer,
     ProductSerializer,
     ProjectSerializer,
@@ -28,6 +60,9 @@ from .models import (
     ProductionLine,
     ProductProcess,
     OrderMaterial,
+    StateTransition,
+    TelemetrySample,
+    TelemetryRollup,
     SkillMatrix,
     Department,
     Workshop,
@@ -44,13 +79,23 @@ from .models import (
 # TODO: Create department views
 
 
-class DepartmentCreateView(generics.ListCreateAPIView):
+class DepartmentCreateView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.ListCreateAPIView,
+):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
 
 
-class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DepartmentDetailView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
@@ -59,41 +104,79 @@ class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
 # TODO: Create workshop views
 
 
-class WorkshopCreateView(generics.ListCreateAPIView):
+class WorkshopCreateView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.ListCreateAPIView,
+):
     queryset = Workshop.objects.all()
     serializer_class = WorkshopSerializer
     permission_classes = [IsAuthenticated]
 
 
-class WorkshopDetailView(generics.RetrieveUpdateDestroyAPIView):
+class WorkshopDetailView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     queryset = Workshop.objects.all()
     serializer_class = WorkshopSerializer
     permission_classes = [IsAuthenticated]
 
 
+class RoleReassignmentView(generics.GenericAPIView):
+    serializer_class = RoleReassignmentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Reassign many department supervisors and workshop managers at once"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        departments, workshops = reassign_roles(
+            {
+                row["department"]: row["supervisor"]
+                for row in serializer.validated_data.get("departments", [])
+            },
+            {
+                row["workshop"]: row["manager"]
+                for row in serializer.validated_data.get("workshops", [])
+            },
+        )
+        return Response(
+            {
+                "departments": DepartmentSerializer(departments, many=True).data,
+                "workshops": WorkshopSerializer(workshops, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 # TODO: Create machine views
 
 
-class MachineCreateView(generics.ListCreateAPIView):
+class MachineCreateView(EagerLoadingMixin, generics.ListCreateAPIView):
     queryset = Machine.objects.all()
     serializer_class = MachineSerializer
     permission_classes = [IsAuthenticated]
 
 
-class MachineDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MachineDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Machine.objects.all()
     serializer_class = MachineSerializer
     permission_classes = [IsAuthenticated]
 
 
-class MachineViewSet(viewsets.ModelViewSet):
+class MachineViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Machine.objects.all()
     serializer_class = MachineSerializer
     permission_classes = [IsAuthenticated]
 
     @action(detail=True, methods=["post"])
     def assign_operator(self, request, pk=None):
-        """Assign an operator to this machine for 12 hours"""
+        """Assign an operator to this machine for 8 hours"""
         machine = self.get_object()
         operator_id = request.data.get("operator_id")
 
@@ -116,6 +199,27 @@ class MachineViewSet(viewsets.ModelViewSet):
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=["post"])
+    def bulk_assign(self, request):
+        """Assign operators to many machines at shift change in one transaction"""
+        serializer = MachineBulkAssignSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        machines = serializer.save()
+        return Response(
+            MachineSerializer(machines, many=True).data, status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=["get"])
+    def maintenance(self, request):
+        """Machines due for maintenance within a window by workshop, with risk scores"""
+        serializer = MaintenancePlanQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            maintenance_plan(**serializer.validated_data), status=status.HTTP_200_OK
+        )
+
     @action(detail=True, methods=["post"])
     def clear_operator(self, request, pk=None):
         """Clear the operator assignment for this machine"""
@@ -127,13 +231,13 @@ class MachineViewSet(viewsets.ModelViewSet):
 # TODO: Create supplier views
 
 
-class SupplierCreateView(generics.ListCreateAPIView):
+class SupplierCreateView(EagerLoadingMixin, generics.ListCreateAPIView):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [IsAuthenticated]
 
 
-class SupplierDetailView(generics.RetrieveUpdateDestroyAPIView):
+class SupplierDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [IsAuthenticated]
@@ -142,22 +246,40 @@ class SupplierDetailView(generics.RetrieveUpdateDestroyAPIView):
 # TODO: Create material views
 
 
-class MaterialCreateView(generics.ListCreateAPIView):
+class MaterialCreateView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListCreateAPIView
+):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
     permission_classes = [IsAuthenticated]
 
 
-class MaterialDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MaterialDetailView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
     permission_classes = [IsAuthenticated]
 
 
+class MaterialLowStockView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListAPIView
+):
+    """Materials at or below their reorder level, served from a partial index"""
+
+    queryset = Material.objects.filter(is_low_stock=True).annotate(
+        shortfall=F("reorder_level") - F("quantity")
+    )
+    serializer_class = LowStockMaterialSerializer
+    permission_classes = [IsAuthenticated]
+
+
 # TODO: Create order views
 
 
-class OrderCreateView(generics.ListCreateAPIView):
+class OrderCreateView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListCreateAPIView
+):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
@@ -166,43 +288,85 @@ class OrderCreateView(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
+class OrderDetailView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         # Only allow users to update/delete their own orders
+        queryset = super().get_queryset()
         if self.request.method in ["PUT", "PATCH", "DELETE"]:
-            return Order.objects.filter(created_by=self.request.user)
-        return Order.objects.all()
+            return queryset.filter(created_by=self.request.user)
+        return queryset
+
+
+class OrderReceiveView(generics.GenericAPIView):
+    serializer_class = OrderReceiveSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Mark many orders as received and post their stock in one transaction"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order_ids = set(serializer.validated_data["order_ids"])
+
+        received = Order.receive_orders(order_ids)
+        return Response(
+            {
+                "received": received,
+                "skipped": sorted(order_ids.difference(received)),
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 # TODO: Create order material views
 
 
-class OrderMaterialCreateView(generics.ListCreateAPIView):
+class OrderMaterialCreateView(EagerLoadingMixin, generics.ListCreateAPIView):
     queryset = OrderMaterial.objects.all()
     serializer_class = OrderMaterialSerializer
     permission_classes = [IsAuthenticated]
 
 
-class OrderMaterialDetailView(generics.RetrieveUpdateDestroyAPIView):
+class OrderMaterialDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = OrderMaterial.objects.all()
     serializer_class = OrderMaterialSerializer
     permission_classes = [IsAuthenticated]
 
 
+class OrderMaterialBulkCreateView(generics.GenericAPIView):
+    serializer_class = OrderMaterialBulkSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Validate and insert all lines of an order, then update its total once"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lines = serializer.save()
+        return Response(
+            OrderMaterialSerializer(lines, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
 # TODO: Create production line views
 
 
-class ProductionLineCreateView(generics.ListCreateAPIView):
+class ProductionLineCreateView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListCreateAPIView
+):
     queryset = ProductionLine.objects.all()
     serializer_class = ProductionLineSerializer
     permission_classes = [IsAuthenticated]
 
 
-class ProductionLineDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductionLineDetailView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = ProductionLine.objects.all()
     serializer_class = ProductionLineSerializer
     permission_classes = [IsAuthenticated]
@@ -211,13 +375,23 @@ class ProductionLineDetailView(generics.RetrieveUpdateDestroyAPIView):
 # TODO: Create manufacturing process views
 
 
-class ManufacturingProcessCreateView(generics.ListCreateAPIView):
+class ManufacturingProcessCreateView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.ListCreateAPIView,
+):
     queryset = ManufacturingProcess.objects.all()
     serializer_class = ManufacturingProcessSerializer
     permission_classes = [IsAuthenticated]
 
 
-class ManufacturingProcessDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ManufacturingProcessDetailView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     queryset = ManufacturingProcess.objects.all()
     serializer_class = ManufacturingProcessSerializer
     permission_classes = [IsAuthenticated]
@@ -226,28 +400,73 @@ class ManufacturingProcessDetailView(generics.RetrieveUpdateDestroyAPIView):
 # TODO: Create production schedule views
 
 
-class ProductionScheduleCreateView(generics.ListCreateAPIView):
+class ProductionScheduleCreateView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListCreateAPIView
+):
     queryset = ProductionSchedule.objects.all()
     serializer_class = ProductionScheduleSerializer
     permission_classes = [IsAuthenticated]
 
 
-class ProductionScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductionScheduleDetailView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = ProductionSchedule.objects.all()
     serializer_class = ProductionScheduleSerializer
     permission_classes = [IsAuthenticated]
 
 
+class ProductionPlanView(generics.GenericAPIView):
+    serializer_class = ProductionPlanSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Place a batch of demand on production lines by capacity and routing"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            schedules = plan_production(
+                data["demands"],
+                created_by=request.user,
+                lines=data["lines"],
+                commit=not data["dry_run"],
+            )
+        except NoCapacityError as e:
+            return Response(
+                {
+                    "error": "Open ended schedules hold every production line",
+                    "product": e.demand["product"].pk,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            ProductionScheduleSerializer(schedules, many=True).data,
+            status=status.HTTP_200_OK if data["dry_run"] else status.HTTP_201_CREATED,
+        )
+
+
 # TODO: Create product views
 
 
-class ProductCreateView(generics.ListCreateAPIView):
+class ProductCreateView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.ListCreateAPIView,
+):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
 
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductDetailView(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
@@ -256,13 +475,15 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
 # TODO: Create product process views
 
 
-class ProductProcessCreateView(generics.ListCreateAPIView):
+class ProductProcessCreateView(EagerLoadingMixin, generics.ListCreateAPIView):
     queryset = ProductProcess.objects.all()
     serializer_class = ProductProcessSerializer
     permission_classes = [IsAuthenticated]
 
 
-class ProductProcessDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductProcessDetailView(
+    EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = ProductProcess.objects.all()
     serializer_class = ProductProcessSerializer
     permission_classes = [IsAuthenticated]
@@ -271,28 +492,55 @@ class ProductProcessDetailView(generics.RetrieveUpdateDestroyAPIView):
 # TODO: Create project views
 
 
-class ProjectCreateView(generics.ListCreateAPIView):
+class ProjectCreateView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListCreateAPIView
+):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetailView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
 
 
+class ProjectCriticalPathView(generics.GenericAPIView):
+    queryset = Project.objects.all()
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk=None):
+        """Topological order, slack and critical path of the project's tasks"""
+        project = self.get_object()
+        try:
+            analysis = get_project_analysis(project.pk)
+        except DependencyCycleError as e:
+            return Response(
+                {"error": "Task dependencies contain a cycle", "cycle": e.task_ids},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            {"start_date": project.start_date, **analysis}, status=status.HTTP_200_OK
+        )
+
+
 # TODO: Create task views
 
 
-class TaskCreateView(generics.ListCreateAPIView):
+class TaskCreateView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListCreateAPIView
+):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
 
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskDetailView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
@@ -301,28 +549,199 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
 # TODO: Create labor allocation views
 
 
-class LaborAllocationCreateView(generics.ListCreateAPIView):
+class LaborAllocationCreateView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.ListCreateAPIView
+):
     queryset = LaborAllocation.objects.all()
     serializer_class = LaborAllocationSerializer
     permission_classes = [IsAuthenticated]
 
 
-class LaborAllocationDetailView(generics.RetrieveUpdateDestroyAPIView):
+class LaborAllocationDetailView(
+    ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = LaborAllocation.objects.all()
     serializer_class = LaborAllocationSerializer
     permission_classes = [IsAuthenticated]
 
 
+class LaborAllocationBulkCreateView(generics.GenericAPIView):
+    serializer_class = LaborAllocationBulkSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Insert a crew's timesheet in bulk, updating allocations that already exist"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            created, updated = serializer.save()
+        except IntegrityError:
+            return Response(
+                {"error": "Allocations changed concurrently, please retry"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            {
+                "created": [allocation.pk for allocation in created],
+                "updated": [allocation.pk for allocation in updated],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class LaborUtilizationView(generics.GenericAPIView):
+    serializer_class = LaborUtilizationQuerySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Allocated hours per employee / project / task / line / department and period"""
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            labor_utilization(**serializer.validated_data), status=status.HTTP_200_OK
+        )
+
+
+class OEEView(generics.GenericAPIView):
+    serializer_class = OEEQuerySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Availability, performance, quality and OEE per machine, line and workshop"""
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(get_oee(**serializer.validated_data), status=status.HTTP_200_OK)
+
+
 # TODO: Create skill matrix views
 
 
-class SkillMatrixCreateView(generics.ListCreateAPIView):
+class SkillMatrixCreateView(EagerLoadingMixin, generics.ListCreateAPIView):
     queryset = SkillMatrix.objects.all()
     serializer_class = SkillMatrixSerializer
     permission_classes = [IsAuthenticated]
 
 
-class SkillMatrixDetailView(generics.RetrieveUpdateDestroyAPIView):
+class SkillMatrixDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = SkillMatrix.objects.all()
     serializer_class = SkillMatrixSerializer
     permission_classes = [IsAuthenticated]
+
+
+class SkillMatchView(generics.GenericAPIView):
+    serializer_class = SkillMatchQuerySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Employees holding all / any of the requested skills and categories"""
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        bits = get_skill_index().match(
+            skills=query.get("skill", []),
+            categories=query.get("category", []),
+            match_all=query["match"] == "all",
+        )
+        ids, more = bitset_page(bits, query.get("after"), query["page_size"])
+        employees = User.objects.in_bulk(ids)
+
+        return Response(
+            {
+                "count": bits.bit_count(),
+                "next": (
+                    replace_query_param(request.build_absolute_uri(), "after", ids[-1])
+                    if more
+                    else None
+                ),
+                "results": UserSerializer(
+                    [employees[pk] for pk in ids if pk in employees], many=True
+                ).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+# TODO: Create telemetry views
+
+
+class TelemetryView(generics.ListCreateAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_serializer_class(self):
+        if self.request.method == "POST":
+            return TelemetryBatchSerializer
+        if self.request.query_params.get("resolution") in ("1m", "1h"):
+            return TelemetryRollupSerializer
+        return TelemetrySampleSerializer
+
+    def get_queryset(self):
+        """Raw samples or 1m / 1h rollups filtered by machine, since and until"""
+        serializer = TelemetryQuerySerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        if query["resolution"] == "raw":
+            queryset = TelemetrySample.objects.all()
+            time_field = "recorded_at"
+        else:
+            queryset = TelemetryRollup.objects.filter(resolution=query["resolution"])
+            time_field = "bucket_start"
+
+        filters = {
+            "machine_id": query.get("machine"),
+            f"{time_field}__gte": query.get("since"),
+            f"{time_field}__lt": query.get("until"),
+        }
+        return queryset.filter(
+            **{lookup: value for lookup, value in filters.items() if value is not None}
+        )
+
+    def create(self, request, *args, **kwargs):
+        """Ingest a batch of samples with bulk inserts"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            ingested = ingest_samples(serializer.validated_data["samples"])
+        except IntegrityError:
+            return Response(
+                {"error": "Telemetry could not be stored, please retry"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({"ingested": ingested}, status=status.HTTP_201_CREATED)
+
+
+# TODO: Create state transition views
+
+
+class StateTransitionListView(generics.ListAPIView):
+    serializer_class = StateTransitionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Transitions filtered by entity_type, entity_id, field, since and until"""
+        serializer = StateTransitionQuerySerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        filters = {
+            "entity_type": query.get("entity_type"),
+            "entity_id": query.get("entity_id"),
+            "field": query.get("field"),
+            "occurred_at__gte": query.get("since"),
+            "occurred_at__lt": query.get("until"),
+        }
+        return StateTransition.objects.filter(
+            **{lookup: value for lookup, value in filters.items() if value is not None}
+        )
+
+
+# TODO: Create dashboard views
+
+
+class DashboardSummaryView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Counts for the dashboard cards of the current user's role"""
+        return Response(dashboard_summary(request.user), status=status.HTTP_200_OK)
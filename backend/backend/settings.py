@@ -34,7 +34,7 @@ ALLOWED_HOSTS = ["*"]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "main.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -43,6 +43,8 @@ REST_FRAMEWORK = {
         "rest_framework.renderers.JSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
+    "PAGE_SIZE": 100,
 }
 
 SIMPLE_JWT = {
@@ -52,8 +54,35 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(minutes=30),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    "TOKEN_OBTAIN_SERIALIZER": "main.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "main.serializers.TokenRefreshSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "main.serializers.TokenBlacklistSerializer",
 }
 
+# Revoked refresh tokens are kept in a per process Bloom filter when the default
+# cache is shared (otherwise every refresh checks the blacklist table), expired
+# tokens are deleted in batches every TOKEN_COMPACTION_INTERVAL seconds
+
+TOKEN_BLOOM_CAPACITY = int(os.getenv("TOKEN_BLOOM_CAPACITY", 100_000))
+
+TOKEN_BLOOM_ERROR_RATE = float(os.getenv("TOKEN_BLOOM_ERROR_RATE", 0.01))
+
+TOKEN_COMPACTION_INTERVAL = int(os.getenv("TOKEN_COMPACTION_INTERVAL", 900))
+
+TOKEN_COMPACTION_BATCH_SIZE = int(os.getenv("TOKEN_COMPACTION_BATCH_SIZE", 5000))
+
+# Authenticated users are kept in a per process LRU, emptied by any user write when
+# the default cache is shared, entries live at most 5 seconds otherwise
+
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 1024))
+
+USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", 60))
+
+# Background threads (operator expiry, token compaction) only start in long
+# lived server processes that opt in, never in commands, tests or serverless functions
+
+RUN_SCHEDULERS = os.getenv("RUN_SCHEDULERS", "false").lower() in ("1", "true", "yes")
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -128,6 +157,53 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Locmem is per process (LRU, bounded by MAX_ENTRIES), point CACHE_BACKEND at the
+# file or Redis backend to share cached responses and invalidation across workers.
+# Response caching and the revoked token filter are off on a per process backend
+
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv("CACHE_LOCATION", "factory-management"),
+    }
+}
+
+if not CACHE_BACKEND.endswith("RedisCache"):
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 5000))
+    }
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))
+
+# State transition log, buffered per process and flushed in batches
+
+EVENT_LOG_BATCH_SIZE = int(os.getenv("EVENT_LOG_BATCH_SIZE", 500))
+
+EVENT_LOG_FLUSH_INTERVAL_MS = int(os.getenv("EVENT_LOG_FLUSH_INTERVAL_MS", 1000))
+
+# Telemetry retention in days, applied by the prune_telemetry command
+
+TELEMETRY_RETENTION_DAYS = {
+    "raw": int(os.getenv("TELEMETRY_RAW_RETENTION_DAYS", 7)),
+    "1m": int(os.getenv("TELEMETRY_MINUTE_RETENTION_DAYS", 30)),
+    "1h": int(os.getenv("TELEMETRY_HOUR_RETENTION_DAYS", 365)),
+}
+
+# OEE results are cached per range, the transition log is flushed in the background
+
+OEE_CACHE_TIMEOUT = int(os.getenv("OEE_CACHE_TIMEOUT", 60))
+
+# Dashboard section counts are cached per model version, the timeout bounds how
+# long a per process cache misses other workers' writes
+
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", 30))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -3,7 +3,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenBlacklistView,
 )
-from main.views import UserCreateView, UserDetailView, UserInfoView
+from main.views import UserCreateView, UserDetailView, UserImportView, UserInfoView
 from django.urls import path, include
 from django.contrib import admin
 
@@ -12,6 +12,7 @@ urlpatterns = [
     path("api/user/", UserInfoView.as_view(), name="user_info"),
     path("api/user/<int:pk>/", UserDetailView.as_view(), name="user_detail"),
     path("api/user/register/", UserCreateView.as_view(), name="register"),
+    path("api/user/import/", UserImportView.as_view(), name="user_import"),
     path("api/token/", TokenObtainPairView.as_view(), name="get_token"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="refresh_token"),
     path("api/token/blacklist/", TokenBlacklistView.as_view(), name="blacklist_token"),
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        """
+        Connect token signals and start the expired token compactor
+        Only start the compactor in server processes that set RUN_SCHEDULERS
+        """
+        from django.conf import settings
+
+        from . import signals  # noqa: F401
+
+        if not getattr(settings, "RUN_SCHEDULERS", False):
+            return
+
+        from .tokens import start_token_compactor
+
+        start_token_compactor()
@@ -0,0 +1,105 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from django.utils.translation import gettext_lazy as _
+from api.response_cache import get_model_versions, versions_shared
+from collections import OrderedDict
+from django.conf import settings
+import threading
+import time
+import copy
+
+_cache = None
+_cache_lock = threading.Lock()
+
+LOCAL_TIMEOUT = 5  # !Seconds, other workers' user writes are only seen on expiry
+
+# TODO: Cached principal resolution for JWT requests
+
+
+class UserCache:
+    """
+    Per process LRU of authenticated users
+
+    - Entries are tagged with the User model version, any user write makes them stale ☑️
+    - Entries expire after a short timeout even without writes, the only way writes made by other workers reach a per process cache ☑️
+    - Least recently used entries are dropped past max_entries ☑️
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()  # !user id -> (user, version, expires at)
+        self.lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, loaded_version, expires_at = entry
+            if loaded_version != version or expires_at < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+
+        # !Requests get their own instance, nothing they set leaks into the cache
+        return copy.copy(user)
+
+    def set(self, user_id, user, version):
+        with self.lock:
+            self.entries[user_id] = (
+                copy.copy(user),
+                version,
+                time.monotonic() + self.timeout,
+            )
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def get_user_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = UserCache(
+                max_entries=getattr(settings, "USER_CACHE_MAX_ENTRIES", 1024),
+                timeout=(
+                    getattr(settings, "USER_CACHE_TIMEOUT", 60)
+                    if versions_shared()
+                    else min(getattr(settings, "USER_CACHE_TIMEOUT", 60), LOCAL_TIMEOUT)
+                ),
+            )
+    return _cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication resolving the user id claim through get_user_cache(), so
+    an authenticated request normally makes no user query. Saving, deleting or
+    deactivating any user bumps the User model version, which empties the cache
+    of every process when the default cache is shared. On a per process cache
+    other workers keep the old user for at most LOCAL_TIMEOUT seconds.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        # !Read the version first, a write racing the load only makes the entry stale
+        version = get_model_versions([self.user_model])[0]
+        user = get_user_cache().get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            get_user_cache().set(user_id, user, version)
+            return user
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
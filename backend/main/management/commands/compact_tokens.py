@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from main.tokens import compact_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding tokens and their blacklist entries in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Outstanding tokens deleted per statement",
+        )
+
+    def handle(self, *args, **options):
+        deleted = compact_tokens(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tokens"))
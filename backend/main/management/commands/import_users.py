@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from main.serializers import UserImportSerializer
+from main.user_import import read_user_csv
+
+
+class Command(BaseCommand):
+    help = "Register every user of a CSV (name, email, username, password, nic, mobile_no, role, department, dob)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users inserted per bulk insert",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes, defaults to every core",
+        )
+
+    def handle(self, *args, **options):
+        with open(options["path"], newline="", encoding="utf-8-sig") as file:
+            rows = read_user_csv(file)
+
+        serializer = UserImportSerializer(
+            data={"users": rows},
+            context={
+                "batch_size": options["batch_size"],
+                "workers": options["workers"],
+            },
+        )
+        if not serializer.is_valid():
+            errors = serializer.errors.get("users", serializer.errors)
+            if isinstance(errors, dict):
+                raise CommandError(f"Nothing imported: {errors}")
+
+            # !Line 1 is the header
+            for number, row_errors in enumerate(errors, start=2):
+                for field, messages in row_errors.items():
+                    self.stderr.write(f"line {number}: {field}: {' '.join(messages)}")
+            raise CommandError("Nothing imported, fix the lines above")
+
+        users = serializer.save()
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(users)} users"))
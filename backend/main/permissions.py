@@ -0,0 +1,14 @@
+from rest_framework.permissions import BasePermission
+from .models import User
+
+
+class IsAdmin(BasePermission):
+    "Authenticated users with the ADMIN role, or superusers"
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user
+            and user.is_authenticated
+            and (user.role == User.Role.ADMIN or user.is_superuser)
+        )
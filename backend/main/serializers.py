@@ -1,5 +1,12 @@
+from rest_framework_simplejwt import serializers as jwt_serializers
 from rest_framework import serializers
-from .models import User
+from .user_import import hash_passwords
+from django.db import transaction
+from django.db.models import Q
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .tokens import RefreshToken, set_principal_claims
+from .models import User, nic_validator, phone_validator
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -42,3 +49,122 @@ class UserSerializer(serializers.ModelSerializer):
 
         instance.save()
         return instance
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        # !Access tokens copy the claims of the refresh token they come from
+        return set_principal_claims(super().get_token(user), user)
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # !Restamp the copied claims, a role change shows on the next refresh
+        access = AccessToken(data["access"])
+        user = User.objects.get(pk=access[api_settings.USER_ID_CLAIM])
+        data["access"] = str(set_principal_claims(access, user))
+        return data
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    token_class = RefreshToken
+
+
+class UserImportRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    email = serializers.EmailField(max_length=254)
+    username = serializers.CharField(max_length=150)
+    password = serializers.CharField(write_only=True, max_length=128)
+    nic = serializers.CharField(max_length=10, validators=[nic_validator])
+    mobile_no = serializers.CharField(max_length=10, validators=[phone_validator])
+    role = serializers.ChoiceField(
+        choices=User.Role.choices, default=User.Role.OPERATOR
+    )
+    department = serializers.CharField(max_length=255, required=False)  # !pk or name
+    dob = serializers.DateField(required=False)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+
+class UserImportSerializer(serializers.Serializer):
+    users = UserImportRowSerializer(many=True, allow_empty=False, max_length=20000)
+
+    UNIQUE_FIELDS = ("email", "username", "nic", "mobile_no")
+
+    def validate(self, attrs):
+        from api.models import Department
+
+        rows = attrs["users"]
+        errors = [{} for _ in rows]
+
+        # !Departments by pk or name in one query
+        wanted = {row["department"] for row in rows if "department" in row}
+        departments = {}
+        for pk, name in Department.objects.filter(
+            Q(name__in=wanted) | Q(pk__in={ref for ref in wanted if ref.isdigit()})
+        ).values_list("pk", "name"):
+            departments[name] = departments[str(pk)] = pk
+        for row, row_errors in zip(rows, errors):
+            if "department" in row and row["department"] not in departments:
+                row_errors["department"] = [
+                    f'Invalid department "{row["department"]}".'
+                ]
+
+        # !One query per unique field, duplicates inside the file are caught too
+        for field in self.UNIQUE_FIELDS:
+            existing = set(
+                User.objects.filter(
+                    **{f"{field}__in": {row[field] for row in rows}}
+                ).values_list(field, flat=True)
+            )
+            seen = set()
+            for row, row_errors in zip(rows, errors):
+                if row[field] in existing:
+                    row_errors[field] = [f"user with this {field} already exists."]
+                elif row[field] in seen:
+                    row_errors[field] = [f"Duplicate {field} in this import."]
+                seen.add(row[field])
+
+        if any(errors):
+            raise serializers.ValidationError({"users": errors})
+
+        attrs["departments"] = departments
+        return attrs
+
+    def create(self, validated_data):
+        from api.response_cache import bump_model_version
+
+        rows, departments = validated_data["users"], validated_data["departments"]
+        # !Hash outside the transaction, it is by far the slowest step
+        passwords = hash_passwords(
+            [row["password"] for row in rows], workers=self.context.get("workers", 1)
+        )
+        users = [
+            User(
+                **{
+                    field: value
+                    for field, value in row.items()
+                    if field not in ("department", "password")
+                },
+                department_id=departments.get(row.get("department")),
+                password=password,
+                is_active=True,
+                is_staff=True,
+            )
+            for row, password in zip(rows, passwords)
+        ]
+
+        with transaction.atomic():
+            User.objects.bulk_create(
+                users, batch_size=self.context.get("batch_size", 1000)
+            )
+        # !bulk_create sends no signals
+        bump_model_version(User)
+        return users
@@ -0,0 +1,12 @@
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .tokens import token_blacklisted
+
+# TODO: Revoked token filter maintenance
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def blacklisted_token_saved(sender, instance, created, **kwargs):
+    if created:
+        token_blacklisted(instance)
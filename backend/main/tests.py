@@ -1,3 +1,329 @@
-from django.test import TestCase
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from .user_import import API_MAX_ROWS, read_user_csv
+from django.core.management import CommandError, call_command
+from .serializers import UserImportSerializer
+from django.db import IntegrityError
+from .tokens import BloomFilter, RefreshToken, compact_tokens
+from rest_framework.test import APIClient
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from api.models import Department
+from .models import User
+from . import authentication, tokens
+from unittest import mock
+import tempfile
+import io
+import time
+import os
 
-# Create your tests here.
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(),
+    }
+}
+
+# TODO: Test helpers
+
+
+def make_user(number=1):
+    "User without a hashed password, PBKDF2 would dominate the suite"
+    return User.objects.create(
+        username=f"user{number}",
+        email=f"user{number}@example.com",
+        name=f"User {number}",
+        nic=f"{number:010d}",
+        mobile_no=f"07{number:08d}",
+    )
+
+
+def blacklist_elsewhere(token):
+    "Blacklist the way another worker would, nothing reaches this process' filter"
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token=OutstandingToken.objects.get(jti=token["jti"]))]
+    )
+
+
+# TODO: Revoked token filter
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f"jti-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RevokedTokenTests(TestCase):
+    def setUp(self):
+        tokens._revoked = None  # !Fresh filter per test
+        self.user = make_user()
+
+    def tearDown(self):
+        tokens._revoked = None
+
+    def test_blacklisted_token_is_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        token.check_blacklist()
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+    def test_blacklisted_by_another_worker_is_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        RefreshToken(str(token))  # !Loads this process' filter
+        blacklist_elsewhere(token)
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache_filter_skips_the_database(self):
+        revoked = RefreshToken.for_user(self.user)
+        revoked.blacklist()
+        valid = RefreshToken.for_user(self.user)
+        RefreshToken(str(valid))  # !Loads the filter
+
+        with self.assertNumQueries(0):
+            RefreshToken(str(valid))
+        with self.assertRaises(TokenError):
+            RefreshToken(str(revoked))
+
+    def test_rotated_refresh_token_is_rejected(self):
+        client = APIClient()
+        refresh = str(RefreshToken.for_user(self.user))
+
+        response = client.post("/api/token/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 200)
+        response = client.post("/api/token/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+
+
+class CompactTokensTests(TestCase):
+    def test_deletes_only_expired_tokens(self):
+        user = make_user()
+        now = timezone.now()
+        expired = [RefreshToken.for_user(user) for _ in range(3)]
+        OutstandingToken.objects.filter(jti__in=[t["jti"] for t in expired]).update(
+            expires_at=now - timedelta(minutes=1)
+        )
+        expired[0].blacklist()
+        live = RefreshToken.for_user(user)
+
+        self.assertEqual(compact_tokens(batch_size=2, now=now), 3)
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), [live["jti"]]
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+# TODO: Bulk user import
+
+CSV_HEADER = "name,email,username,password,nic,mobile_no,role,department,dob,notes\n"
+
+
+def csv_row(number, department="", role="OPERATOR"):
+    return (
+        f"User {number},USER{number}@Example.com,import{number},secret{number},"
+        f"{number:010d},07{number:08d},{role},{department},1990-01-0{number % 9 + 1},x\n"
+    )
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class UserImportTests(TestCase):
+    def setUp(self):
+        self.admin = make_user(900)
+        self.admin.role = User.Role.ADMIN
+        self.admin.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.department = Department.objects.create(name="Assembly")
+
+    def upload(self, content):
+        file = SimpleUploadedFile("users.csv", content.encode(), "text/csv")
+        return self.client.post("/api/user/import/", {"file": file})
+
+    def test_read_user_csv(self):
+        rows = read_user_csv(
+            ("﻿" + CSV_HEADER + csv_row(1) + csv_row(2, " Assembly ")).encode()
+        )
+        # !BOM stripped, blank cells and unknown columns left out, values trimmed
+        self.assertEqual(rows[0]["name"], "User 1")
+        self.assertNotIn("department", rows[0])
+        self.assertNotIn("notes", rows[0])
+        self.assertEqual(rows[1]["department"], "Assembly")
+
+    def test_imports_with_department_by_name_or_pk(self):
+        response = self.upload(
+            CSV_HEADER
+            + csv_row(1, "Assembly")
+            + csv_row(2, str(self.department.pk), "TECHNICIAN")
+            + csv_row(3)
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 3)
+
+        users = User.objects.filter(username__startswith="import").order_by("username")
+        self.assertEqual(
+            [(user.department_id, user.role) for user in users],
+            [
+                (self.department.pk, "OPERATOR"),
+                (self.department.pk, "TECHNICIAN"),
+                (None, "OPERATOR"),
+            ],
+        )
+        self.assertEqual(users[0].email, "USER1@example.com")
+        self.assertTrue(users[0].check_password("secret1"))
+
+    def test_duplicates_reject_the_whole_file(self):
+        make_user(2)  # !Same nic and mobile_no as row 2
+        response = self.upload(
+            CSV_HEADER + csv_row(1) + csv_row(2) + csv_row(1) + csv_row(3, "Paint")
+        )
+        self.assertEqual(response.status_code, 400)
+
+        errors = response.data["users"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(set(errors[1]), {"nic", "mobile_no"})
+        self.assertEqual(set(errors[2]), {"email", "username", "nic", "mobile_no"})
+        self.assertIn("Duplicate", str(errors[2]["email"][0]))
+        self.assertEqual(set(errors[3]), {"department"})
+        self.assertFalse(User.objects.filter(username__startswith="import").exists())
+
+    def test_upload_size_is_capped(self):
+        rows = "".join(csv_row(number) for number in range(1, API_MAX_ROWS + 2))
+        response = self.upload(CSV_HEADER + rows)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(username__startswith="import").exists())
+
+    def test_admin_only(self):
+        self.client.force_authenticate(make_user(1))
+        self.assertEqual(self.upload(CSV_HEADER + csv_row(1)).status_code, 403)
+
+    def test_conflict_after_validation_inserts_nothing(self):
+        rows = read_user_csv(CSV_HEADER + csv_row(1) + csv_row(2) + csv_row(3))
+        serializer = UserImportSerializer(data={"users": rows})
+        self.assertTrue(serializer.is_valid())
+
+        # !Registered between validation and insert
+        User.objects.create(username="import3", email="other@example.com")
+        with self.assertRaises(IntegrityError):
+            serializer.save()
+        self.assertEqual(
+            list(
+                User.objects.filter(username__startswith="import").values_list(
+                    "username", flat=True
+                )
+            ),
+            ["import3"],
+        )
+
+    def test_command_reports_lines(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(CSV_HEADER + csv_row(1) + csv_row(1))
+        stderr = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command("import_users", file.name, stderr=stderr)
+        self.assertIn(
+            "line 3: email: Duplicate email in this import.", stderr.getvalue()
+        )
+
+        with open(file.name, "w") as rewritten:
+            rewritten.write(CSV_HEADER + csv_row(1) + csv_row(2))
+        call_command("import_users", file.name, workers=1, stdout=io.StringIO())
+        self.assertEqual(User.objects.filter(username__startswith="import").count(), 2)
+        os.remove(file.name)
+
+
+# TODO: Cached JWT principals
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        authentication._cache = None  # !Fresh user cache per test
+        self.department = Department.objects.create(name="Assembly")
+        self.user = make_user()
+        self.user.department = self.department
+        self.user.set_password("secret")
+        self.user.save()
+        self.client = APIClient()
+
+    def tearDown(self):
+        authentication._cache = None
+
+    def login(self):
+        response = self.client.post(
+            "/api/token/", {"username": "user1", "password": "secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+    def test_cached_user_makes_no_query(self):
+        self.login()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/user/").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/user/").status_code, 200)
+
+    def test_user_save_invalidates(self):
+        self.login()
+        self.client.get("/api/user/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.name = "Renamed"
+            self.user.save()
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/user/")
+        self.assertEqual(response.data["name"], "Renamed")
+
+    def test_deactivation_invalidates(self):
+        self.login()
+        self.client.get("/api/user/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get("/api/user/").status_code, 401)
+
+    def test_other_workers_writes_are_seen_after_the_local_timeout(self):
+        self.login()
+        self.client.get("/api/user/")
+
+        # !Written elsewhere, no version bump reaches this process
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/user/").status_code, 200)
+
+        later = time.monotonic() + authentication.LOCAL_TIMEOUT + 1
+        with mock.patch("main.authentication.time.monotonic", return_value=later):
+            self.assertEqual(self.client.get("/api/user/").status_code, 401)
+
+    def test_principal_claims(self):
+        tokens = self.login()
+        self.assertEqual(AccessToken(tokens["access"])["role"], "OPERATOR")
+
+        response = self.client.get("/api/user/")
+        self.assertEqual(response.data["role"], "OPERATOR")
+        self.assertEqual(response.data["department"], self.department.pk)
+
+        # !Claims lag a role change until the next refresh
+        User.objects.filter(pk=self.user.pk).update(role="SUPERVISOR", department=None)
+        response = self.client.post(
+            "/api/token/refresh/", {"refresh": tokens["refresh"]}
+        )
+        access = AccessToken(response.data["access"])
+        self.assertEqual((access["role"], access["department"]), ("SUPERVISOR", None))
@@ -0,0 +1,260 @@
+from api.response_cache import bump_model_version, get_model_versions, versions_shared
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.settings import api_settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.conf import settings
+from django.db.models import Q
+from datetime import timedelta
+from functools import partial
+from uuid import uuid4
+import threading
+import hashlib
+import logging
+import socket
+import math
+import os
+
+logger = logging.getLogger(__name__)
+_revoked = None
+_revoked_lock = threading.Lock()
+_token_compactor = None
+
+LEASE_NAME = "token-compaction"
+LEASE_TTL = timedelta(seconds=60)
+SYNC_MARGIN = timedelta(minutes=5)  # !Covers blacklist transactions committing late
+
+# TODO: Revoked token filter
+
+
+class BloomFilter:
+    "Fixed size Bloom filter of strings, no false negatives"
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little")
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevokedTokenFilter:
+    """
+    In-process Bloom filter of blacklisted refresh token JTIs
+
+    - Built from BlacklistedToken on first use, sized for twice the rows ☑️
+    - A blacklist anywhere bumps the BlacklistedToken version, the other processes then load only the rows blacklisted since their last sync (shared cache only) ☑️
+    - A miss means the token is not blacklisted, only hits are checked in the database ☑️
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.version = None
+        self.synced_at = None
+
+    @property
+    def model(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        return BlacklistedToken
+
+    def _jtis(self, **filters):
+        return (
+            self.model.objects.filter(token__expires_at__gt=timezone.now(), **filters)
+            .values_list("token__jti", flat=True)
+            .iterator(chunk_size=5000)
+        )
+
+    def rebuild(self):
+        version = get_model_versions([self.model])[0]
+        synced_at = timezone.now()
+        jtis = list(self._jtis())
+
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self.lock:
+            self.bloom, self.version, self.synced_at = bloom, version, synced_at
+
+    def sync(self):
+        "Pick up tokens blacklisted by other processes, one query per version change"
+        version = get_model_versions([self.model])[0]
+        if self.bloom is None or self.bloom.count > self.bloom.capacity:
+            return self.rebuild()
+        if version == self.version:
+            return
+
+        synced_at = timezone.now()
+        jtis = list(self._jtis(blacklisted_at__gte=self.synced_at - SYNC_MARGIN))
+        with self.lock:
+            for jti in jtis:
+                self.bloom.add(jti)
+            self.version, self.synced_at = version, synced_at
+
+    def add(self, jti):
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def might_contain(self, jti):
+        self.sync()
+        with self.lock:
+            return jti in self.bloom
+
+
+def get_revoked_filter():
+    global _revoked
+    with _revoked_lock:
+        if _revoked is None:
+            _revoked = RevokedTokenFilter(
+                capacity=getattr(settings, "TOKEN_BLOOM_CAPACITY", 100_000),
+                error_rate=getattr(settings, "TOKEN_BLOOM_ERROR_RATE", 0.01),
+            )
+    return _revoked
+
+
+def token_blacklisted(blacklisted):
+    "Add a new BlacklistedToken to this process' filter and version it for the others"
+    jti = blacklisted.token.jti
+    transaction.on_commit(partial(get_revoked_filter().add, jti))
+    bump_model_version(type(blacklisted))
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token that only asks the database about JTIs the filter may hold.
+    The filter is skipped unless the default cache is shared, a per process
+    version would never hear of tokens blacklisted by other workers.
+    """
+
+    def check_blacklist(self):
+        if not versions_shared() or get_revoked_filter().might_contain(
+            self.payload[api_settings.JTI_CLAIM]
+        ):
+            super().check_blacklist()
+
+
+def set_principal_claims(token, user):
+    """
+    Sign the user's role and department into a token. Access tokens are
+    restamped on every refresh, so they lag a change by one access lifetime.
+    """
+    token["role"] = user.role
+    token["department"] = user.department_id
+    return token
+
+
+# TODO: Expired token compaction
+
+
+def compact_tokens(batch_size=5000, now=None):
+    """
+    Delete expired outstanding tokens and their blacklist rows in batches, so
+    no single statement locks the tables for long. Returns the number of
+    outstanding tokens deleted.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        batch = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch:
+            return deleted
+
+        # !No delete receivers on these models, blacklist rows are fast deleted too
+        with transaction.atomic():
+            OutstandingToken.objects.filter(pk__in=batch).delete()
+        deleted += len(batch)
+
+
+class TokenCompactor(threading.Thread):
+    """
+    Background thread running compact_tokens every TOKEN_COMPACTION_INTERVAL
+
+    - Runs on a single leader across workers using a SchedulerLease row ☑️
+    """
+
+    def __init__(self, interval, batch_size, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.daemon = True
+        self.name = "TokenCompactor"
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        logger.info(f"Starting token compactor ({self.owner})")
+        while not self._stopped.wait(self.interval):
+            try:
+                close_old_connections()
+                if self._acquire_lease(timezone.now()):
+                    deleted = compact_tokens(self.batch_size)
+                    if deleted:
+                        logger.info(f"Deleted {deleted} expired tokens")
+            except Exception as e:
+                logger.error(f"Error compacting tokens: {e}")
+        close_old_connections()
+
+    def _acquire_lease(self, now):
+        from api.models import SchedulerLease
+
+        try:
+            SchedulerLease.objects.get_or_create(
+                name=LEASE_NAME, defaults={"owner": "", "expires_at": now}
+            )
+        except IntegrityError:
+            pass  # !Another worker created the row first
+
+        # !Hold the lease for a whole interval so only one worker compacts per run
+        acquired = (
+            SchedulerLease.objects.filter(name=LEASE_NAME)
+            .filter(Q(owner=self.owner) | Q(expires_at__lte=now))
+            .update(
+                owner=self.owner,
+                expires_at=now + max(LEASE_TTL, timedelta(seconds=self.interval)),
+            )
+        )
+        return acquired == 1
+
+
+def start_token_compactor():
+    "Start the token compactor if it's not already running"
+    global _token_compactor
+
+    if _token_compactor is None or not _token_compactor.is_alive():
+        _token_compactor = TokenCompactor(
+            interval=getattr(settings, "TOKEN_COMPACTION_INTERVAL", 900),
+            batch_size=getattr(settings, "TOKEN_COMPACTION_BATCH_SIZE", 5000),
+        )
+        _token_compactor.start()
+        logger.info("Started token compactor")
+    return _token_compactor
@@ -0,0 +1,70 @@
+from django.contrib.auth.hashers import make_password
+from concurrent.futures import ProcessPoolExecutor
+import django
+import csv
+import io
+import os
+
+# TODO: Bulk user import
+
+CSV_FIELDS = (
+    "name",
+    "email",
+    "username",
+    "password",
+    "nic",
+    "mobile_no",
+    "role",
+    "department",
+    "dob",
+)
+POOL_THRESHOLD = 32  # !Below this, starting worker processes costs more than hashing
+# !The API hashes inline in the request, PBKDF2 takes about half a second per password
+API_MAX_ROWS = 20
+
+
+def read_user_csv(file):
+    """
+    Rows of a users CSV (header row required) as dicts of the CSV_FIELDS it
+    has, blank cells are left out so serializer defaults apply.
+    """
+    if isinstance(file, bytes):
+        file = file.decode("utf-8-sig")
+    if isinstance(file, str):
+        file = io.StringIO(file)
+
+    rows = []
+    for row in csv.DictReader(file):
+        rows.append(
+            {
+                field: value.strip()
+                for field, value in row.items()
+                if field in CSV_FIELDS and value and value.strip()
+            }
+        )
+    return rows
+
+
+def _init_worker():
+    # !Spawned workers start without settings, forked ones already have them
+    django.setup()
+
+
+def hash_passwords(passwords, workers=1):
+    """
+    make_password over workers processes (None for every core), results in
+    input order. Only the management command forks, never a server worker.
+    """
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(
+            pool.map(
+                make_password,
+                passwords,
+                chunksize=max(len(passwords) // (workers * 4), 1),
+            )
+        )
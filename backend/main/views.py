@@ -1,9 +1,14 @@
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .serializers import UserSerializer
-from rest_framework import generics
+from .serializers import UserImportSerializer, UserSerializer
+from rest_framework import generics, status
+from django.db import IntegrityError
+from .user_import import API_MAX_ROWS, read_user_csv
+from .permissions import IsAdmin
 from .models import User
+import csv
 
 # !User views
 
@@ -27,6 +32,53 @@ class UserInfoView(APIView):
 
     def get(self, request):
         user = request.user
+        # !Role and department from the signed claims, the row for older tokens
+        claims = request.auth if request.auth is not None else {}
         return Response(
-            {"name": user.name, "username": user.username, "email": user.email, "role": user.role}
+            {
+                "id": user.pk,
+                "name": user.name,
+                "username": user.username,
+                "email": user.email,
+                "role": claims.get("role", user.role),
+                "department": claims.get("department", user.department_id),
+            }
         )
+
+
+class UserImportView(generics.GenericAPIView):
+    serializer_class = UserImportSerializer
+    permission_classes = [IsAdmin]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        """Register every user of a small uploaded CSV (file field), all or none"""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            rows = read_user_csv(upload.read())
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response(
+                {"error": f"Invalid CSV: {e}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > API_MAX_ROWS:
+            # !Passwords are hashed inside the request, larger files would time out
+            return Response(
+                {
+                    "error": f"At most {API_MAX_ROWS} users per upload, import larger files with the import_users command"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(data={"users": rows})
+        serializer.is_valid(raise_exception=True)
+        try:
+            users = serializer.save()
+        except IntegrityError as e:
+            # !A user registered between validation and insert
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({"created": len(users)}, status=status.HTTP_201_CREATED)
@@ -26,15 +26,9 @@ ChartJS.register(
 );
 // --- End Charting ---
 
-// Import API functions - Ideally use an aggregated endpoint
+// Import API functions
 import {
-    // getDashboardStats, // << IDEAL: Use this if available
-    // Fallback (less efficient):
-    listMachines,
-    listMaterials,
-    listWorkshops,
-    listDepartments,
-    // listSuppliers // Only if supplier count is needed
+    getDashboardSummary,
 } from '../services/api'; // Adjust path
 import {
     LayoutDashboardIcon, Building2, Star, Cog, Truck, Box, UserCheck, Wrench, AlertTriangle, PackageMinus, Users, Briefcase, PackageCheck, PackageX, TriangleAlert, Activity, ServerCrash, PauseCircle, CheckCircle // Added CheckCircle
@@ -99,125 +93,38 @@ function DashboardPage() {
 
         const fetchDataForRole = async () => {
             try {
-                // *** IMPORTANT: Replace this section with a single API call
-                // *** to your backend `getDashboardStats()` endpoint if possible!
-                console.log("Fetching individual lists for dashboard stats (less efficient)...");
-                const promisesToFetch = [
-                    listMachines(),
-                    listMaterials(),
-                    listWorkshops(),
-                    listDepartments(),
-                    // listSuppliers(), // Uncomment if needed
-                ];
-
-                const results = await Promise.allSettled(promisesToFetch);
-                 if (!isMounted) return;
-
-                 const [
-                    machineRes,
-                    materialRes,
-                    workshopRes,
-                    departmentRes,
-                    // supplierRes
-                 ] = results;
-
-
-                // Process results and calculate stats
-                let machineCount = 0, maintenanceDueCount = 0, myMachine = null;
-                let machineOperational = 0, machineIdle = 0, machineMaintenance = 0, machineBroken = 0;
-                if (machineRes.status === 'fulfilled' && Array.isArray(machineRes.value?.data)) {
-                    const machines = machineRes.value.data;
-                    machineCount = machines.length;
-                    // Calculate maintenance due count correctly
-                    maintenanceDueCount = machines.filter(m => m.next_maintenance_date && new Date(m.next_maintenance_date) <= new Date()).length;
-                    machines.forEach(m => {
-                        const status = m.status?.toUpperCase();
-                        if (status === 'OPERATIONAL') machineOperational++;
-                        else if (status === 'IDLE') machineIdle++;
-                        else if (status === 'MAINTENANCE' || status === 'UNDER MAINTENANCE') machineMaintenance++;
-                        else if (status === 'BROKEN' || status === 'BROKE DOWN') machineBroken++;
-                    });
-                    if (userRole === ROLES.OPERATOR && user?.id) {
-                        myMachine = machines.find(m => m.operator === user.id) || null;
-                    }
-                } else { console.error("Failed to fetch machines for stats", machineRes.reason); }
-
-                let materialCount = 0, lowStockCount = 0, inStockCount = 0, outOfStockCount = 0;
-                 if (materialRes.status === 'fulfilled' && Array.isArray(materialRes.value?.data)) {
-                     const materials = materialRes.value.data;
-                     materialCount = materials.length;
-                     materials.forEach(m => {
-                          const qty = parseFloat(m.quantity);
-                          const reorder = parseFloat(m.reorder_level);
-                          if (isNaN(qty)) return;
-                          if (qty <= 0) {
-                              outOfStockCount++;
-                          } else if (!isNaN(reorder) && qty <= reorder) {
-                              lowStockCount++;
-                              inStockCount++;
-                          } else {
-                              inStockCount++;
-                          }
-                     });
-                 } else { console.error("Failed to fetch materials for stats", materialRes.reason); }
-
-                 let workshopCount = 0, workshopActive = 0, workshopInactive = 0, workshopMaintenance = 0;
-                 if (workshopRes.status === 'fulfilled' && Array.isArray(workshopRes.value?.data)) {
-                     const workshops = workshopRes.value.data;
-                     workshopCount = workshops.length;
-                     workshops.forEach(w => {
-                         const status = w.operational_status?.toUpperCase();
-                         if (status === 'ACTIVE' || status === 'OPERATIONAL') workshopActive++;
-                         else if (status === 'INACTIVE') workshopInactive++;
-                         else if (status === 'MAINTENANCE' || status === 'UNDER MAINTENANCE') workshopMaintenance++;
-                     });
-                 } else { console.error("Failed to fetch workshops for stats", workshopRes.reason); }
-
-                 let departmentCount = 0, departmentsWithoutSupervisor = 0;
-                  if (departmentRes.status === 'fulfilled' && Array.isArray(departmentRes.value?.data)) {
-                       const departments = departmentRes.value.data;
-                      departmentCount = departments.length;
-                      departmentsWithoutSupervisor = departments.filter(d => d.supervisor == null).length;
-                  } else { console.error("Failed to fetch departments for stats", departmentRes.reason); }
-
-                // let supplierCount = 0;
-                // if (supplierRes.status === 'fulfilled' && Array.isArray(supplierRes.value?.data)) {
-                //     supplierCount = supplierRes.value.data.length;
-                // } else { console.error("Failed to fetch suppliers for stats", supplierRes.reason); }
+                // Counts are aggregated on the server for the current role
+                const { data } = await getDashboardSummary();
+                if (!isMounted) return;
 
+                const machines = data.machines || {};
+                const workshops = data.workshops || {};
+                const departments = data.departments || {};
+                const materials = data.materials || {};
 
                 // --- Update State ---
                 setStats({
-                    machineTotal: machineCount, machineOperational, machineIdle, machineMaintenance, machineBroken,
-                    workshopTotal: workshopCount, workshopActive, workshopInactive, workshopMaintenance,
-                    departmentTotal: departmentCount, departmentsWithoutSupervisor,
-                    materialTotal: materialCount, materialInStock: inStockCount, materialLowStock: lowStockCount, materialOutOfStock: outOfStockCount,
-                    // supplierCount,
-                    maintenanceDueCount: maintenanceDueCount, // Make sure this is set
+                    machineTotal: machines.total || 0, machineOperational: machines.operational || 0, machineIdle: machines.idle || 0, machineMaintenance: machines.maintenance || 0, machineBroken: machines.broken || 0,
+                    workshopTotal: workshops.total || 0, workshopActive: workshops.active || 0, workshopInactive: workshops.inactive || 0, workshopMaintenance: workshops.maintenance || 0,
+                    departmentTotal: departments.total || 0, departmentsWithoutSupervisor: departments.without_supervisor || 0,
+                    materialTotal: materials.total || 0, materialInStock: materials.in_stock || 0, materialLowStock: materials.low_stock || 0, materialOutOfStock: materials.out_of_stock || 0,
+                    lowStockCount: materials.low_stock || 0,
+                    supplierCount: data.suppliers?.total || 0,
+                    maintenanceDueCount: machines.maintenance_due || 0,
                 });
-                setAssignedMachine(myMachine);
+                setAssignedMachine(data.assigned_machine || null);
 
                  // --- Prepare Chart Data ---
-                 setMaterialChartData({
+                 setMaterialChartData(data.materials ? {
                      labels: ['In Stock', 'Low Stock', 'Out of Stock'],
                      datasets: [{
                          label: 'Material Stock Status',
-                         data: [inStockCount, lowStockCount, outOfStockCount],
+                         data: [materials.in_stock, materials.low_stock, materials.out_of_stock],
                          backgroundColor: ['rgba(34, 197, 94, 0.6)', 'rgba(249, 115, 22, 0.6)', 'rgba(239, 68, 68, 0.6)',],
                          borderColor: ['rgba(22, 163, 74, 1)', 'rgba(217, 70, 29, 1)', 'rgba(220, 38, 38, 1)',],
                          borderWidth: 1,
                      }],
-                 });
-
-                 // Check for overall fetch errors
-                if (results.some(res => res.status === 'rejected')) {
-                    // Check if specific essential data failed, or just show a general warning
-                     if (machineRes.status === 'rejected' || materialRes.status === 'rejected') {
-                         setError("Core dashboard data failed to load.");
-                     } else {
-                         setError("Some dashboard data failed to load.");
-                     }
-                }
+                 } : null);
 
             } catch (err) {
                  if (!isMounted) return;
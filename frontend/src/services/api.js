@@ -112,6 +112,28 @@ api.interceptors.response.use(
 );
 
 
+// --- Paginated lists ---
+// List endpoints return { count, next, previous, results } pages of 100 rows.
+// Follow the next links and resolve with every row in response.data,
+// so list pages and dropdowns keep receiving a plain array.
+const listAll = async (url, config = {}) => {
+    const response = await api.get(url, config);
+    let page = response.data;
+    if (!page || !Array.isArray(page.results) || !('next' in page)) {
+        return response; // Not paginated
+    }
+
+    const rows = [...page.results];
+    const count = page.count;
+    while (page.next) {
+        // The first page already counted the rows, skip COUNT(*) on the rest
+        page = (await api.get(page.next, { params: { count: false } })).data;
+        rows.push(...page.results);
+    }
+    return { ...response, data: rows, count };
+};
+
+
 // --- API Functions ---
 
 // Auth
@@ -124,53 +146,59 @@ export const blacklistToken = (refresh) => api.post('/token/blacklist/', { refre
 export const getUserInfo = () => api.get('/user/'); // Gets current logged-in user
 // --- ADDED listUsers function ---
 // NOTE: Assumes a '/users/' endpoint exists. Verify with your backend API.
-export const listUsers = () => api.get('/users/'); // Gets a list of all users (permissions may apply)
+export const listUsers = () => listAll('/users/'); // Gets a list of all users (permissions may apply)
 // --- End ADDED listUsers function ---
 export const getUserDetail = (userId) => api.get(`/user/${userId}/`); // Gets details for a specific user
 
 // --- Skill Matrix ---
-export const listSkills = () => api.get('/skill-matrix/');
+export const listSkills = () => listAll('/skill-matrix/');
+// params: { skill: ['CNC:ADVANCED'], category: ['ELECTRICAL'], match: 'all' | 'any' }
+export const matchSkills = (params) => api.get('/skill-matrix/match/', { params, paramsSerializer: { indexes: null } });
 export const createSkill = (data) => api.post('/skill/', data);
 export const getSkillDetail = (id) => api.get(`/skill/${id}/`);
 export const updateSkill = (id, data) => api.put(`/skill/${id}/`, data);
 export const deleteSkill = (id) => api.delete(`/skill/${id}/`);
 
 // --- Department ---
-export const listDepartments = () => api.get('/department/');
+export const listDepartments = () => listAll('/department/');
 export const createDepartment = (data) => api.post('/department/', data);
 export const getDepartmentDetail = (id) => api.get(`/department/${id}/`);
 export const updateDepartment = (id, data) => api.put(`/department/${id}/`, data);
 export const deleteDepartment = (id) => api.delete(`/department/${id}/`);
 
 // --- Workshop ---
-export const listWorkshops = () => api.get('/workshop/');
+export const listWorkshops = () => listAll('/workshop/');
 export const createWorkshop = (data) => api.post('/workshop/', data);
 export const getWorkshop = (id) => api.get(`/workshop/${id}/`);
 export const updateWorkshop = (id, data) => api.put(`/workshop/${id}/`, data);
 export const deleteWorkshop = (id) => api.delete(`/workshop/${id}/`);
 
 // --- Machine ---
-export const listMachines = () => api.get('/machine/');
+export const listMachines = () => listAll('/machine/');
 export const createMachine = (data) => api.post('/machine/', data);
 export const getMachine = (id) => api.get(`/machine/${id}/`);
 export const updateMachine = (id, data) => api.put(`/machine/${id}/`, data);
 export const deleteMachine = (id) => api.delete(`/machine/${id}/`);
 
 // --- Supplier ---
-export const listSuppliers = () => api.get('/supplier/');
+export const listSuppliers = () => listAll('/supplier/');
 export const createSupplier = (data) => api.post('/supplier/', data);
 export const getSupplierDetail = (id) => api.get(`/supplier/${id}/`);
 export const updateSupplier = (id, data) => api.put(`/supplier/${id}/`, data);
 export const deleteSupplier = (id) => api.delete(`/supplier/${id}/`);
 
 // --- Material ---
-export const listMaterials = () => api.get('/material/');
+export const listMaterials = () => listAll('/material/');
+export const listLowStockMaterials = () => listAll('/material/low-stock/');
 export const createMaterial = (data) => api.post('/material/', data);
 export const getMaterialDetail = (id) => api.get(`/material/${id}/`);
 export const updateMaterial = (id, data) => api.put(`/material/${id}/`, data);
 export const deleteMaterial = (id) => api.delete(`/material/${id}/`);
 
-export const listProducts = () => api.get('/product/');
+// --- Dashboard ---
+export const getDashboardSummary = () => api.get('/dashboard/summary/'); // Role specific counts in one call
+
+export const listProducts = () => listAll('/product/');
 export const getProductDetail = (id) => api.get(`/product/${id}/`);
 export const createProduct = (data) => api.post('/product/', data);
 export const updateProduct = (id, data) => api.patch(`/product/${id}/`, data);